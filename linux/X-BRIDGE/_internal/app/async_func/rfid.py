@@ -1,41 +1,27 @@
 from app.services import rfid_manager
 import logging
 import asyncio
-from app.core import settings
+import sys
+from app.core import settings, event_bus
+from app.core.events import TagsCleared
 from datetime import datetime, timedelta
 from app.models import get_all_models
+from app.services.rfid.tag_store import wait_for_primary
 
 
 async def connect_on_startup():
 	"""Connect to RFID devices on application startup."""
-	logging.info('Connecting to RFID devices on startup...')
+	# With several ingest workers only the primary one talks to the readers
+	if settings.TAG_STORE_URL:
+		await wait_for_primary(rfid_manager.tags)
 
-	# Attempt initial connect once, then monitor the connection tasks. If all
-	# tasks finish (e.g., due to errors), attempt reconnect with a small backoff.
+	logging.info('Connecting to RFID devices on startup...')
+	await rfid_manager.reconciler.connect_all()
 	try:
-		await rfid_manager.devices.connect_devices()
-	except Exception as e:
-		logging.error(f'Error during initial devices.connect_devices(): {e}')
-
-	backoff_seconds = 1
-	while True:
-		# get current connect tasks
-		tasks = getattr(rfid_manager.devices, '_connect_tasks', []) or []
-		# If there are no tasks or all are done, attempt to reconnect after backoff
-		if not tasks or all(t.done() for t in tasks):
-			await asyncio.sleep(backoff_seconds)
-			try:
-				await rfid_manager.devices.connect_devices()
-			except Exception as e:
-				logging.error(f'Error reconnecting devices: {e}')
-				# increase backoff up to a limit to avoid tight restart loops
-				backoff_seconds = min(backoff_seconds * 2, 60)
-				continue
-			# reset backoff on successful start
-			backoff_seconds = 1
-		else:
-			# tasks are running; check again later
-			await asyncio.sleep(1)
+		# From here on the supervisor reconnects each device on its own backoff
+		await asyncio.Event().wait()
+	finally:
+		await rfid_manager.supervisor.stop_all()
 
 
 async def clear_old_tags():
@@ -50,6 +36,42 @@ async def clear_old_tags():
 		timestamp = datetime.now() - timedelta(seconds=settings.CLEAR_OLD_TAGS_INTERVAL)
 		logging.info(f'Removing tags before {timestamp}')
 		rfid_manager.tags.remove_tags_before_timestamp(timestamp)
+		event_bus.publish(TagsCleared(before=timestamp))
+
+
+async def flush_tag_presence():
+	"""Periodically upsert buffered reads into the tag_presence table."""
+	try:
+		while True:
+			await asyncio.sleep(settings.PRESENCE_FLUSH_INTERVAL or 1)
+			await rfid_manager.integration.flush_presence()
+	finally:
+		# Don't lose the last batch on shutdown
+		await rfid_manager.integration.flush_presence()
+
+
+async def flush_read_rollups():
+	"""Flush read counters into the rollup tables and apply their retention hourly."""
+	last_purge = None
+	try:
+		while True:
+			await asyncio.sleep(settings.ROLLUP_FLUSH_INTERVAL or 10)
+			await rfid_manager.integration.flush_rollups()
+
+			now = datetime.now()
+			if last_purge is None or now - last_purge >= timedelta(hours=1):
+				last_purge = now
+				deleted = await rfid_manager.integration.purge_rollups(
+					{
+						'minute': settings.ROLLUP_MINUTE_RETENTION_DAYS,
+						'hour': settings.ROLLUP_HOUR_RETENTION_DAYS,
+					}
+				)
+				for table_name, deleted_count in deleted.items():
+					if deleted_count > 0:
+						logging.info(f'Deleted {deleted_count} expired rows from {table_name}')
+	finally:
+		await rfid_manager.integration.flush_rollups()
 
 
 async def clear_db():
@@ -85,37 +107,43 @@ async def clear_db():
 		# Get all models
 		models = get_all_models()
 
-		with rfid_manager.integration.db_manager.get_session() as session:
-			for model in models:
-				# Determine which timestamp column to use (prefer updated_at, fallback to created_at)
-				timestamp_column = None
-				if hasattr(model, 'updated_at'):
-					timestamp_column = model.updated_at
-				elif hasattr(model, 'created_at'):
-					timestamp_column = model.created_at
-				else:
-					logging.info(
-						f"Model {model.__tablename__} does not have 'updated_at' or 'created_at' column. Skipping."
-					)
-					continue
-
-				try:
-					# Delete old records
-					deleted_count = (
-						session.query(model).filter(timestamp_column < cutoff_date).delete()
-					)
-					session.commit()
-
-					if deleted_count > 0:
-						logging.info(
-							f'Deleted {deleted_count} old records from {model.__tablename__}'
-						)
-					else:
-						logging.info(f'No old records to delete from {model.__tablename__}')
-
-				except Exception as e:
-					logging.error(f'Error clearing {model.__tablename__}: {e}')
-					session.rollback()
+		# Runs on the async engine or in a worker thread, never on the event loop
+		deleted = await rfid_manager.integration.clear_old_records(models, cutoff_date)
+		for table_name, deleted_count in deleted.items():
+			if deleted_count > 0:
+				logging.info(f'Deleted {deleted_count} old records from {table_name}')
+			else:
+				logging.info(f'No old records to delete from {table_name}')
 
 		logging.info('Database cleanup completed.')
 		logging.info(f"{'='*60}")
+
+
+async def flush_capture():
+	"""Write buffered capture records to disk so an idle capture is never behind."""
+	try:
+		while True:
+			await asyncio.sleep(settings.CAPTURE_FLUSH_INTERVAL or 1)
+			rfid_manager.recorder.flush()
+	finally:
+		# Close the file cleanly on shutdown
+		rfid_manager.recorder.stop()
+
+
+async def run_sink_worker():
+	"""Run the integration sinks in a separate process while SINK_WORKER is enabled."""
+	while not settings.SINK_WORKER:
+		await asyncio.sleep(60)
+
+	if getattr(sys, 'frozen', False):
+		# The bundled launcher has no entry point for a spawned sink process
+		logging.error('[ SINK ] SINK_WORKER is not supported by this build, integrations stay in-process')
+		return
+
+	await rfid_manager.sink.run(
+		directory=settings.SINK_RING_PATH,
+		size_mb=settings.SINK_RING_MB,
+		batch_size=settings.SINK_BATCH_SIZE,
+		# Repeated reads only matter to the presence/rollup tables
+		forward_reads=rfid_manager.integration.db_manager is not None,
+	)
@@ -4,7 +4,8 @@ import os
 from .build_templates import TemplateManager
 from .indicator import Indicator
 from smartx_rfid.utils.path import get_frozen_path
-from smartx_rfid.utils import AlertsManager
+from .events import event_bus, PublishingAlertsManager
+from .tracing import Tracer
 
 # DEFAULT VARS
 FILES_PATH = get_frozen_path('config')
@@ -20,6 +21,9 @@ EXAMPLE_PATH = get_frozen_path('examples')
 # settings
 settings = Settings(CONFIG_PATH)
 
+# GPO decision tracing
+tracer = Tracer(slow_ms=lambda: settings.SLOW_DECISION_MS)
+
 # logging
 logger = LoggerManager(
 	log_path=settings.LOG_PATH,
@@ -30,5 +34,5 @@ logger = LoggerManager(
 # templates
 templates = TemplateManager(TEMPLATES_PATH).templates
 
-# alerts
-alerts_manager = AlertsManager()
+# alerts (also published on the event bus)
+alerts_manager = PublishingAlertsManager()
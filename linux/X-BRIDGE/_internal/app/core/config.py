@@ -2,6 +2,9 @@ import json
 import logging
 import os
 
+# Set at runtime, not by the user: never returned as settings nor saved
+RUNTIME_KEYS = {'TAG_STORE_URL'}
+
 
 class Settings:
 	def __init__(self, config_path):
@@ -46,12 +49,44 @@ class Settings:
 		self.DATABASE_URL: str | None = data.get('DATABASE_URL', None)
 		self.XTRACK_URL: str | None = data.get('XTRACK_URL', None)
 		self.PORT: int = data.get('PORT', 5000)
+		self.PRESENCE_FLUSH_INTERVAL: float = data.get('PRESENCE_FLUSH_INTERVAL', 1.0)
+		self.ROLLUP_FLUSH_INTERVAL: float = data.get('ROLLUP_FLUSH_INTERVAL', 10.0)
+		self.ROLLUP_MINUTE_RETENTION_DAYS: int | None = data.get('ROLLUP_MINUTE_RETENTION_DAYS', 7)
+		self.ROLLUP_HOUR_RETENTION_DAYS: int | None = data.get('ROLLUP_HOUR_RETENTION_DAYS', 365)
+		self.LOOP_MONITOR_INTERVAL: float = data.get('LOOP_MONITOR_INTERVAL', 0.1)
+		self.LOOP_STALL_THRESHOLD: float = data.get('LOOP_STALL_THRESHOLD', 0.5)
+		self.DIAGNOSTICS_TOKEN: str | None = data.get('DIAGNOSTICS_TOKEN', None)
+		self.CAPTURE_PATH: str = data.get('CAPTURE_PATH', 'Captures')
+		self.CAPTURE_MAX_MB: float | None = data.get('CAPTURE_MAX_MB', 512.0)
+		self.CAPTURE_FLUSH_INTERVAL: float = data.get('CAPTURE_FLUSH_INTERVAL', 1.0)
+		# Multi-process ingestion: shared tag store address and worker count (app/cluster.py).
+		# The store URL is runtime state exported by app/cluster.py to its workers: the
+		# environment wins, and only a value written in config.json by hand is saved back
+		self._tag_store_url_file = data.get('TAG_STORE_URL', getattr(self, '_tag_store_url_file', None))
+		self.TAG_STORE_URL: str | None = os.environ.get('TAG_STORE_URL') or self._tag_store_url_file
+		self.INGEST_WORKERS: int = data.get('INGEST_WORKERS', 1)
+		# Integration sinks in a separate process fed through a memory-mapped ring
+		self.SINK_WORKER: bool = data.get('SINK_WORKER', False)
+		self.SINK_RING_PATH: str = data.get('SINK_RING_PATH', 'Sink')
+		self.SINK_RING_MB: float = data.get('SINK_RING_MB', 16.0)
+		self.SINK_BATCH_SIZE: int = data.get('SINK_BATCH_SIZE', 500)
+		# Federation: this node's name and the bridges whose tags are merged in
+		self.NODE_ID: str | None = data.get('NODE_ID', None)
+		self.FEDERATION_PEERS: list[str] = data.get('FEDERATION_PEERS', [])
+		self.FEDERATION_WAIT: float = data.get('FEDERATION_WAIT', 15.0)
+		self.FEDERATION_INTERVAL: float = data.get('FEDERATION_INTERVAL', 0.5)
+		# GPO decisions at least this slow (ms) are kept for /tracing/get_slow
+		self.SLOW_DECISION_MS: float | None = data.get('SLOW_DECISION_MS', 250.0)
+		# Bulk protected-mode jobs: job files, commands in flight per device, days kept
+		self.PROTECT_JOBS_PATH: str = data.get('PROTECT_JOBS_PATH', 'ProtectJobs')
+		self.PROTECT_WINDOW: int = data.get('PROTECT_WINDOW', 8)
+		self.PROTECT_JOBS_RETENTION_DAYS: int | None = data.get('PROTECT_JOBS_RETENTION_DAYS', 90)
 
 	def get_current_settings(self):
 		return {
 			key: value
 			for key, value in vars(self).items()
-			if not key.startswith('_') and not callable(value)
+			if not key.startswith('_') and not callable(value) and key not in RUNTIME_KEYS
 		}
 
 	def save(self):
@@ -61,6 +96,8 @@ class Settings:
 
 			# Dynamically get all attributes except _config_path
 			data = self.get_current_settings()
+			if self._tag_store_url_file is not None:
+				data['TAG_STORE_URL'] = self._tag_store_url_file
 
 			# Make sure folder exists
 			os.makedirs(os.path.dirname(self._config_path), exist_ok=True)
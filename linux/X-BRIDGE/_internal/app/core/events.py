@@ -0,0 +1,269 @@
+"""
+In-process event bus.
+
+Producers (RfidManager, the controller, device callbacks, alerts) publish typed
+events; consumers subscribe to the types they care about and react to changes
+instead of polling shared state. publish() may be called from any thread and
+never blocks: each subscription has a bounded queue that drops its oldest
+event when the consumer falls behind (consumers want the latest state, and the
+drop count is kept on the subscription).
+
+	# asyncio consumer
+	with event_bus.subscribe(TagAdded, TagsCleared) as subscription:
+		async for event in subscription:
+			...
+
+	# thread consumer (tray)
+	subscription = event_bus.subscribe(DeviceStateChanged, loop=None)
+	event = subscription.get_blocking()
+"""
+
+import asyncio
+import queue
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from smartx_rfid.utils import AlertsManager
+
+
+# [ EVENTS ]
+@dataclass(frozen=True, slots=True)
+class Event:
+	timestamp: datetime = field(default_factory=datetime.now, kw_only=True)
+
+	def to_dict(self) -> dict:
+		return {'type': type(self).__name__, **asdict(self)}
+
+
+@dataclass(frozen=True, slots=True)
+class TagAdded(Event):
+	device: str
+	tag: dict
+
+
+@dataclass(frozen=True, slots=True)
+class TagsCleared(Event):
+	"""All tags, the tags of `device`, or the tags last seen before `before`."""
+
+	device: str | None = None
+	before: datetime | None = None
+
+
+# Connection states of a device, shared by every app publishing DeviceStateChanged
+DEVICE_STATES = ('connecting', 'connected', 'reading', 'backoff', 'failed')
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceStateChanged(Event):
+	"""`state` is one of DEVICE_STATES, or None when the device was removed."""
+
+	device: str
+	state: str | None
+	previous: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ReadingStarted(Event):
+	device: str
+
+
+@dataclass(frozen=True, slots=True)
+class ReadingStopped(Event):
+	device: str
+
+
+@dataclass(frozen=True, slots=True)
+class BoxInfoChanged(Event):
+	box_info: dict
+
+
+@dataclass(frozen=True, slots=True)
+class ControllerDecision(Event):
+	device: str
+	decision: str  # approved / rejected
+	box_info: dict
+	success: bool = True
+	message: str = ''
+
+
+@dataclass(frozen=True, slots=True)
+class ProtectJobProgress(Event):
+	"""State and counters of a bulk protected-mode job (on state changes and checkpoints)."""
+
+	job_id: str
+	device: str
+	status: str
+	total: int
+	done: int
+	succeeded: int
+	failed: int
+
+
+@dataclass(frozen=True, slots=True)
+class AlertRaised(Event):
+	message: str
+	level: str = 'info'
+	source: str | None = None
+
+
+EVENT_TYPES: dict[str, type[Event]] = {
+	cls.__name__: cls
+	for cls in (
+		TagAdded,
+		TagsCleared,
+		DeviceStateChanged,
+		ReadingStarted,
+		ReadingStopped,
+		BoxInfoChanged,
+		ControllerDecision,
+		ProtectJobProgress,
+		AlertRaised,
+	)
+}
+
+
+# [ BUS ]
+class Subscription:
+	def __init__(self, bus: 'EventBus', types: frozenset[type], maxsize: int, loop):
+		self.bus = bus
+		self.types = types
+		self.loop: asyncio.AbstractEventLoop | None = loop
+		self.dropped = 0
+		self._queue = asyncio.Queue(maxsize) if loop is not None else queue.Queue(maxsize)
+
+	def _deliver(self, event: Event) -> None:
+		while True:
+			try:
+				self._queue.put_nowait(event)
+				return
+			except (asyncio.QueueFull, queue.Full):
+				try:
+					self._queue.get_nowait()
+					self.dropped += 1
+				except (asyncio.QueueEmpty, queue.Empty):
+					pass
+
+	async def get(self) -> Event:
+		return await self._queue.get()
+
+	def get_blocking(self, timeout: float | None = None) -> Event | None:
+		"""Thread subscriptions only; None on timeout."""
+		try:
+			return self._queue.get(timeout=timeout)
+		except queue.Empty:
+			return None
+
+	def drain(self) -> list[Event]:
+		"""Events already queued, without waiting."""
+		events = []
+		while True:
+			try:
+				events.append(self._queue.get_nowait())
+			except (asyncio.QueueEmpty, queue.Empty):
+				return events
+
+	def close(self) -> None:
+		self.bus.unsubscribe(self)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def __aiter__(self):
+		return self
+
+	async def __anext__(self) -> Event:
+		return await self.get()
+
+
+class EventBus:
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._subscriptions: list[Subscription] = []
+		# Copy-on-write index so publish() never takes the lock
+		self._by_type: dict[type, tuple[Subscription, ...]] = {}
+
+	def subscribe(self, *types: type[Event], maxsize: int = 100, loop=...) -> Subscription:
+		"""
+		Subscribe to `types` (every event when empty). Events are delivered to the
+		running event loop, or to a thread-safe blocking queue with loop=None.
+		"""
+		if loop is ...:
+			loop = asyncio.get_running_loop()
+		subscription = Subscription(self, frozenset(types), maxsize, loop)
+		with self._lock:
+			self._subscriptions.append(subscription)
+			self._reindex()
+		return subscription
+
+	def unsubscribe(self, subscription: Subscription) -> None:
+		with self._lock:
+			if subscription in self._subscriptions:
+				self._subscriptions.remove(subscription)
+				self._reindex()
+
+	def _reindex(self) -> None:
+		self._by_type = {
+			cls: tuple(s for s in self._subscriptions if not s.types or cls in s.types)
+			for cls in EVENT_TYPES.values()
+		}
+
+	def publish(self, event: Event) -> None:
+		subscriptions = self._by_type.get(type(event))
+		if not subscriptions:
+			return
+		try:
+			current = asyncio.get_running_loop()
+		except RuntimeError:
+			current = None
+		for subscription in subscriptions:
+			if subscription.loop is None or subscription.loop is current:
+				subscription._deliver(event)
+				continue
+			try:
+				subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+			except RuntimeError:
+				# Its loop is closed: the consumer is gone
+				self.unsubscribe(subscription)
+
+	def subscribers(self) -> int:
+		return len(self._subscriptions)
+
+
+event_bus = EventBus()
+
+
+class PublishingAlertsManager(AlertsManager):
+	"""
+	AlertsManager that also publishes AlertRaised. The last 100 alerts no event
+	stream client has received yet are kept for /get_alerts.
+	"""
+
+	def __init__(self):
+		super().__init__()
+		self.alerts: deque[AlertRaised] = deque(maxlen=100)
+		self._lock = threading.Lock()
+
+	def get_alerts(self):
+		with self._lock:
+			alerts = [{'message': alert.message, 'level': alert.level} for alert in self.alerts]
+			self.alerts.clear()
+		return alerts
+
+	def add_alert(self, message: str, level: str = 'info'):
+		alert = AlertRaised(message, level)
+		with self._lock:
+			self.alerts.append(alert)
+		event_bus.publish(alert)
+
+	def delivered(self, alert: AlertRaised):
+		"""An event stream client received `alert`: /get_alerts must not replay it."""
+		with self._lock:
+			try:
+				self.alerts.remove(alert)
+			except ValueError:
+				pass
@@ -1,6 +1,7 @@
 import inspect
 import logging
 import sys
+import time
 
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -43,6 +44,8 @@ class SafeRequestMiddleware(BaseHTTPMiddleware):
 	"""
 
 	async def dispatch(self, request, call_next):
+		# Origin of the request for handlers that trace their latency
+		request.state.received = time.perf_counter()
 		try:
 			response = await call_next(request)
 			return response
@@ -0,0 +1,194 @@
+"""
+Async database manager for SMARTX Connector.
+
+Mirrors the parts of smartx_rfid's DatabaseManager used by the app, but runs on
+SQLAlchemy's asyncio extension so integrations don't go through the thread pool.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Optional, Type
+
+from smartx_rfid.db._main import DatabaseConnectionError, DatabaseError, DatabaseOperationError
+
+try:
+	from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+except ImportError as e:
+	raise ImportError(
+		'SQLAlchemy >= 2.0 is required. Please install it with: pip install sqlalchemy'
+	) from e
+
+# Drivers recognised as asyncio drivers in DATABASE_URL (dialect+driver://...)
+ASYNC_DRIVERS = ('aiosqlite', 'asyncpg', 'aiomysql', 'asyncmy', 'psycopg_async')
+
+
+def is_async_database_url(database_url: str | None) -> bool:
+	"""Return True if the DATABASE_URL scheme selects an asyncio driver."""
+	if not database_url or '://' not in database_url:
+		return False
+	scheme = database_url.split('://', 1)[0].lower()
+	if '+' not in scheme:
+		return False
+	return scheme.split('+', 1)[1] in ASYNC_DRIVERS
+
+
+class AsyncDatabaseManager:
+	"""
+	Database manager backed by an AsyncEngine.
+
+	Exposes the same lifecycle as DatabaseManager (initialize, register_models,
+	create_tables, get_session, close) with awaitable methods.
+	"""
+
+	def __init__(
+		self,
+		database_url: str,
+		echo: bool = False,
+		pool_size: int = 10,
+		max_overflow: int = 20,
+		pool_timeout: int = 30,
+		pool_recycle: int = 3600,
+		**engine_kwargs,
+	):
+		self.database_url = database_url
+		self.echo = echo
+		self._engine: Optional[AsyncEngine] = None
+		self._session_factory: Optional[async_sessionmaker] = None
+		self._models_registry: List[Type] = []
+		self._tables_created = False
+		self._tables_lock: Optional[asyncio.Lock] = None
+		# SQLite has a single writer: concurrent sessions on separate connections
+		# fail with 'database is locked', so they are serialized instead
+		self._is_sqlite = database_url.lower().startswith('sqlite')
+		self._sqlite_lock: Optional[asyncio.Lock] = None
+
+		self._engine_config = {
+			'echo': echo,
+			'pool_pre_ping': True,
+			**engine_kwargs,
+		}
+		# SQLite uses a static/null pool, pool sizing only applies to server databases
+		if not self._is_sqlite:
+			self._engine_config.update(
+				{
+					'pool_size': pool_size,
+					'max_overflow': max_overflow,
+					'pool_timeout': pool_timeout,
+					'pool_recycle': pool_recycle,
+				}
+			)
+
+		self.logger = logging.getLogger(__name__)
+
+	@property
+	def engine(self) -> Optional[AsyncEngine]:
+		return self._engine
+
+	@property
+	def dialect_name(self) -> str | None:
+		return self._engine.dialect.name if self._engine else None
+
+	def initialize(self) -> None:
+		"""Create the async engine and session factory."""
+		try:
+			if self._engine is None:
+				self._engine = create_async_engine(self.database_url, **self._engine_config)
+				self._session_factory = async_sessionmaker(
+					bind=self._engine, expire_on_commit=False
+				)
+				self.logger.info(
+					f'Async database initialized successfully: '
+					f'{self._engine.dialect.name} ({self._engine.url.database})'
+				)
+		except Exception as e:
+			self.logger.error(f'Failed to initialize async database: {str(e)}')
+			raise DatabaseConnectionError(f'Async database initialization failed: {str(e)}', e)
+
+	def register_models(self, *models: Type) -> None:
+		"""Register SQLAlchemy models for table creation."""
+		for model in models:
+			if model not in self._models_registry:
+				self._models_registry.append(model)
+
+	async def create_tables(self, checkfirst: bool = True) -> None:
+		"""
+		Create all registered model tables.
+
+		Tables can't be created when the app is built (no running loop yet), so
+		get_session() calls this once, lazily, before the first session is opened.
+		"""
+		if not self._engine:
+			raise DatabaseError('Database not initialized. Call initialize() first.')
+
+		if not self._models_registry:
+			self.logger.warning('No models registered for table creation')
+			return
+
+		try:
+			metadata = self._models_registry[0].metadata
+			async with self._engine.begin() as conn:
+				await conn.run_sync(metadata.create_all, checkfirst=checkfirst)
+			self._tables_created = True
+			self.logger.info(f'Tables created successfully for {len(self._models_registry)} models')
+		except Exception as e:
+			self.logger.error(f'Failed to create tables: {str(e)}')
+			raise DatabaseOperationError(f'Table creation failed: {str(e)}', e)
+
+	@asynccontextmanager
+	async def get_session(self):
+		"""
+		Get an AsyncSession with automatic commit/rollback and cleanup.
+
+		Yields:
+		    AsyncSession: SQLAlchemy async session
+		"""
+		if not self._session_factory:
+			raise DatabaseError('Database not initialized. Call initialize() first.')
+
+		if not self._tables_created:
+			if self._tables_lock is None:
+				self._tables_lock = asyncio.Lock()
+			async with self._tables_lock:
+				if not self._tables_created:
+					await self.create_tables()
+
+		if self._is_sqlite:
+			if self._sqlite_lock is None:
+				self._sqlite_lock = asyncio.Lock()
+			async with self._sqlite_lock:
+				async with self._session() as session:
+					yield session
+		else:
+			async with self._session() as session:
+				yield session
+
+	@asynccontextmanager
+	async def _session(self):
+		session = self._session_factory()
+		try:
+			yield session
+			await session.commit()
+		except Exception as e:
+			await session.rollback()
+			self.logger.error(f'Session error: {str(e)}')
+			raise DatabaseOperationError(f'Database operation failed: {str(e)}', e)
+		finally:
+			await session.close()
+
+	async def close(self) -> None:
+		"""Dispose the engine and release all pooled connections."""
+		try:
+			if self._engine:
+				await self._engine.dispose()
+			self.logger.info('Async database connections closed successfully')
+		except Exception as e:
+			self.logger.error(f'Error closing async database connections: {str(e)}')
+		finally:
+			self._engine = None
+			self._session_factory = None
+			self._tables_created = False
+
+	def __repr__(self) -> str:
+		status = 'initialized' if self._engine else 'not_initialized'
+		return f'AsyncDatabaseManager(status={status}, url={self.database_url})'
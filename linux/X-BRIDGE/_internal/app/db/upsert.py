@@ -0,0 +1,113 @@
+"""
+Dialect-specific batched upserts.
+
+Builds a single INSERT ... ON CONFLICT (PostgreSQL/SQLite) or
+INSERT ... ON DUPLICATE KEY UPDATE (MySQL) statement executed with a list of rows,
+with a select-then-write fallback for other dialects. Works on a sync Session;
+from an AsyncSession use `await session.run_sync(upsert_rows, ...)`.
+"""
+
+from typing import Any, Dict, Iterable, List, Sequence
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+
+
+def _insert_for_dialect(dialect_name: str):
+	if dialect_name == 'postgresql':
+		from sqlalchemy.dialects.postgresql import insert
+	elif dialect_name == 'sqlite':
+		from sqlalchemy.dialects.sqlite import insert
+	elif dialect_name in ('mysql', 'mariadb'):
+		from sqlalchemy.dialects.mysql import insert
+	else:
+		return None
+	return insert
+
+
+def upsert_rows(
+	session: Session,
+	model,
+	rows: List[Dict[str, Any]],
+	conflict_columns: Sequence[str],
+	update_columns: Iterable[str] = (),
+	increment_columns: Iterable[str] = (),
+	touch_updated_at: bool = True,
+) -> int:
+	"""
+	Insert `rows` into `model`, updating rows that already exist.
+
+	Args:
+	    session: Sync SQLAlchemy session
+	    model: Mapped model class
+	    rows: Column -> value dicts, all with the same keys and unique conflict keys
+	        (PostgreSQL rejects a statement that updates the same row twice)
+	    conflict_columns: Primary key / unique columns identifying a row
+	    update_columns: Columns overwritten with the incoming value on conflict
+	    increment_columns: Columns added to the stored value on conflict
+	    touch_updated_at: Set `updated_at` to now() on conflict when the model has it
+
+	Returns:
+	    int: Number of rows sent
+	"""
+	if not rows:
+		return 0
+
+	update_columns = list(update_columns)
+	increment_columns = list(increment_columns)
+	table = model.__table__
+	dialect_name = session.get_bind().dialect.name
+	insert = _insert_for_dialect(dialect_name)
+	has_updated_at = touch_updated_at and 'updated_at' in table.c
+
+	if insert is None:
+		_upsert_fallback(session, model, rows, conflict_columns, update_columns, increment_columns)
+		return len(rows)
+
+	stmt = insert(table)
+	if dialect_name in ('mysql', 'mariadb'):
+		incoming = stmt.inserted
+	else:
+		incoming = stmt.excluded
+
+	set_ = {name: incoming[name] for name in update_columns}
+	for name in increment_columns:
+		set_[name] = table.c[name] + incoming[name]
+	if has_updated_at:
+		set_['updated_at'] = func.now()
+
+	if dialect_name in ('mysql', 'mariadb'):
+		stmt = stmt.on_duplicate_key_update(**set_)
+	else:
+		stmt = stmt.on_conflict_do_update(index_elements=list(conflict_columns), set_=set_)
+
+	session.execute(stmt, rows)
+	return len(rows)
+
+
+def _upsert_fallback(session, model, rows, conflict_columns, update_columns, increment_columns):
+	"""Portable path: load existing rows by key, then update or add."""
+	key_columns = [getattr(model, name) for name in conflict_columns]
+	keys = [tuple(row[name] for name in conflict_columns) for row in rows]
+
+	if len(key_columns) == 1:
+		condition = key_columns[0].in_([key[0] for key in keys])
+	else:
+		condition = tuple_(*key_columns).in_(keys)
+
+	existing = {
+		tuple(getattr(obj, name) for name in conflict_columns): obj
+		for obj in session.scalars(select(model).where(condition))
+	}
+
+	for key, row in zip(keys, rows):
+		obj = existing.get(key)
+		if obj is None:
+			obj = model(**row)
+			session.add(obj)
+			existing[key] = obj
+			continue
+		for name in update_columns:
+			setattr(obj, name, row[name])
+		for name in increment_columns:
+			setattr(obj, name, (getattr(obj, name) or 0) + row[name])
@@ -1,7 +1,8 @@
 """
 RFID models for SMARTX Connector.
 
-Defines the Tag and Event models for storing RFID reader data
+Defines the Tag and Event models for storing RFID reader data,
+plus the TagPresence current-state table and the read rollup tables,
 with proper indexing and relationships.
 """
 
@@ -110,3 +111,91 @@ class Event(Base, BaseMixin):
 		Index('ix_events_device_created', 'device', 'created_at'),
 		Index('ix_events_type_created', 'event_type', 'created_at'),
 	)
+
+
+class TagPresence(Base, BaseMixin):
+	"""
+	Current-state view of every tag ever read.
+
+	One row per tag (keyed by TID, or EPC when the tag has no TID) holding where
+	it was last seen. Maintained by batched upserts from the ingest path, so
+	"what is at device X" is an index lookup instead of a GROUP BY over `tags`.
+	"""
+
+	__tablename__ = 'tag_presence'
+
+	# TID, or EPC when the reader doesn't report TIDs
+	tag_key = Column(String(24), primary_key=True)
+
+	epc = Column(String(24), nullable=False)
+	tid = Column(String(24), nullable=True)
+
+	# Last location
+	device = Column(String(100), nullable=False)
+	ant = Column(Integer, nullable=True)
+	rssi = Column(Integer, nullable=True)
+
+	first_seen = Column(DateTime(timezone=True), nullable=False)
+	last_seen = Column(DateTime(timezone=True), nullable=False)
+	read_count = Column(Integer, nullable=False, default=0)
+
+	# Used by the daily cleanup: tags not seen for STORAGE_DAYS are dropped
+	updated_at = Column(
+		DateTime(timezone=True),
+		server_default=func.now(),
+		onupdate=func.now(),
+		nullable=False,
+	)
+
+	__table_args__ = (
+		Index('ix_tag_presence_device', 'device'),
+		Index('ix_tag_presence_device_ant', 'device', 'ant'),
+		Index('ix_tag_presence_last_seen', 'last_seen'),
+		Index('ix_tag_presence_epc', 'epc'),
+	)
+
+
+class _ReadRollupMixin:
+	"""
+	Columns shared by the read rollup tables.
+
+	One row per time bucket, device, antenna and GTIN with the number of reads and
+	of new (first-seen) tags in that bucket. Rows are never updated after their
+	bucket closes, and retention is handled by the rollup task, not by STORAGE_DAYS
+	(there is no created_at/updated_at column on purpose).
+	"""
+
+	# Start of the bucket (minute or hour)
+	bucket = Column(DateTime(timezone=True), primary_key=True)
+	device = Column(String(100), primary_key=True)
+	# 0 when the reader doesn't report antennas
+	ant = Column(Integer, primary_key=True, default=0)
+	# 'UNKNOWN' for non-SGTIN EPCs, same as TagList.get_gtin_counts
+	gtin = Column(String(14), primary_key=True, default='UNKNOWN')
+
+	read_count = Column(Integer, nullable=False, default=0)
+	new_tag_count = Column(Integer, nullable=False, default=0)
+
+
+class ReadRollupMinute(_ReadRollupMixin, Base, BaseMixin):
+	"""Reads per device/antenna/GTIN per minute."""
+
+	__tablename__ = 'read_rollup_minute'
+
+	__table_args__ = (
+		# bucket leads the primary key, so time-range scans are already indexed
+		Index('ix_read_rollup_minute_device_bucket', 'device', 'bucket'),
+		Index('ix_read_rollup_minute_gtin_bucket', 'gtin', 'bucket'),
+	)
+
+
+class ReadRollupHour(_ReadRollupMixin, Base, BaseMixin):
+	"""Reads per device/antenna/GTIN per hour."""
+
+	__tablename__ = 'read_rollup_hour'
+
+	__table_args__ = (
+		# bucket leads the primary key, so time-range scans are already indexed
+		Index('ix_read_rollup_hour_device_bucket', 'device', 'bucket'),
+		Index('ix_read_rollup_hour_gtin_bucket', 'gtin', 'bucket'),
+	)
@@ -1,11 +1,14 @@
 import logging
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
 from smartx_rfid.utils.path import get_prefix_from_path
 from app.schemas.protected import ProtectedInventoryModel, ProtectedModeModel, ProtectListModel
 from smartx_rfid.schemas.devices import GpoSchema
 
+from app.core import tracer
+from app.core.tracing import Trace
 from app.services import rfid_manager
+from app.services.protect import protect_jobs
 from app.schemas.print import PrintModel
 
 router_prefix = get_prefix_from_path(__file__)
@@ -87,10 +90,15 @@ async def get_device_info(device_name: str):
 @router.get(
 	'/get_devices_info',
 	summary='Get all devices information',
-	description='Returns connection and reading status for all registered devices.',
+	description=(
+		'Returns connection and reading status for all registered devices, with the '
+		'connection supervisor state, retry count and last error of each one.'
+	),
 )
 async def get_devices_info():
 	info = rfid_manager.devices.get_device_info()
+	# Supervisor health: state (connecting/connected/reading/backoff/failed), since, retries
+	info = [{**device, **rfid_manager.supervisor.status(device.get('name'))} for device in info]
 	return JSONResponse(status_code=200, content=info)
 
 
@@ -212,32 +220,51 @@ async def protected_mode(device_name: str, protected_mode: ProtectedModeModel):
 @router.post(
 	'/protected_list/{device_name}',
 	summary='Start or stop protected inventory on a list of tags',
-	description='Starts or stops the protected inventory process on a list of tags for the specified device.',
+	description=(
+		'Starts or stops the protected inventory process on a list of tags for the specified '
+		'device and waits for it. Runs as a /api/v1/protect job (`job_id`); use '
+		'/api/v1/protect/submit for long lists.'
+	),
 )
 async def protected_list(device_name: str, protect_list: ProtectListModel):
-	success_count = 0
-	error_count = 0
-	errors = []
-	for epc in protect_list.epcs:
-		success, msg = await rfid_manager.devices.protected_mode(
-			device_name=device_name,
-			epc=epc,
-			password=protect_list.password,
-			active=protect_list.active,
+	# Same responses as before jobs for an empty list or an unknown device
+	if not protect_list.epcs or rfid_manager.devices.get_device(device_name) is None:
+		errors = [
+			{'epc': epc, 'error': f"Device '{device_name}' not found."} for epc in protect_list.epcs
+		]
+		return JSONResponse(
+			status_code=207 if errors else 200,
+			content={
+				'message': f"Commands sent to device '{device_name}'.",
+				'success_count': 0,
+				'error_count': len(errors),
+				'errors': errors or None,
+			},
 		)
-		if success:
-			success_count += 1
-		else:
-			error_count += 1
-			errors.append({'epc': epc, 'error': msg})
-	status_code = 200 if error_count == 0 else 207  # 207: Multi-Status
+	try:
+		job = await protect_jobs.submit(
+			device_name, protect_list.epcs, protect_list.password, protect_list.active
+		)
+		job = await protect_jobs.wait(job['id'])
+		failed = await protect_jobs.get_results(job['id'], success=False, limit=job['total'])
+	except ValueError as e:
+		return JSONResponse(status_code=400, content={'error': str(e)})
+	except OSError as e:
+		return JSONResponse(status_code=500, content={'error': str(e)})
+
+	errors = [{'epc': row['epc'], 'error': row['error']} for row in failed['data']]
+	status_code = 200 if job['status'] == 'completed' and not errors else 207  # 207: Multi-Status
 	return JSONResponse(
 		status_code=status_code,
 		content={
 			'message': f"Commands sent to device '{device_name}'.",
-			'success_count': success_count,
-			'error_count': error_count,
-			'errors': errors if error_count > 0 else None,
+			'job_id': job['id'],
+			'status': job['status'],
+			'success_count': job['succeeded'],
+			'error_count': job['failed'],
+			'pending_count': job['pending'],
+			'error': job['error'],
+			'errors': errors or None,
 		},
 	)
 
@@ -295,13 +322,22 @@ async def add_to_print_queue(device_name: str, content: PrintModel | list[PrintM
 @router.post(
 	'/write_gpo/{device_name}',
 	summary='Write to GPO pin on a device',
-	description='Writes a value to a specified GPO pin on the device.',
+	description=(
+		'Writes a value to a specified GPO pin on the device. The request and the GPO write '
+		'are timed as the `gpo` flow of /api/v1/tracing.'
+	),
 )
-async def write_gpo(device_name: str, gpo_data: GpoSchema):
-	success, msg = await rfid_manager.devices.write_gpo(
-		device_name=device_name,
-		**gpo_data.model_dump(),
-	)
+async def write_gpo(device_name: str, gpo_data: GpoSchema, request: Request):
+	received = getattr(request.state, 'received', None)
+	trace = Trace('gpo', device_name, origin=received, pin=gpo_data.pin, state=gpo_data.state)
+	# Middleware, body validation and event loop wait before the handler runs
+	trace.span('request', received)
+	with trace.stage('gpo_write'):
+		success, msg = await rfid_manager.devices.write_gpo(
+			device_name=device_name,
+			**gpo_data.model_dump(),
+		)
+	tracer.finish(trace, 'ok' if success else 'failed')
 	if success:
 		return JSONResponse(
 			status_code=200,
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Response
+from smartx_rfid.utils.path import get_prefix_from_path
+
+from app.services.federation import dumps, federation
+
+router_prefix = get_prefix_from_path(__file__)
+router = APIRouter(prefix=router_prefix, tags=[router_prefix])
+
+
+@router.get(
+	'/changes',
+	summary='Get tag changes since a sequence number',
+	description=(
+		'Change stream followed by federation peers. Returns the tags changed and removed '
+		'after `since` and the device events since then, waiting up to `wait` seconds for '
+		'the first change. When `epoch` does not match this bridge (first request or restart) '
+		'or `since` is older than the retained history, `resync` is true and `tags` is a '
+		'full snapshot.'
+	),
+)
+async def get_changes(epoch: str | None = None, since: int = 0, wait: float = 0):
+	data = await federation.changes(epoch or None, since, min(max(wait, 0), 60))
+	# Serialized directly: snapshots can hold every tag in memory
+	return Response(content=dumps(data), media_type='application/json')
+
+
+@router.get(
+	'/status',
+	summary='Get federation status',
+	description='This node id, journal position and the sync state of every peer in FEDERATION_PEERS.',
+)
+async def get_status():
+	return federation.status()
+
+
+@router.get(
+	'/events',
+	summary='Get federated device events',
+	description='Most recent device events of this node and all peers, newest first, with their node.',
+)
+async def get_events(limit: int = 100):
+	return federation.merged_events(limit)
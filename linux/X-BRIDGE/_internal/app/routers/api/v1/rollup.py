@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from typing import Literal
+
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
+from smartx_rfid.utils.path import get_prefix_from_path
+
+from app.services import rfid_manager
+from app.services.rfid.rollup import GROUP_COLUMNS
+
+router_prefix = get_prefix_from_path(__file__)
+router = APIRouter(prefix=router_prefix, tags=[router_prefix])
+
+# Default window when `start` is not given
+DEFAULT_WINDOW = {'minute': timedelta(hours=1), 'hour': timedelta(days=1)}
+
+
+@router.get(
+	'/get_series',
+	summary='Get read counts per time bucket',
+	description=(
+		'Returns reads and new tags per minute or hour from the pre-aggregated rollup '
+		'tables. `group_by` splits each bucket by device, ant and/or gtin; filters '
+		'narrow the series to one device, antenna or GTIN. Defaults to the last hour '
+		'(minute) or the last day (hour).'
+	),
+)
+async def get_series(
+	resolution: Literal['minute', 'hour'] = 'minute',
+	start: datetime | None = None,
+	end: datetime | None = None,
+	group_by: list[str] = Query(default=[]),
+	device: str | None = None,
+	ant: int | None = None,
+	gtin: str | None = None,
+):
+	invalid = [name for name in group_by if name not in GROUP_COLUMNS]
+	if invalid:
+		return JSONResponse(
+			status_code=400,
+			content={'error': f'Invalid group_by {invalid}. Valid: {list(GROUP_COLUMNS)}'},
+		)
+
+	end = end or datetime.now()
+	start = start or end - DEFAULT_WINDOW[resolution]
+	try:
+		series = await rfid_manager.integration.query_rollup_series(
+			resolution=resolution,
+			start=start,
+			end=end,
+			group_by=group_by,
+			device=device,
+			ant=ant,
+			gtin=gtin,
+		)
+	except Exception as e:
+		return JSONResponse(status_code=500, content={'error': str(e)})
+
+	return JSONResponse(
+		status_code=200,
+		content={
+			'resolution': resolution,
+			'start': start.isoformat(),
+			'end': end.isoformat(),
+			'group_by': group_by,
+			'series': series,
+		},
+	)
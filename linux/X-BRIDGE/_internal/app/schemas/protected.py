@@ -45,3 +45,14 @@ class ProtectListModel(ProtectedInventoryModel):
 					f'{info.field_name} must contain only hexadecimal characters (0-9, a-f)'
 				)
 		return [epc.lower() for epc in v]
+
+
+class ProtectResumeModel(BaseModel):
+	# Required when the job was submitted before the bridge restarted
+	password: str | None = Field(None)
+
+	@field_validator('password')
+	def validate_password_length(cls, v, info: ValidationInfo):
+		if v is None:
+			return v
+		return ProtectedInventoryModel.validate_password_length(v, info)
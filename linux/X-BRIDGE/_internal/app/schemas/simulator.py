@@ -40,3 +40,28 @@ class TagGtinSimulator(BaseModel):
 		if v < 1:
 			raise ValueError('start_serial must be at least 1')
 		return v
+
+
+class ContinuousSimulatorConfig(BaseModel):
+	rate: float = Field(500, gt=0, le=50000, description='Target reads per second (all devices)')
+	devices: int = Field(4, ge=1, le=64, description='Virtual devices (SIMULATOR_1..N)')
+	antennas: int = Field(4, ge=1, le=32, description='Antennas per device')
+	population: int = Field(200, ge=1, le=100000, description='Max tags in the field per device')
+	dwell_s: float = Field(10, gt=0, description='Seconds a tag stays in the field')
+	duplicate_ratio: float = Field(
+		0.8, ge=0, le=1, description='Share of reads that re-read a tag already in the field'
+	)
+	rssi_mean: float = Field(-60, ge=-100, le=0)
+	rssi_std: float = Field(6, ge=0, le=30)
+	reading_on_s: float = Field(0, ge=0, description='Reading cycle on time (0 = always reading)')
+	reading_off_s: float = Field(0, ge=0, description='Reading cycle off time')
+	gtins: list[str] = Field(['07894900011517'], min_length=1)
+	tick_ms: float = Field(50, ge=5, le=1000, description='Emission tick; the loop is released between ticks')
+	duration_s: float | None = Field(None, gt=0, description='Stop automatically after this time')
+
+	@field_validator('gtins')
+	def validate_gtins(cls, v):
+		for gtin in v:
+			if not re.fullmatch(r'\d{14}', gtin):
+				raise ValueError(f'GTIN {gtin} must have exactly 14 digits')
+		return v
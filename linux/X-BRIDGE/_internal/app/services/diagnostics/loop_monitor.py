@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+
+from prometheus_client import Counter, Gauge, Histogram
+
+LOOP_LAG = Histogram(
+	'event_loop_lag_seconds',
+	'Delay between when the loop monitor asked to wake up and when it actually ran',
+	buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+LOOP_LAG_MAX = Gauge('event_loop_lag_max_seconds', 'Largest loop lag since startup')
+LOOP_STALLS = Counter('event_loop_stalls_total', 'Loop stalls longer than LOOP_STALL_THRESHOLD')
+
+
+class LoopMonitor:
+	"""
+	Measures asyncio scheduling lag and reports stalls of the event loop.
+
+	`run()` is a coroutine that sleeps `interval` seconds in a loop and records how
+	late it wakes up. A daemon watchdog thread watches the heartbeat `run()` leaves
+	behind: if it goes quiet for longer than `stall_threshold`, the loop is blocked
+	and the watchdog grabs the stack of the loop thread while it is still stuck,
+	so the report shows the code that blocked it.
+	"""
+
+	def __init__(self, interval: float = 0.1, stall_threshold: float = 0.5, max_reports: int = 50):
+		self.interval = interval
+		self.stall_threshold = stall_threshold
+		self.reports: deque[dict] = deque(maxlen=max_reports)
+
+		self.last_lag = 0.0
+		self.max_lag = 0.0
+		self.stall_count = 0
+
+		self.loop: asyncio.AbstractEventLoop | None = None
+		self._heartbeat: float | None = None
+		self._loop_thread_id: int | None = None
+		self._current_stall: dict | None = None
+		self._lock = threading.Lock()
+		self._watchdog: threading.Thread | None = None
+		self._stop = threading.Event()
+
+	# [ LOOP SIDE ]
+	async def run(self):
+		"""Sample loop lag forever; runs as a background task on the monitored loop."""
+		self.loop = asyncio.get_running_loop()
+		self._loop_thread_id = threading.get_ident()
+		self._heartbeat = time.monotonic()
+		self._start_watchdog()
+		try:
+			while True:
+				expected = time.monotonic() + self.interval
+				await asyncio.sleep(self.interval)
+				now = time.monotonic()
+				self._beat(now, max(0.0, now - expected))
+		finally:
+			self._stop.set()
+
+	def _beat(self, now: float, lag: float):
+		self.last_lag = lag
+		LOOP_LAG.observe(lag)
+		if lag > self.max_lag:
+			self.max_lag = lag
+			LOOP_LAG_MAX.set(lag)
+
+		with self._lock:
+			self._heartbeat = now
+			stall = self._current_stall
+			self._current_stall = None
+
+		if stall is not None:
+			stall['duration_ms'] = round(lag * 1000 + self.interval * 1000, 1)
+			stall['resolved'] = True
+			logging.warning(
+				f'[ LOOP ] Event loop resumed after blocking for ~{stall["duration_ms"]} ms'
+			)
+
+	# [ WATCHDOG ]
+	def _start_watchdog(self):
+		if self._watchdog is not None and self._watchdog.is_alive():
+			return
+		self._stop.clear()
+		self._watchdog = threading.Thread(
+			target=self._watchdog_loop, name='loop-watchdog', daemon=True
+		)
+		self._watchdog.start()
+
+	def _watchdog_loop(self):
+		check_every = min(self.interval, self.stall_threshold / 2)
+		while not self._stop.wait(check_every):
+			with self._lock:
+				if self._heartbeat is None or self._current_stall is not None:
+					continue
+				blocked_for = time.monotonic() - self._heartbeat - self.interval
+				if blocked_for < self.stall_threshold:
+					continue
+				stall = self._capture(blocked_for)
+				self._current_stall = stall
+
+			self.stall_count += 1
+			LOOP_STALLS.inc()
+			self.reports.append(stall)
+			logging.warning(
+				f'[ LOOP ] Event loop blocked for {stall["blocked_ms"]} ms, stack of the loop thread:\n'
+				+ ''.join(stall['stack'])
+			)
+
+	def _capture(self, blocked_for: float) -> dict:
+		frame = sys._current_frames().get(self._loop_thread_id)
+		stack = traceback.format_stack(frame) if frame is not None else []
+		return {
+			'detected_at': datetime.now().isoformat(),
+			'blocked_ms': round(blocked_for * 1000, 1),
+			'duration_ms': None,
+			'resolved': False,
+			'stack': stack,
+		}
+
+	# [ REPORTS ]
+	def get_stats(self) -> dict:
+		return {
+			'interval_s': self.interval,
+			'stall_threshold_s': self.stall_threshold,
+			'last_lag_ms': round(self.last_lag * 1000, 3),
+			'max_lag_ms': round(self.max_lag * 1000, 3),
+			'stall_count': self.stall_count,
+			'running': self._watchdog is not None and self._watchdog.is_alive(),
+		}
+
+	def get_stalls(self, limit: int | None = None) -> list[dict]:
+		"""Most recent stall reports first."""
+		reports = list(self.reports)[::-1]
+		return reports[:limit] if limit else reports
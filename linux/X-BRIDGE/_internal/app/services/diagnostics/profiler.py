@@ -0,0 +1,190 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# (function name, file, first line)
+Frame = tuple[str, str, int]
+# (thread name, frames root -> leaf)
+Stack = tuple[str, tuple[Frame, ...]]
+
+# Leaf frames of threads waiting for work; dropped unless idle=True
+IDLE_FRAMES = {
+	('select', 'selectors.py'),
+	('poll', 'selectors.py'),
+	('wait', 'threading.py'),
+	('get', 'queue.py'),
+	('_worker', 'thread.py'),
+	('accept', 'socket.py'),
+}
+
+
+class ProfilerBusyError(Exception):
+	"""Raised when a profile is requested while another one is running."""
+
+
+class SamplingProfiler:
+	"""
+	Stack-sampling CPU profiler for every thread of the process.
+
+	A sampler thread walks `sys._current_frames()` every `interval` seconds and
+	counts identical stacks, so memory only grows with the number of distinct
+	stacks and the cost per sample is one frame walk per thread. Works inside the
+	frozen executable since it only uses the standard library. Only one profile
+	runs at a time, and duration and rate are clamped to keep overhead bounded.
+	"""
+
+	MAX_DURATION = 60.0
+	MIN_INTERVAL = 0.001
+	MAX_DEPTH = 128
+
+	def __init__(self):
+		self._lock = threading.Lock()
+
+	@property
+	def running(self) -> bool:
+		return self._lock.locked()
+
+	def profile(self, duration: float, interval: float = 0.01, idle: bool = False) -> dict:
+		"""Sample all threads for `duration` seconds (blocking; call via to_thread)."""
+		if not self._lock.acquire(blocking=False):
+			raise ProfilerBusyError('A profile is already running')
+		try:
+			return self._sample(
+				min(max(duration, interval), self.MAX_DURATION), max(interval, self.MIN_INTERVAL), idle
+			)
+		finally:
+			self._lock.release()
+
+	def _sample(self, duration: float, interval: float, idle: bool) -> dict:
+		stacks: Counter[Stack] = Counter()
+		own_id = threading.get_ident()
+		samples = 0
+		sampling_time = 0.0
+
+		logging.info(f'[ PROFILER ] Sampling for {duration}s every {interval * 1000:.1f} ms')
+		started_at = datetime.now()
+		start = time.perf_counter()
+		deadline = start + duration
+		next_tick = start
+		while True:
+			now = time.perf_counter()
+			if now >= deadline:
+				break
+			if now < next_tick:
+				time.sleep(next_tick - now)
+			next_tick += interval
+
+			tick = time.perf_counter()
+			names = {t.ident: t.name for t in threading.enumerate()}
+			for thread_id, frame in sys._current_frames().items():
+				if thread_id == own_id:
+					continue
+				frames = self._walk(frame)
+				if not idle and (frames[-1][0], frames[-1][1]) in IDLE_FRAMES:
+					continue
+				stacks[(names.get(thread_id, str(thread_id)), frames)] += 1
+			samples += 1
+			sampling_time += time.perf_counter() - tick
+
+		elapsed = time.perf_counter() - start
+		return {
+			'started_at': started_at.isoformat(),
+			'duration_s': round(elapsed, 3),
+			'interval_s': interval,
+			'samples': samples,
+			'overhead_pct': round(sampling_time / elapsed * 100, 2) if elapsed else 0.0,
+			'stacks': stacks,
+		}
+
+	def _walk(self, frame) -> tuple[Frame, ...]:
+		frames = []
+		while frame is not None and len(frames) < self.MAX_DEPTH:
+			code = frame.f_code
+			frames.append((code.co_name, os.path.basename(code.co_filename), code.co_firstlineno))
+			frame = frame.f_back
+		frames.reverse()
+		return tuple(frames)
+
+	# [ OUTPUT FORMATS ]
+	@staticmethod
+	def _label(frame: Frame) -> str:
+		name, filename, line = frame
+		return f'{name} ({filename}:{line})'.replace(';', ':')
+
+	@classmethod
+	def to_collapsed(cls, result: dict) -> str:
+		"""Brendan Gregg's collapsed format (`thread;root;...;leaf count`) for flamegraph tools."""
+		lines = [
+			';'.join([thread, *(cls._label(f) for f in frames)]) + f' {count}'
+			for (thread, frames), count in result['stacks'].most_common()
+		]
+		return '\n'.join(lines) + '\n'
+
+	@classmethod
+	def to_speedscope(cls, result: dict) -> dict:
+		"""speedscope.app file format: one sampled profile per thread."""
+		frame_index: dict[Frame, int] = {}
+		shared_frames = []
+		profiles: dict[str, dict] = {}
+		weight = round(result['interval_s'] * 1000, 3)
+
+		for (thread, frames), count in result['stacks'].items():
+			indexes = []
+			for frame in frames:
+				if frame not in frame_index:
+					frame_index[frame] = len(shared_frames)
+					shared_frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+				indexes.append(frame_index[frame])
+
+			profile = profiles.setdefault(
+				thread,
+				{
+					'type': 'sampled',
+					'name': thread,
+					'unit': 'milliseconds',
+					'startValue': 0,
+					'endValue': 0,
+					'samples': [],
+					'weights': [],
+				},
+			)
+			profile['samples'].append(indexes)
+			profile['weights'].append(count * weight)
+			profile['endValue'] += count * weight
+
+		return {
+			'$schema': 'https://www.speedscope.app/file-format-schema.json',
+			'name': f'X-BRIDGE {result["started_at"]}',
+			'exporter': 'X-BRIDGE SamplingProfiler',
+			'shared': {'frames': shared_frames},
+			'profiles': list(profiles.values()),
+		}
+
+	@classmethod
+	def to_top(cls, result: dict, limit: int = 30) -> dict:
+		"""Functions ranked by self samples (leaf) with their total (inclusive) samples."""
+		self_counts: Counter[Frame] = Counter()
+		total_counts: Counter[Frame] = Counter()
+		for (_, frames), count in result['stacks'].items():
+			self_counts[frames[-1]] += count
+			for frame in set(frames):
+				total_counts[frame] += count
+
+		total = sum(result['stacks'].values())
+		divisor = total or 1
+		functions = [
+			{
+				'function': cls._label(frame),
+				'self': count,
+				'self_pct': round(count / divisor * 100, 2),
+				'total': total_counts[frame],
+				'total_pct': round(total_counts[frame] / divisor * 100, 2),
+			}
+			for frame, count in self_counts.most_common(limit)
+		]
+		summary = {k: v for k, v in result.items() if k != 'stacks'}
+		return {**summary, 'stack_samples': total, 'functions': functions}
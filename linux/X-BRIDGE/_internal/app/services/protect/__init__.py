@@ -0,0 +1,4 @@
+from ._main import JobNotFoundError, JobStateError, ProtectJobManager  # noqa: F401
+from app.services import rfid_manager
+
+protect_jobs = ProtectJobManager(rfid_manager=rfid_manager)
@@ -0,0 +1,425 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+
+from app.core import event_bus, settings
+from app.core.events import ProtectJobProgress
+
+# Results are written and progress published at most this often (seconds)
+CHECKPOINT_INTERVAL = 1.0
+
+# Jobs that can be resumed; `completed` only to retry its failed EPCs
+RESUMABLE = ('cancelled', 'interrupted', 'completed')
+
+
+class JobNotFoundError(Exception):
+	pass
+
+
+class JobStateError(Exception):
+	pass
+
+
+class ProtectJob:
+	def __init__(
+		self,
+		job_id: str,
+		device: str,
+		epcs: list[str] | None,
+		password: str | None,
+		active: bool,
+		total: int,
+		created_at: datetime,
+		status: str = 'queued',
+	):
+		self.id = job_id
+		self.device = device
+		self.epcs = epcs
+		# Only kept in memory: resuming a job read from disk needs it again
+		self.password = password
+		self.active = active
+		self.total = total
+		self.created_at = created_at
+		self.status = status
+		self.started_at: datetime | None = None
+		self.finished_at: datetime | None = None
+		self.error: str | None = None
+		self.succeeded = 0
+		self.failed = 0
+		# epc -> last result; None until loaded for a job read from disk
+		self.results: dict[str, dict] | None = {}
+		self.unsaved: list[dict] = []
+		self.cancel_requested = False
+		self.task: asyncio.Task | None = None
+
+	@property
+	def done(self) -> int:
+		return self.succeeded + self.failed
+
+	@property
+	def in_progress(self) -> bool:
+		return self.task is not None and not self.task.done()
+
+	def record(self, epc: str, success: bool, error: str | None) -> None:
+		previous = self.results.get(epc)
+		if previous is not None:
+			if previous['success']:
+				self.succeeded -= 1
+			else:
+				self.failed -= 1
+		result = {'epc': epc, 'success': success, 'error': error, 'at': datetime.now().isoformat()}
+		self.results[epc] = result
+		self.unsaved.append(result)
+		if success:
+			self.succeeded += 1
+		else:
+			self.failed += 1
+
+	def meta(self) -> dict:
+		"""Contents of job.json (the EPC list is kept in its own file)."""
+		return {
+			'id': self.id,
+			'device': self.device,
+			'active': self.active,
+			'total': self.total,
+			'status': self.status,
+			'created_at': self.created_at.isoformat(),
+			'started_at': self.started_at.isoformat() if self.started_at else None,
+			'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+			'error': self.error,
+			'succeeded': self.succeeded,
+			'failed': self.failed,
+		}
+
+	@classmethod
+	def from_meta(cls, meta: dict) -> 'ProtectJob':
+		job = cls(
+			meta['id'],
+			meta['device'],
+			None,
+			None,
+			meta['active'],
+			meta['total'],
+			datetime.fromisoformat(meta['created_at']),
+			meta['status'],
+		)
+		job.started_at = datetime.fromisoformat(meta['started_at']) if meta['started_at'] else None
+		job.finished_at = datetime.fromisoformat(meta['finished_at']) if meta['finished_at'] else None
+		job.error = meta['error']
+		job.succeeded = meta['succeeded']
+		job.failed = meta['failed']
+		job.results = None
+		return job
+
+	def as_dict(self) -> dict:
+		data = self.meta()
+		data['done'] = self.done
+		data['pending'] = self.total - self.done
+		return data
+
+
+class ProtectJobManager:
+	"""
+	Bulk protected-mode jobs.
+
+	A job protects (or unprotects) a list of EPCs on one device in the
+	background: `submit()` returns its id at once and the job runs with up to
+	PROTECT_WINDOW commands in flight on the device. Jobs of the same device run
+	one after the other. Readers that answer protected_mode synchronously (X714:
+	the command is only queued on the connection) are sent back to back,
+	yielding to the event loop between commands.
+
+	Every job has a directory in PROTECT_JOBS_PATH with job.json (state and
+	counters), epcs.txt and results.jsonl (one line per command, appended every
+	CHECKPOINT_INTERVAL); the tag password is never written. A job stops as
+	`interrupted` when its device is not connected or the bridge stops, and
+	`resume()` continues with the EPCs that have no result yet; after a crash
+	only the last checkpoint is sent again.
+	"""
+
+	def __init__(self, rfid_manager):
+		self.rfid_manager = rfid_manager
+		self.jobs: dict[str, ProtectJob] = {}
+		self._loaded = False
+		self._device_locks: dict[str, asyncio.Lock] = {}
+
+	# [ FILES ]
+	@staticmethod
+	def _dir(job_id: str) -> str:
+		return os.path.join(settings.PROTECT_JOBS_PATH, job_id)
+
+	def _write_meta(self, job: ProtectJob) -> None:
+		path = os.path.join(self._dir(job.id), 'job.json')
+		with open(path + '.tmp', 'w', encoding='utf8') as f:
+			json.dump(job.meta(), f, indent=4)
+		os.replace(path + '.tmp', path)
+
+	def _write_new(self, job: ProtectJob) -> None:
+		os.makedirs(self._dir(job.id), exist_ok=True)
+		with open(os.path.join(self._dir(job.id), 'epcs.txt'), 'w', encoding='utf8') as f:
+			f.write('\n'.join(job.epcs))
+		self._write_meta(job)
+
+	def _write_checkpoint(self, job: ProtectJob, rows: list[dict]) -> None:
+		if rows:
+			with open(os.path.join(self._dir(job.id), 'results.jsonl'), 'a', encoding='utf8') as f:
+				f.writelines(json.dumps(row) + '\n' for row in rows)
+		self._write_meta(job)
+
+	def _read_job_files(self, job: ProtectJob) -> None:
+		"""Load the EPC list and results of a job read from disk."""
+		with open(os.path.join(self._dir(job.id), 'epcs.txt'), encoding='utf8') as f:
+			epcs = f.read().split()
+		results = {}
+		path = os.path.join(self._dir(job.id), 'results.jsonl')
+		if os.path.exists(path):
+			with open(path, encoding='utf8') as f:
+				for line in f:
+					try:
+						row = json.loads(line)
+					except ValueError:
+						# Line cut short by a crash
+						continue
+					results[row['epc']] = row
+		job.epcs = epcs
+		job.results = results
+		job.succeeded = sum(1 for row in results.values() if row['success'])
+		job.failed = len(results) - job.succeeded
+
+	def _scan(self) -> list[ProtectJob]:
+		"""Jobs in PROTECT_JOBS_PATH, dropping finished ones older than the retention."""
+		if not os.path.isdir(settings.PROTECT_JOBS_PATH):
+			return []
+		retention = settings.PROTECT_JOBS_RETENTION_DAYS
+		expired = datetime.now() - timedelta(days=retention) if retention else None
+		jobs = []
+		for name in os.listdir(settings.PROTECT_JOBS_PATH):
+			try:
+				with open(os.path.join(self._dir(name), 'job.json'), encoding='utf8') as f:
+					meta = json.load(f)
+				job = ProtectJob.from_meta(meta)
+			except (OSError, ValueError, KeyError) as e:
+				logging.warning(f'[ PROTECT ] Skipping job {name}: {e}')
+				continue
+			if expired is not None and job.created_at < expired:
+				shutil.rmtree(self._dir(name), ignore_errors=True)
+				continue
+			if job.status in ('queued', 'running'):
+				# The bridge stopped while it ran
+				job.status = 'interrupted'
+				job.error = job.error or 'Bridge stopped'
+				self._write_meta(job)
+			elif 'password' in meta:
+				# Written by an older version
+				self._write_meta(job)
+			jobs.append(job)
+		return jobs
+
+	async def _load(self) -> None:
+		if self._loaded:
+			return
+		self._loaded = True
+		for job in await asyncio.to_thread(self._scan):
+			self.jobs.setdefault(job.id, job)
+
+	async def _get(self, job_id: str, files: bool = False) -> ProtectJob:
+		await self._load()
+		job = self.jobs.get(job_id)
+		if job is None:
+			raise JobNotFoundError(f"Job '{job_id}' not found")
+		if files and job.results is None:
+			await asyncio.to_thread(self._read_job_files, job)
+		return job
+
+	# [ CONTROL ]
+	async def submit(self, device: str, epcs: list[str], password: str, active: bool) -> dict:
+		if self.rfid_manager.devices.get_device(device) is None:
+			raise ValueError(f"Device '{device}' not found.")
+		epcs = list(dict.fromkeys(epcs))
+		if not epcs:
+			raise ValueError('No EPCs to protect')
+		await self._load()
+
+		job = ProtectJob(
+			uuid.uuid4().hex[:12], device, epcs, password, active, len(epcs), datetime.now()
+		)
+		await asyncio.to_thread(self._write_new, job)
+		self.jobs[job.id] = job
+		self._start(job)
+		logging.info(
+			f"[ PROTECT ] Job {job.id}: {len(epcs)} EPCs on {device} "
+			f"({'protect' if active else 'unprotect'})"
+		)
+		return job.as_dict()
+
+	async def resume(
+		self, job_id: str, retry_failed: bool = False, password: str | None = None
+	) -> dict:
+		"""`password` is required for jobs submitted before the bridge restarted."""
+		job = await self._get(job_id, files=True)
+		if job.in_progress:
+			raise JobStateError(f"Job '{job_id}' is {job.status}")
+		if job.status not in RESUMABLE:
+			raise JobStateError(f"Job '{job_id}' is {job.status} and cannot be resumed")
+		if password is not None:
+			job.password = password
+		if job.password is None:
+			raise ValueError(f"The tag password is required to resume job '{job_id}'")
+		if retry_failed:
+			for epc in [epc for epc, row in job.results.items() if not row['success']]:
+				del job.results[epc]
+			job.failed = 0
+		if job.done >= job.total:
+			raise JobStateError(f"Job '{job_id}' has no pending EPCs")
+
+		job.status = 'queued'
+		job.error = None
+		job.finished_at = None
+		job.cancel_requested = False
+		await asyncio.to_thread(self._write_meta, job)
+		self._start(job)
+		logging.info(f'[ PROTECT ] Job {job.id}: resuming {job.total - job.done} EPCs')
+		return job.as_dict()
+
+	async def cancel(self, job_id: str) -> dict:
+		job = await self._get(job_id)
+		if not job.in_progress:
+			raise JobStateError(f"Job '{job_id}' is not running")
+		job.cancel_requested = True
+		if job.status == 'queued':
+			job.task.cancel()
+		await asyncio.gather(job.task, return_exceptions=True)
+		return job.as_dict()
+
+	async def wait(self, job_id: str) -> dict:
+		job = await self._get(job_id)
+		if job.task is not None:
+			await asyncio.gather(asyncio.shield(job.task), return_exceptions=True)
+		return job.as_dict()
+
+	def _start(self, job: ProtectJob) -> None:
+		job.task = asyncio.create_task(self._run(job))
+		self._publish(job)
+
+	# [ RUN ]
+	async def _run(self, job: ProtectJob):
+		lock = self._device_locks.setdefault(job.device, asyncio.Lock())
+		workers = None
+		try:
+			async with lock:
+				job.status = 'running'
+				job.started_at = job.started_at or datetime.now()
+				self._publish(job)
+
+				pending = iter([epc for epc in job.epcs if epc not in job.results])
+				window = max(1, settings.PROTECT_WINDOW)
+				workers = asyncio.ensure_future(
+					asyncio.gather(*(self._worker(job, pending) for _ in range(window)))
+				)
+				while not workers.done():
+					await asyncio.wait({workers}, timeout=CHECKPOINT_INTERVAL)
+					await self._checkpoint(job)
+				workers.result()
+
+				if job.cancel_requested:
+					job.status = 'cancelled'
+				elif job.error is not None:
+					job.status = 'interrupted'
+				else:
+					job.status = 'completed'
+		except asyncio.CancelledError:
+			if workers is not None:
+				workers.cancel()
+				# The in-flight commands end before the checkpoint is written
+				await asyncio.gather(workers, return_exceptions=True)
+			job.status = 'cancelled' if job.cancel_requested else 'interrupted'
+			if job.status == 'interrupted':
+				job.error = 'Bridge stopped'
+			self._finish(job)
+			raise
+		except Exception as e:
+			job.status = 'interrupted'
+			job.error = str(e)
+			logging.error(f'[ PROTECT ] Job {job.id} failed: {e}')
+		self._finish(job)
+
+	def _finish(self, job: ProtectJob) -> None:
+		job.finished_at = datetime.now()
+		try:
+			# Synchronous: the event loop may be shutting down
+			self._write_checkpoint(job, self._take_unsaved(job))
+		except OSError as e:
+			logging.error(f'[ PROTECT ] Error saving job {job.id}: {e}')
+		self._publish(job)
+		logging.info(
+			f'[ PROTECT ] Job {job.id} {job.status}: {job.succeeded} ok, {job.failed} failed, '
+			f'{job.total - job.done} pending' + (f' ({job.error})' if job.error else '')
+		)
+
+	async def _worker(self, job: ProtectJob, pending):
+		devices = self.rfid_manager.devices
+		while not job.cancel_requested and job.error is None:
+			device = devices.get_device(job.device)
+			if device is None or not getattr(device, 'is_connected', False):
+				job.error = f"Device '{job.device}' is not connected."
+				return
+			epc = next(pending, None)
+			if epc is None:
+				return
+			success, msg = await devices.protected_mode(
+				device_name=job.device, epc=epc, password=job.password, active=job.active
+			)
+			job.record(epc, success, msg)
+			await asyncio.sleep(0)
+
+	@staticmethod
+	def _take_unsaved(job: ProtectJob) -> list[dict]:
+		rows, job.unsaved = job.unsaved, []
+		return rows
+
+	async def _checkpoint(self, job: ProtectJob) -> None:
+		try:
+			await asyncio.to_thread(self._write_checkpoint, job, self._take_unsaved(job))
+		except OSError as e:
+			logging.error(f'[ PROTECT ] Error saving job {job.id}: {e}')
+		self._publish(job)
+
+	@staticmethod
+	def _publish(job: ProtectJob) -> None:
+		event_bus.publish(
+			ProtectJobProgress(
+				job.id, job.device, job.status, job.total, job.done, job.succeeded, job.failed
+			)
+		)
+
+	# [ STATUS ]
+	async def get_jobs(self, device: str | None = None, status: str | None = None) -> list[dict]:
+		"""Newest first."""
+		await self._load()
+		jobs = sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+		return [
+			job.as_dict()
+			for job in jobs
+			if (device is None or job.device == device) and (status is None or job.status == status)
+		]
+
+	async def get_job(self, job_id: str) -> dict:
+		return (await self._get(job_id)).as_dict()
+
+	async def get_results(
+		self, job_id: str, success: bool | None = None, limit: int = 100, offset: int = 0
+	) -> dict:
+		"""Last result of each EPC in the order sent; `success` keeps only succeeded or failed ones."""
+		job = await self._get(job_id, files=True)
+		rows = [row for row in job.results.values() if success is None or row['success'] == success]
+		return {
+			'total': len(rows),
+			'limit': limit,
+			'offset': offset,
+			'has_more': (offset + limit) < len(rows),
+			'data': rows[offset : offset + limit],
+		}
@@ -1,9 +1,17 @@
 import logging
 from smartx_rfid.devices import DeviceManager
-from smartx_rfid.utils import TagList
 from .integration import Integration
+from .tag_list import FastTagList
+from .capture import ReadRecorder, captured
+from .tag_store import RemoteTagList
+from .sink import SinkPublisher
+from .journal import ChangeJournal
+from .reconcile import DeviceReconciler
+from .supervisor import DeviceSupervisor
+from .ports import PortResolver
 import asyncio
-from app.core import settings
+from app.core import settings, FILES_PATH, event_bus
+from app.core.events import TagAdded, TagsCleared, ReadingStarted, ReadingStopped
 from .controller import Controller
 
 
@@ -12,23 +20,42 @@ class RfidManager:
 		logging.info(f"{'='*60}")
 		logging.info('Initializing RfidManager')
 
-		# TAGS
-		self.tags = TagList(unique_identifier='tid', prefix=settings.TAG_PREFIX)
+		# CAPTURE
+		self.recorder = ReadRecorder()
+
+		# TAGS (shared with the other ingest workers when TAG_STORE_URL is set)
+		# Changes and device events are journaled for federation peers
+		self.journal = ChangeJournal()
+		if settings.TAG_STORE_URL:
+			logging.info(f'Using shared tag store at {settings.TAG_STORE_URL}')
+			self.tags = RemoteTagList(settings.TAG_STORE_URL)
+		else:
+			self.tags = FastTagList(
+				unique_identifier='tid', prefix=settings.TAG_PREFIX, journal=self.journal
+			)
 
 		# connect to devices
 		self.devices = DeviceManager(
 			devices_path=devices_path, example_path=example_path, event_func=self.on_event
 		)
+		# One connect task per device, restarted on its own backoff
+		self.supervisor = DeviceSupervisor(self.devices, ports=PortResolver(f'{FILES_PATH}/serial_ports.json'))
+		# Applies device file changes one device at a time
+		self.reconciler = DeviceReconciler(self.devices, self.supervisor, devices_path)
 
-		# INTEGRATION
+		# INTEGRATION (runs in the sink worker process once the sink is active)
 		self.integration = Integration()
+		self.sink = SinkPublisher()
 
 		# CONTROLLER
 		self.controller = Controller(devices=self.devices, tags=self.tags)
 
 		logging.info(f"{'='*20} RfidManager initialized {'='*20}")
 
+	@captured
 	def handle_r700_event(self, events: list):
+		# Tags are stored in batches; pending ones go first when a status event arrives
+		pending: list[tuple[dict, str]] = []
 		for event in events:
 			event_type = event.get('eventType')
 			device = event.get('hostname', 'unknown')
@@ -41,48 +68,88 @@ class RfidManager:
 						'ant': tag_data.get('antennaPort'),
 						'rssi': int(tag_data.get('peakRssiCdbm', 0) / 100),
 					}
-					self.on_tag(name=device, tag_data=current_tag)
+					pending.append((current_tag, device))
 			elif event_type == 'inventoryStatus':
 				event_data = event.get('inventoryStatusEvent')
 				if event_data is not None:
+					if pending:
+						self._add_tags(pending)
+						pending = []
 					self.on_event(
 						name=device,
 						event_type='reading',
 						event_data=event_data.get('inventoryStatus') == 'running',
 					)
+		if pending:
+			self._add_tags(pending)
 
 	# ===== EVENTS =====
+	@captured
 	def on_event(self, name: str, event_type: str, event_data):
 		if event_type == 'tag':
 			self.on_tag(name=name, tag_data=event_data)
 		else:
 			logging.info(f'[ EVENT ] {name} - {event_type}: {event_data}')
+			self.supervisor.on_event(name, event_type, event_data)
+			self.journal.event(name, event_type, event_data)
 			if event_type == 'reading':
 				self.on_start(name=name) if event_data else self.on_stop(name=name)
 
-			asyncio.create_task(
-				self.integration.on_event_integration(
-					name=name, event_type=event_type, event_data=event_data
+			if self.sink.active:
+				self.sink.publish_event(name, event_type, event_data)
+			else:
+				asyncio.create_task(
+					self.integration.on_event_integration(
+						name=name, event_type=event_type, event_data=event_data
+					)
 				)
-			)
 
+	@captured
 	def on_tag(self, name: str, tag_data: dict):
 		new_tag, tag = self.tags.add(tag_data, device=name)
+		self._handle_tag(name, new_tag, tag)
+		return tag is not None
+
+	@captured
+	def on_tags(self, name: str, tags: list[dict]):
+		"""on_tag() for a batch of reads from one device, stored with a single tag list call."""
+		return self._add_tags([(tag_data, name) for tag_data in tags])
+
+	def _add_tags(self, items: list[tuple[dict, str]]) -> int:
+		accepted = 0
+		for (_, name), (new_tag, tag) in zip(items, self.tags.add_many(items)):
+			self._handle_tag(name, new_tag, tag)
+			accepted += tag is not None
+		return accepted
 
+	def _handle_tag(self, name: str, new_tag: bool, tag: dict | None):
 		# NEW TAG
 		if new_tag:
 			logging.info(f'[ TAG ] {name} - Tag Data: {tag}')
-			# Integrate new tag
-			asyncio.create_task(self.integration.on_tag_integration(tag=tag))
+			event_bus.publish(TagAdded(name, tag))
 
 		# EXISTING TAG
-		elif tag is not None:
-			pass
-		return tag is not None
+		elif tag is None:
+			return
+
+		# Integrations run in the sink worker process when it is active
+		if self.sink.active:
+			self.sink.publish_tag(tag, new_tag)
+			return
+
+		# Integrate new tag
+		if new_tag:
+			asyncio.create_task(self.integration.on_tag_integration(tag=tag))
+
+		# Presence and rollup tables count every read, new or not
+		self.integration.on_tag_read(tag, new_tag)
 
 	def on_start(self, name: str):
 		logging.info(f'[ START ] {name}')
 		self.tags.remove_tags_by_device(device=name)
+		event_bus.publish(TagsCleared(device=name))
+		event_bus.publish(ReadingStarted(name))
 
 	def on_stop(self, name: str):
 		logging.info(f'[ STOP ] {name}')
+		event_bus.publish(ReadingStopped(name))
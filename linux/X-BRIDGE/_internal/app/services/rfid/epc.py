@@ -0,0 +1,299 @@
+"""
+Table-driven EPC codec for the 96-bit GS1 schemes (SGTIN-96, SSCC-96, GRAI-96, GIAI-96).
+
+Works on the EPC as a single 96-bit integer with shifts and masks precomputed
+per scheme and partition, instead of building pyepc objects and bit strings per
+tag. GTIN decoding is memoized on the bits above the serial number, so a
+population of many serials of a few products decodes with one dict lookup per
+tag. Batch helpers accept any iterable of hex EPCs (lists, tuples, numpy arrays).
+
+Layouts follow the EPC Tag Data Standard:
+
+    SGTIN-96  header 0x30 | filter 3 | partition 3 | company prefix + item ref 44 | serial 38
+    SSCC-96   header 0x31 | filter 3 | partition 3 | company prefix + serial ref 58 | reserved 24
+    GRAI-96   header 0x33 | filter 3 | partition 3 | company prefix + asset type 44 | serial 38
+    GIAI-96   header 0x34 | filter 3 | partition 3 | company prefix + asset ref 82
+"""
+
+from typing import Iterable, NamedTuple
+
+SGTIN_96 = 0x30
+SSCC_96 = 0x31
+GRAI_96 = 0x33
+GIAI_96 = 0x34
+
+SCHEMES = {SGTIN_96: 'sgtin', SSCC_96: 'sscc', GRAI_96: 'grai', GIAI_96: 'giai'}
+
+# Bits left for company prefix + reference and how many bits sit below them
+_BODY_BITS = {SGTIN_96: 44, SSCC_96: 58, GRAI_96: 44, GIAI_96: 82}
+_TAIL_BITS = {SGTIN_96: 38, SSCC_96: 24, GRAI_96: 38, GIAI_96: 0}
+
+# partition -> (company prefix digits, reference digits) per scheme
+_PARTITION_DIGITS = {
+	SGTIN_96: [(12, 1), (11, 2), (10, 3), (9, 4), (8, 5), (7, 6), (6, 7)],
+	SSCC_96: [(12, 5), (11, 6), (10, 7), (9, 8), (8, 9), (7, 10), (6, 11)],
+	GRAI_96: [(12, 0), (11, 1), (10, 2), (9, 3), (8, 4), (7, 5), (6, 6)],
+	GIAI_96: [(12, 13), (11, 14), (10, 15), (9, 16), (8, 17), (7, 18), (6, 19)],
+}
+# Company prefix bits per partition (same for every scheme)
+_COMPANY_PREFIX_BITS = [40, 37, 34, 30, 27, 24, 20]
+
+SERIAL_38_MAX = (1 << 38) - 1
+
+
+class Partition(NamedTuple):
+	cp_digits: int
+	ref_digits: int
+	cp_shift: int
+	cp_mask: int
+	ref_shift: int
+	ref_mask: int
+
+
+def _build_tables() -> dict[int, list[Partition]]:
+	tables = {}
+	for header, digits in _PARTITION_DIGITS.items():
+		ref_bits_total = _BODY_BITS[header]
+		tail = _TAIL_BITS[header]
+		rows = []
+		for partition, (cp_digits, ref_digits) in enumerate(digits):
+			cp_bits = _COMPANY_PREFIX_BITS[partition]
+			ref_bits = ref_bits_total - cp_bits
+			rows.append(
+				Partition(
+					cp_digits=cp_digits,
+					ref_digits=ref_digits,
+					cp_shift=tail + ref_bits,
+					cp_mask=(1 << cp_bits) - 1,
+					ref_shift=tail,
+					ref_mask=(1 << ref_bits) - 1,
+				)
+			)
+		tables[header] = rows
+	return tables
+
+
+PARTITIONS = _build_tables()
+# Partition index by company prefix length, for encoding
+_PARTITION_BY_CP_DIGITS = {cp_digits: p for p, (cp_digits, _) in enumerate(_PARTITION_DIGITS[SGTIN_96])}
+
+
+def check_digit(digits: str) -> str:
+	"""GS1 mod-10 check digit for a GTIN/SSCC/GRAI body (without the check digit)."""
+	total = 0
+	for i, digit in enumerate(reversed(digits)):
+		total += int(digit) * (3 if i % 2 == 0 else 1)
+	return str((10 - total % 10) % 10)
+
+
+# [ DECODE ]
+def _fields(value: int) -> tuple[int, int, Partition] | None:
+	header = value >> 88
+	table = PARTITIONS.get(header)
+	if table is None:
+		return None
+	partition = (value >> 82) & 0b111
+	if partition > 6:
+		return None
+	return header, (value >> 85) & 0b111, table[partition]
+
+
+def decode(epc: str) -> dict | None:
+	"""
+	Decode a 96-bit EPC (24 hex chars) into its GS1 fields.
+
+	Returns None for other schemes or malformed values.
+	"""
+	try:
+		value = int(epc, 16)
+	except (TypeError, ValueError):
+		return None
+	if len(epc) != 24:
+		return None
+	fields = _fields(value)
+	if fields is None:
+		return None
+	header, filter_value, p = fields
+
+	company_prefix = (value >> p.cp_shift) & p.cp_mask
+	reference = (value >> p.ref_shift) & p.ref_mask
+	if company_prefix >= 10**p.cp_digits or reference >= 10**p.ref_digits:
+		return None
+	cp = str(company_prefix).zfill(p.cp_digits)
+	ref = str(reference).zfill(p.ref_digits) if p.ref_digits else ''
+	result = {'scheme': SCHEMES[header], 'filter': filter_value, 'company_prefix': cp}
+
+	if header == SGTIN_96:
+		body = ref[:1] + cp + ref[1:]
+		result['gtin'] = body + check_digit(body)
+		result['item_reference'] = ref
+		result['serial'] = str(value & SERIAL_38_MAX)
+	elif header == SSCC_96:
+		body = ref[:1] + cp + ref[1:]
+		result['sscc'] = body + check_digit(body)
+		result['serial_reference'] = ref
+	elif header == GRAI_96:
+		body = '0' + cp + ref
+		result['grai'] = body + check_digit(body)
+		result['asset_type'] = ref
+		result['serial'] = str(value & SERIAL_38_MAX)
+	else:
+		result['giai'] = cp + str(reference)
+		result['asset_reference'] = str(reference)
+	return result
+
+
+# Memo of (epc >> 38) -> GTIN: every serial of one product shares those bits
+_GTIN_CACHE: dict[int, str | None] = {}
+_GTIN_CACHE_MAX = 100_000
+
+
+def decode_gtin(epc: str | None) -> str | None:
+	"""GTIN-14 of an SGTIN-96 EPC, None for anything else (same result as pyepc's SGTIN.gtin)."""
+	if not epc or len(epc) != 24:
+		return None
+	try:
+		value = int(epc, 16)
+	except ValueError:
+		return None
+	if value >> 88 != SGTIN_96:
+		return None
+
+	# Filter bits don't take part in the GTIN
+	key = (value >> 38) & ((1 << 47) - 1)
+	gtin = _GTIN_CACHE.get(key, False)
+	if gtin is False:
+		p = PARTITIONS[SGTIN_96][key >> 44] if key >> 44 <= 6 else None
+		gtin = None
+		if p is not None:
+			company_prefix = (value >> p.cp_shift) & p.cp_mask
+			reference = (value >> p.ref_shift) & p.ref_mask
+			if company_prefix < 10**p.cp_digits and reference < 10**p.ref_digits:
+				cp = str(company_prefix).zfill(p.cp_digits)
+				ref = str(reference).zfill(p.ref_digits)
+				body = ref[:1] + cp + ref[1:]
+				gtin = body + check_digit(body)
+		if len(_GTIN_CACHE) >= _GTIN_CACHE_MAX:
+			_GTIN_CACHE.clear()
+		_GTIN_CACHE[key] = gtin
+	return gtin
+
+
+def decode_gtins(epcs: Iterable[str]) -> list[str | None]:
+	"""decode_gtin() over a batch of EPCs."""
+	return [decode_gtin(epc) for epc in epcs]
+
+
+def decode_many(epcs: Iterable[str]) -> list[dict | None]:
+	"""decode() over a batch of EPCs."""
+	return [decode(epc) for epc in epcs]
+
+
+def identity_key(decoded: dict) -> str:
+	"""Class-level identity used to aggregate tags: GTIN, SSCC, GRAI or GIAI company prefix."""
+	scheme = decoded['scheme']
+	if scheme == 'sgtin':
+		return decoded['gtin']
+	if scheme == 'sscc':
+		return decoded['sscc']
+	if scheme == 'grai':
+		return decoded['grai']
+	return decoded['company_prefix']
+
+
+def count_by_identity(epcs: Iterable[str]) -> dict[str, dict[str, int]]:
+	"""
+	Count EPCs per scheme and class-level identity.
+
+	Returns e.g. {'sgtin': {'07894900011517': 12}, 'sscc': {...}, 'unknown': {'': 3}}.
+	"""
+	counts: dict[str, dict[str, int]] = {}
+	for epc in epcs:
+		gtin = decode_gtin(epc)
+		if gtin is not None:
+			scheme, key = 'sgtin', gtin
+		else:
+			decoded = decode(epc) if epc else None
+			if decoded is None:
+				scheme, key = 'unknown', ''
+			else:
+				scheme, key = decoded['scheme'], identity_key(decoded)
+		bucket = counts.setdefault(scheme, {})
+		bucket[key] = bucket.get(key, 0) + 1
+	return counts
+
+
+# [ ENCODE ]
+def _prefix_bits(header: int, filter_value: int, cp_digits: int, company_prefix: int, reference: int) -> int:
+	partition = _PARTITION_BY_CP_DIGITS.get(cp_digits)
+	if partition is None:
+		raise ValueError(f'Invalid company prefix length {cp_digits} (must be 6-12)')
+	if not 0 <= filter_value <= 7:
+		raise ValueError(f'Invalid filter value {filter_value} (must be 0-7)')
+	p = PARTITIONS[header][partition]
+	if reference > p.ref_mask:
+		raise ValueError(f'Reference {reference} does not fit partition {partition}')
+	return (
+		(header << 88)
+		| (filter_value << 85)
+		| (partition << 82)
+		| (company_prefix << p.cp_shift)
+		| (reference << p.ref_shift)
+	)
+
+
+def _digits(value: str, length: int, name: str) -> str:
+	if len(value) != length or not value.isdigit():
+		raise ValueError(f'{name} must have exactly {length} digits')
+	return value
+
+
+def _serial(serial: int | str) -> int:
+	serial = int(serial)
+	if not 0 <= serial <= SERIAL_38_MAX:
+		raise ValueError(f'Serial {serial} does not fit 38 bits')
+	return serial
+
+
+def sgtin96_prefix(gtin: str, company_prefix_len: int = 7, filter_value: int = 1) -> int:
+	"""The 58 bits of an SGTIN-96 above the serial, as an int ready to OR with a serial."""
+	gtin = _digits(gtin, 14, 'GTIN')
+	company_prefix = int(gtin[1 : 1 + company_prefix_len])
+	item_reference = int(gtin[0] + gtin[1 + company_prefix_len : 13])
+	return _prefix_bits(SGTIN_96, filter_value, company_prefix_len, company_prefix, item_reference)
+
+
+def encode_sgtin96(gtin: str, serial: int | str, company_prefix_len: int = 7, filter_value: int = 1) -> str:
+	"""SGTIN-96 EPC (lowercase hex) for a GTIN-14 and serial. Filter 1 (POS item) like pyepc."""
+	return f'{sgtin96_prefix(gtin, company_prefix_len, filter_value) | _serial(serial):024x}'
+
+
+def encode_sgtin96_batch(
+	gtin: str, serials: Iterable[int], company_prefix_len: int = 7, filter_value: int = 1
+) -> list[str]:
+	"""Encode many serials of one GTIN; the GTIN part is computed once."""
+	prefix = sgtin96_prefix(gtin, company_prefix_len, filter_value)
+	return [f'{prefix | _serial(serial):024x}' for serial in serials]
+
+
+def encode_sscc96(sscc: str, company_prefix_len: int = 7, filter_value: int = 0) -> str:
+	"""SSCC-96 EPC for an 18-digit SSCC. Filter 0 (all others) like pyepc."""
+	sscc = _digits(sscc, 18, 'SSCC')
+	company_prefix = int(sscc[1 : 1 + company_prefix_len])
+	serial_reference = int(sscc[0] + sscc[1 + company_prefix_len : 17])
+	return f'{_prefix_bits(SSCC_96, filter_value, company_prefix_len, company_prefix, serial_reference):024x}'
+
+
+def encode_grai96(grai: str, serial: int | str, company_prefix_len: int = 7, filter_value: int = 0) -> str:
+	"""GRAI-96 EPC for a 14-digit GRAI (leading 0 + company prefix + asset type + check digit)."""
+	grai = _digits(grai, 14, 'GRAI')
+	company_prefix = int(grai[1 : 1 + company_prefix_len])
+	asset_type = int(grai[1 + company_prefix_len : 13] or 0)
+	prefix = _prefix_bits(GRAI_96, filter_value, company_prefix_len, company_prefix, asset_type)
+	return f'{prefix | _serial(serial):024x}'
+
+
+def encode_giai96(company_prefix: str, asset_reference: int | str, filter_value: int = 0) -> str:
+	"""GIAI-96 EPC for a company prefix and a numeric individual asset reference."""
+	company_prefix = _digits(company_prefix, len(company_prefix), 'Company prefix')
+	return f'{_prefix_bits(GIAI_96, filter_value, len(company_prefix), int(company_prefix), int(asset_reference)):024x}'
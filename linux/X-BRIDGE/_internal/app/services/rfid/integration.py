@@ -1,21 +1,29 @@
-from app.db import setup_database
+from app.db import setup_database, setup_async_database, is_async_database_url
+from app.db import AsyncDatabaseManager
 from smartx_rfid.db import DatabaseManager
 from smartx_rfid.webhook import WebhookManager, WebhookXtrack
 import logging
 from app.models import Tag, Event
 from app.core import settings
 import asyncio
+from datetime import datetime
 from app.core import Indicator
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
 
 from app.models import Base
+from .presence import TagPresenceTracker
+from .rollup import ReadRollupCounter
 
 
 class Integration:
 	def __init__(self):
-		self.db_manager: DatabaseManager | None = None
+		self.db_manager: DatabaseManager | AsyncDatabaseManager | None = None
 		self.webhook_manager: WebhookManager | None = None
 		self.webhook_xtrack: WebhookXtrack | None = None
 		self.indicator = Indicator()
+		self.presence = TagPresenceTracker()
+		self.rollup = ReadRollupCounter()
 		self.setup_integration()
 
 	# [ SETUP ]
@@ -25,13 +33,15 @@ class Integration:
 		self.load_webhook_xtrack()
 
 	def load_database(self):
-		self.db_manager = None
+		# The current manager stays in use until the new one is ready (settings reload)
+		db_manager = None
 		try:
 			if settings.DATABASE_URL is not None:
 				logging.info('Setting up Database Integration')
-				self.db_manager: DatabaseManager = setup_database(
-					database_url=settings.DATABASE_URL
-				)
+				if is_async_database_url(settings.DATABASE_URL):
+					db_manager = setup_async_database(database_url=settings.DATABASE_URL)
+				else:
+					db_manager = setup_database(database_url=settings.DATABASE_URL)
 				return True
 			else:
 				logging.warning('DATABASE_URL not set. Skipping Database Integration setup.')
@@ -39,6 +49,29 @@ class Integration:
 		except Exception as e:
 			logging.error(f'Error setting up Database Integration: {e}')
 			return False
+		finally:
+			self.db_manager = db_manager
+
+	@staticmethod
+	async def dispose_database(db_manager: DatabaseManager | AsyncDatabaseManager | None):
+		"""
+		Release the pool of a replaced manager. Sessions still running keep their
+		connection until they finish, so in-flight writes complete.
+		"""
+		engine = getattr(db_manager, '_engine', None)
+		if engine is None:
+			return
+		try:
+			if isinstance(db_manager, AsyncDatabaseManager):
+				await engine.dispose()
+			else:
+				await asyncio.to_thread(engine.dispose)
+		except Exception as e:
+			logging.error(f'Error disposing previous database engine: {e}')
+
+	@property
+	def db_is_async(self) -> bool:
+		return isinstance(self.db_manager, AsyncDatabaseManager)
 
 	def load_webhook(self):
 		self.webhook_manager = None
@@ -85,14 +118,21 @@ class Integration:
 		# DATABASE INTEGRATION
 		if self.db_manager is not None:
 			logging.info('[ EVENT INTEGRATION ] DATABASE')
-			tasks.append(
-				asyncio.to_thread(
-					self._event_database_integration,
-					name=name,
-					event_type=event_type,
-					event_data=event_data,
+			if self.db_is_async:
+				tasks.append(
+					self._event_database_integration_async(
+						name=name, event_type=event_type, event_data=event_data
+					)
+				)
+			else:
+				tasks.append(
+					asyncio.to_thread(
+						self._event_database_integration,
+						name=name,
+						event_type=event_type,
+						event_data=event_data,
+					)
 				)
-			)
 
 		# WEBHOOK INTEGRATION
 		if self.webhook_manager is not None:
@@ -118,6 +158,13 @@ class Integration:
 			)
 			session.commit()
 
+	async def _event_database_integration_async(
+		self, name: str, event_type: str, event_data: dict
+	):
+		"""Save event to database using the async engine."""
+		async with self.db_manager.get_session() as session:
+			session.add(Event(device=name, event_type=event_type, event_data=str(event_data)))
+
 	# [ TAG ]
 	async def on_tag_integration(self, tag: dict):
 		"""
@@ -132,7 +179,10 @@ class Integration:
 		# DATABASE INTEGRATION
 		if self.db_manager is not None:
 			logging.info('[ TAG INTEGRATION ] DATABASE')
-			tasks.append(asyncio.to_thread(self._tag_database_integration, data=tag))
+			if self.db_is_async:
+				tasks.append(self._tag_database_integration_async(data=tag))
+			else:
+				tasks.append(asyncio.to_thread(self._tag_database_integration, data=tag))
 
 		# WEBHOOK INTEGRATION
 		if self.webhook_manager is not None:
@@ -158,13 +208,169 @@ class Integration:
 			logging.info(f'[ TAG INTEGRATION ] Executing {len(tasks)} tasks concurrently')
 			await asyncio.gather(*tasks)
 
+	async def on_tags_integration(self, tags: list[dict]):
+		"""
+		on_tag_integration() for a batch of new tags (sink worker): one database
+		session for the whole batch and a single beep.
+		"""
+		tasks = []
+
+		# DATABASE INTEGRATION
+		if self.db_manager is not None:
+			if self.db_is_async:
+				tasks.append(self._tags_database_integration_async(tags))
+			else:
+				tasks.append(asyncio.to_thread(self._tags_database_integration, tags))
+
+		# WEBHOOK INTEGRATION
+		if self.webhook_manager is not None:
+			tasks.extend(
+				self.webhook_manager.post(device=tag.get('device'), event_type='tag', event_data=tag)
+				for tag in tags
+			)
+
+		# XTRACK INTEGRATION
+		if self.webhook_xtrack is not None:
+			tasks.extend(self.webhook_xtrack.post(tag) for tag in tags)
+
+		# Beep
+		if settings.BEEP:
+			tasks.append(self.indicator.beep())
+
+		if tasks:
+			logging.info(f'[ TAG INTEGRATION ] {len(tags)} tags, {len(tasks)} tasks')
+			await asyncio.gather(*tasks)
+
+	def _tags_database_integration(self, tags: list[dict]):
+		with self.db_manager.get_session() as session:
+			session.add_all([Tag.from_dict(data) for data in tags])
+			try:
+				session.commit()
+				return
+			except IntegrityError:
+				session.rollback()
+			# One duplicate (uq_tags_device_epc_time) fails the whole batch: keep the others
+			skipped = 0
+			for data in tags:
+				session.add(Tag.from_dict(data))
+				try:
+					session.commit()
+				except IntegrityError:
+					session.rollback()
+					skipped += 1
+			logging.warning(f'[ TAG INTEGRATION ] Skipped {skipped} duplicate tags of {len(tags)}')
+
+	async def _tags_database_integration_async(self, tags: list[dict]):
+		async with self.db_manager.get_session() as session:
+			session.add_all([Tag.from_dict(data) for data in tags])
+			try:
+				await session.commit()
+				return
+			except IntegrityError:
+				await session.rollback()
+			skipped = 0
+			for data in tags:
+				session.add(Tag.from_dict(data))
+				try:
+					await session.commit()
+				except IntegrityError:
+					await session.rollback()
+					skipped += 1
+			logging.warning(f'[ TAG INTEGRATION ] Skipped {skipped} duplicate tags of {len(tags)}')
+
 	def _tag_database_integration(self, data: dict):
 		"""Save tag to database."""
 		with self.db_manager.get_session() as session:
 			session.add(Tag.from_dict(data))
 			session.commit()
 
-	def generate_table_report(self, model: Base, limit: int = 1000, offset: int = 0) -> dict:
+	async def _tag_database_integration_async(self, data: dict):
+		"""Save tag to database using the async engine."""
+		async with self.db_manager.get_session() as session:
+			session.add(Tag.from_dict(data))
+
+	# [ READS ]
+	def on_tag_read(self, tag: dict, new_tag: bool):
+		"""
+		Buffer every read (new or repeated) for the tag_presence and rollup tables.
+
+		Only in-memory bookkeeping happens here; flush_presence/flush_rollups write
+		the batches from background tasks.
+		"""
+		if self.db_manager is None:
+			return
+		self.presence.record(tag)
+		self.rollup.record(tag, new_tag)
+
+	# [ PRESENCE ]
+	async def flush_presence(self) -> int:
+		if self.db_manager is None:
+			return 0
+		return await self.presence.flush(self.db_manager, is_async=self.db_is_async)
+
+	async def query_presence(
+		self,
+		device: str | None = None,
+		ant: int | None = None,
+		seen_since: datetime | None = None,
+		limit: int = 1000,
+		offset: int = 0,
+	) -> dict:
+		"""Page the tag_presence table, most recently seen first."""
+		if self.db_manager is None:
+			raise Exception('Database manager is not initialized')
+
+		query = self.presence.build_query(device=device, ant=ant, seen_since=seen_since)
+		if self.db_is_async:
+			async with self.db_manager.get_session() as session:
+				return await session.run_sync(self.presence.run_query, query, limit, offset)
+
+		def _run():
+			with self.db_manager.get_session() as session:
+				return self.presence.run_query(session, query, limit, offset)
+
+		return await asyncio.to_thread(_run)
+
+	# [ ROLLUPS ]
+	async def flush_rollups(self) -> int:
+		if self.db_manager is None:
+			return 0
+		return await self.rollup.flush(self.db_manager, is_async=self.db_is_async)
+
+	async def purge_rollups(self, retention: dict[str, int | None]) -> dict[str, int]:
+		if self.db_manager is None:
+			return {}
+		return await self.rollup.purge(self.db_manager, self.db_is_async, retention)
+
+	async def query_rollup_series(
+		self,
+		resolution: str,
+		start: datetime,
+		end: datetime,
+		group_by: list[str],
+		device: str | None = None,
+		ant: int | None = None,
+		gtin: str | None = None,
+	) -> list[dict]:
+		"""Time-bucketed read counts from the rollup tables."""
+		if self.db_manager is None:
+			raise Exception('Database manager is not initialized')
+
+		args = (resolution, start, end, group_by, device, ant, gtin)
+		if self.db_is_async:
+			async with self.db_manager.get_session() as session:
+				return await session.run_sync(self.rollup.query_series, *args)
+
+		def _run():
+			with self.db_manager.get_session() as session:
+				return self.rollup.query_series(session, *args)
+
+		return await asyncio.to_thread(_run)
+
+	# [ REPORTS ]
+	async def generate_table_report(
+		self, model: Base, limit: int = 1000, offset: int = 0
+	) -> dict:
 		"""
 		Generate table report with pagination for better performance.
 
@@ -179,6 +385,25 @@ class Integration:
 		if self.db_manager is None:
 			raise Exception('Database manager is not initialized')
 
+		if self.db_is_async:
+			async with self.db_manager.get_session() as session:
+				total = await session.scalar(select(func.count()).select_from(model))
+				result = await session.scalars(select(model).limit(limit).offset(offset))
+				records = [record.to_dict() for record in result]
+		else:
+			total, records = await asyncio.to_thread(
+				self._generate_table_report, model=model, limit=limit, offset=offset
+			)
+
+		return {
+			'total': total,
+			'limit': limit,
+			'offset': offset,
+			'has_more': (offset + limit) < total,
+			'data': records,
+		}
+
+	def _generate_table_report(self, model: Base, limit: int, offset: int) -> tuple[int, list]:
 		with self.db_manager.get_session() as session:
 			# Get total count (more efficient than loading all records)
 			total = session.query(model).count()
@@ -187,10 +412,62 @@ class Integration:
 			query = session.query(model).limit(limit).offset(offset)
 			records = [record.to_dict() for record in query]
 
-			return {
-				'total': total,
-				'limit': limit,
-				'offset': offset,
-				'has_more': (offset + limit) < total,
-				'data': records,
-			}
+			return total, records
+
+	# [ CLEANUP ]
+	async def clear_old_records(self, models: list, cutoff_date: datetime) -> dict[str, int]:
+		"""
+		Delete records older than `cutoff_date` from each model.
+
+		Uses `updated_at` when the model has it, otherwise `created_at`; models
+		without either are skipped. Returns the deleted row count per table.
+		"""
+		if self.db_manager is None:
+			raise Exception('Database manager is not initialized')
+
+		if self.db_is_async:
+			deleted = {}
+			for model in models:
+				timestamp_column = self._get_timestamp_column(model)
+				if timestamp_column is None:
+					continue
+				try:
+					async with self.db_manager.get_session() as session:
+						result = await session.execute(
+							delete(model).where(timestamp_column < cutoff_date)
+						)
+					deleted[model.__tablename__] = result.rowcount or 0
+				except Exception as e:
+					logging.error(f'Error clearing {model.__tablename__}: {e}')
+			return deleted
+
+		return await asyncio.to_thread(self._clear_old_records, models, cutoff_date)
+
+	def _clear_old_records(self, models: list, cutoff_date: datetime) -> dict[str, int]:
+		deleted = {}
+		with self.db_manager.get_session() as session:
+			for model in models:
+				timestamp_column = self._get_timestamp_column(model)
+				if timestamp_column is None:
+					continue
+				try:
+					deleted[model.__tablename__] = (
+						session.query(model).filter(timestamp_column < cutoff_date).delete()
+					)
+					session.commit()
+				except Exception as e:
+					logging.error(f'Error clearing {model.__tablename__}: {e}')
+					session.rollback()
+		return deleted
+
+	@staticmethod
+	def _get_timestamp_column(model: Base):
+		"""Prefer updated_at, fallback to created_at."""
+		if hasattr(model, 'updated_at'):
+			return model.updated_at
+		elif hasattr(model, 'created_at'):
+			return model.created_at
+		logging.info(
+			f"Model {model.__tablename__} does not have 'updated_at' or 'created_at' column. Skipping."
+		)
+		return None
@@ -0,0 +1,152 @@
+"""
+Single-producer / single-consumer ring buffer in a memory-mapped file.
+
+The bridge process appends records, the sink worker process drains them. The
+file survives a sink restart, so a new worker resumes at the last committed
+record (delivery is at-least-once across sink crashes).
+
+Layout:
+
+    header  <8s magic><Q capacity><Q head><Q tail><Q written><Q consumed><Q dropped><d heartbeat>
+    data    `capacity` bytes; record = <u32 length><d published_at><payload>
+
+`head` and `tail` are byte positions that only grow (position % capacity is the
+offset in the data area). Every header field has exactly one writer: the
+producer owns head/written/dropped, the consumer owns tail/consumed/heartbeat.
+A record that does not fit before the end of the data area is preceded by a
+WRAP marker (or by fewer than 4 spare bytes) and written at offset 0.
+"""
+
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b'XBRING1\x00'
+HEADER = struct.Struct('<8sQQQQQQd')
+HEADER_SIZE = 128
+RECORD = struct.Struct('<Id')
+WRAP = 0xFFFFFFFF
+
+# Header field offsets
+_CAPACITY = 8
+_HEAD = 16
+_TAIL = 24
+_WRITTEN = 32
+_CONSUMED = 40
+_DROPPED = 48
+_HEARTBEAT = 56
+
+_U64 = struct.Struct('<Q')
+_F64 = struct.Struct('<d')
+
+
+class RingError(Exception):
+	pass
+
+
+class MmapRing:
+	def __init__(self, path: str, mm: mmap.mmap, file):
+		self.path = path
+		self._mm = mm
+		self._file = file
+		self.capacity = _U64.unpack_from(mm, _CAPACITY)[0]
+
+	@classmethod
+	def create(cls, path: str, capacity: int) -> 'MmapRing':
+		"""Create (or truncate) a ring file with `capacity` bytes of data area."""
+		os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+		file = open(path, 'w+b')
+		file.truncate(HEADER_SIZE + capacity)
+		mm = mmap.mmap(file.fileno(), HEADER_SIZE + capacity)
+		HEADER.pack_into(mm, 0, MAGIC, capacity, 0, 0, 0, 0, 0, 0.0)
+		return cls(path, mm, file)
+
+	@classmethod
+	def open(cls, path: str) -> 'MmapRing':
+		file = open(path, 'r+b')
+		mm = mmap.mmap(file.fileno(), 0)
+		if mm[:8] != MAGIC:
+			mm.close()
+			file.close()
+			raise RingError(f'{path} is not a sink ring file')
+		return cls(path, mm, file)
+
+	def close(self) -> None:
+		try:
+			self._mm.close()
+			self._file.close()
+		except (OSError, ValueError):
+			pass
+
+	def _get(self, offset: int) -> int:
+		return _U64.unpack_from(self._mm, offset)[0]
+
+	def _set(self, offset: int, value: int) -> None:
+		_U64.pack_into(self._mm, offset, value)
+
+	# [ PRODUCER ]
+	def put(self, payload: bytes, published_at: float | None = None) -> bool:
+		"""Append one record; returns False (and counts a drop) when the ring is full."""
+		size = RECORD.size + len(payload)
+		head, tail = self._get(_HEAD), self._get(_TAIL)
+		pos = head % self.capacity
+		pad = self.capacity - pos if pos + size > self.capacity else 0
+		if size > self.capacity // 2 or head - tail + pad + size > self.capacity:
+			self._set(_DROPPED, self._get(_DROPPED) + 1)
+			return False
+
+		if pad >= 4:
+			struct.pack_into('<I', self._mm, HEADER_SIZE + pos, WRAP)
+		offset = HEADER_SIZE + (head + pad) % self.capacity
+		RECORD.pack_into(self._mm, offset, len(payload), published_at or time.time())
+		self._mm[offset + RECORD.size : offset + size] = payload
+
+		# Publish the record only once it is fully written
+		self._set(_HEAD, head + pad + size)
+		self._set(_WRITTEN, self._get(_WRITTEN) + 1)
+		return True
+
+	# [ CONSUMER ]
+	def read(self, max_records: int) -> tuple[list[tuple[float, bytes]], int]:
+		"""
+		Up to `max_records` pending records as (published_at, payload) and the tail
+		position after them; pass that position to commit() once they are handled.
+		"""
+		head, tail = self._get(_HEAD), self._get(_TAIL)
+		records = []
+		while tail < head and len(records) < max_records:
+			pos = tail % self.capacity
+			if self.capacity - pos < 4 or struct.unpack_from('<I', self._mm, HEADER_SIZE + pos)[0] == WRAP:
+				tail += self.capacity - pos
+				continue
+			length, published_at = RECORD.unpack_from(self._mm, HEADER_SIZE + pos)
+			start = HEADER_SIZE + pos + RECORD.size
+			records.append((published_at, self._mm[start : start + length]))
+			tail += RECORD.size + length
+		return records, tail
+
+	def commit(self, tail: int, count: int) -> None:
+		self._set(_TAIL, tail)
+		self._set(_CONSUMED, self._get(_CONSUMED) + count)
+
+	def beat(self) -> None:
+		_F64.pack_into(self._mm, _HEARTBEAT, time.time())
+
+	# [ STATS ]
+	def oldest_published_at(self) -> float | None:
+		"""Publish time of the oldest pending record (None when the ring is empty)."""
+		records, _ = self.read(1)
+		return records[0][0] if records else None
+
+	def stats(self) -> dict:
+		_, _, head, tail, written, consumed, dropped, heartbeat = HEADER.unpack_from(self._mm, 0)
+		return {
+			'capacity_bytes': self.capacity,
+			'used_bytes': head - tail,
+			'pending': written - consumed,
+			'written': written,
+			'consumed': consumed,
+			'dropped': dropped,
+			'heartbeat': heartbeat or None,
+		}
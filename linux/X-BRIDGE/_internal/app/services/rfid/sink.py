@@ -0,0 +1,290 @@
+"""
+Out-of-process integration sink.
+
+With SINK_WORKER enabled the bridge process only dedupes reads and appends
+records to a memory-mapped ring (ring.py); a separate worker process drains the
+ring in batches and runs the Integration sinks there: database, webhook, XTRACK,
+beep and the presence/rollup tables. A slow database or webhook then fills the
+ring instead of delaying reader I/O; when the ring is full new records are
+dropped and counted.
+
+Records are JSON arrays:
+
+    ['t', tag, new_tag]                       a tag read (repeats only when a database is set)
+    ['e', device, event_type, event_data]     a device event
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from datetime import datetime
+
+from prometheus_client import Gauge
+
+from .ring import MmapRing
+
+SINK_RING_USED = Gauge('sink_ring_used_bytes', 'Bytes of the sink ring holding undelivered records')
+SINK_RING_CAPACITY = Gauge('sink_ring_capacity_bytes', 'Size of the sink ring data area')
+SINK_RING_PENDING = Gauge('sink_ring_pending_records', 'Records waiting for the sink worker')
+SINK_DROPPED = Gauge('sink_records_dropped', 'Records dropped because the sink ring was full')
+SINK_LAG = Gauge('sink_lag_seconds', 'Age of the oldest record the sink worker has not delivered')
+SINK_UP = Gauge('sink_worker_up', '1 while the sink worker process is alive')
+
+
+def _encode(record: list) -> bytes:
+	return json.dumps(record, default=str, separators=(',', ':')).encode()
+
+
+def _restore(tag: dict) -> dict:
+	if isinstance(tag.get('timestamp'), str):
+		tag['timestamp'] = datetime.fromisoformat(tag['timestamp'])
+	return tag
+
+
+# [ BRIDGE SIDE ]
+class SinkPublisher:
+	"""
+	Owns the ring and the sink worker process of this bridge process.
+
+	Inactive until run() is started (by the run_sink_worker task); RfidManager
+	calls the integrations in-process while it is inactive.
+	"""
+
+	def __init__(self):
+		self.ring: MmapRing | None = None
+		self.process: multiprocessing.Process | None = None
+		self.forward_reads = False
+		self.batch_size = 500
+		self.restarts = 0
+		self._dropping = False
+		self._recycling = False
+
+		SINK_RING_USED.set_function(lambda: self._stat('used_bytes'))
+		SINK_RING_CAPACITY.set_function(lambda: self._stat('capacity_bytes'))
+		SINK_RING_PENDING.set_function(lambda: self._stat('pending'))
+		SINK_DROPPED.set_function(lambda: self._stat('dropped'))
+		SINK_LAG.set_function(self.lag)
+		SINK_UP.set_function(lambda: int(self.alive))
+
+	@property
+	def active(self) -> bool:
+		return self.ring is not None
+
+	@property
+	def alive(self) -> bool:
+		return self.process is not None and self.process.is_alive()
+
+	async def run(self, directory: str, size_mb: float, batch_size: int, forward_reads: bool) -> None:
+		"""Create the ring, start the worker and restart it whenever it exits."""
+		path = os.path.join(directory, f'sink-{os.getpid()}.ring')
+		self.ring = MmapRing.create(path, int(size_mb * 1024 * 1024))
+		self.forward_reads = forward_reads
+		self.batch_size = batch_size
+		logging.info(f'[ SINK ] Ring {path} ({size_mb} MB), integrations run in a worker process')
+		backoff = 1
+		try:
+			while True:
+				if self._recycling:
+					pass
+				elif not self.alive:
+					if self.process is not None:
+						self.restarts += 1
+						logging.error(
+							f'[ SINK ] Worker exited with code {self.process.exitcode}, restarting in {backoff}s'
+						)
+						await asyncio.sleep(backoff)
+						backoff = min(backoff * 2, 30)
+					self._spawn(batch_size)
+				elif backoff > 1 and time.time() - (self.ring.stats()['heartbeat'] or 0) < 2:
+					backoff = 1
+				await asyncio.sleep(1)
+		finally:
+			self.stop()
+
+	def _spawn(self, batch_size: int) -> None:
+		self.process = multiprocessing.get_context('spawn').Process(
+			target=run_sink, args=(self.ring.path, batch_size), name='integration-sink', daemon=True
+		)
+		self.process.start()
+		logging.info(f'[ SINK ] Worker started (pid {self.process.pid})')
+
+	async def recycle(self, forward_reads: bool | None = None) -> None:
+		"""
+		Replace the worker so it picks up new settings (settings reload). The old one
+		finishes its current batch first; queued records wait in the ring.
+		`forward_reads` changes with the database being turned on or off.
+		"""
+		if self.ring is None or self.process is None:
+			return
+		if forward_reads is not None:
+			self.forward_reads = forward_reads
+		self._recycling = True
+		try:
+			process = self.process
+			process.terminate()
+			await asyncio.to_thread(process.join, 10)
+			if process.is_alive():
+				# The ring has a single consumer: never start the new worker next to it
+				logging.warning(f'[ SINK ] Worker (pid {process.pid}) did not stop in 10s, killing it')
+				process.kill()
+				await asyncio.to_thread(process.join)
+			try:
+				self._spawn(self.batch_size)
+			except Exception:
+				# run() sees the exited worker and starts it again
+				self.process = process
+				raise
+		finally:
+			self._recycling = False
+
+	def stop(self, drain_timeout: float = 5.0) -> None:
+		"""Give the worker `drain_timeout` seconds to deliver what is queued, then stop it."""
+		if self.ring is None:
+			return
+		ring, self.ring = self.ring, None
+		deadline = time.monotonic() + drain_timeout
+		while self.alive and ring.stats()['pending'] and time.monotonic() < deadline:
+			time.sleep(0.05)
+		pending = ring.stats()['pending']
+		if pending:
+			logging.warning(f'[ SINK ] Stopping with {pending} undelivered records')
+		if self.process is not None:
+			self.process.terminate()
+			self.process.join(timeout=5)
+			self.process = None
+		ring.close()
+		try:
+			os.remove(ring.path)
+		except OSError:
+			pass
+
+	# [ PUBLISH ]
+	def publish_tag(self, tag: dict, new_tag: bool) -> None:
+		if new_tag or self.forward_reads:
+			self._put(['t', tag, new_tag])
+
+	def publish_event(self, name: str, event_type: str, event_data) -> None:
+		self._put(['e', name, event_type, event_data])
+
+	def _put(self, record: list) -> None:
+		if self.ring.put(_encode(record)):
+			self._dropping = False
+		elif not self._dropping:
+			# Log once per overflow episode, the drop counter keeps the total
+			self._dropping = True
+			logging.warning('[ SINK ] Ring full, dropping records until the sink worker catches up')
+
+	# [ STATS ]
+	def _stat(self, key: str) -> int:
+		return self.ring.stats()[key] if self.ring is not None else 0
+
+	def lag(self) -> float:
+		if self.ring is None:
+			return 0.0
+		oldest = self.ring.oldest_published_at()
+		return max(0.0, time.time() - oldest) if oldest is not None else 0.0
+
+	def status(self) -> dict:
+		if self.ring is None:
+			return {'active': False}
+		return {
+			'active': True,
+			'path': self.ring.path,
+			'pid': self.process.pid if self.process is not None else None,
+			'alive': self.alive,
+			'restarts': self.restarts,
+			'forward_reads': self.forward_reads,
+			'lag_seconds': round(self.lag(), 3),
+			**self.ring.stats(),
+		}
+
+
+# [ WORKER SIDE ]
+class SinkWorker:
+	"""Drains the ring in batches into an Integration; runs in the sink process."""
+
+	def __init__(self, ring: MmapRing, integration, batch_size: int = 500, idle: float = 0.01):
+		self.ring = ring
+		self.integration = integration
+		self.batch_size = batch_size
+		self.idle = idle
+
+	async def run(self) -> None:
+		from app.core import settings
+
+		parent = multiprocessing.parent_process()
+		# terminate() (SIGTERM) ends the loop after the batch in progress is committed
+		stopping = asyncio.Event()
+		try:
+			asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+		except (NotImplementedError, RuntimeError):
+			pass  # Windows: terminate() stops the process immediately
+		flushers = [
+			asyncio.create_task(
+				self._every(settings.PRESENCE_FLUSH_INTERVAL or 1, self.integration.flush_presence)
+			),
+			asyncio.create_task(
+				self._every(settings.ROLLUP_FLUSH_INTERVAL or 10, self.integration.flush_rollups)
+			),
+		]
+		try:
+			while not stopping.is_set() and (parent is None or parent.is_alive()):
+				self.ring.beat()
+				records, tail = self.ring.read(self.batch_size)
+				if not records:
+					await asyncio.sleep(self.idle)
+					continue
+				try:
+					await self.deliver([json.loads(payload) for _, payload in records])
+				except Exception as e:
+					# Not retried: a record that always fails would block the ring
+					logging.error(f'[ SINK ] Failed to deliver {len(records)} records: {e}')
+				self.ring.commit(tail, len(records))
+		finally:
+			for task in flushers:
+				task.cancel()
+			await asyncio.gather(*flushers, return_exceptions=True)
+			await self.integration.flush_presence()
+			await self.integration.flush_rollups()
+
+	async def deliver(self, records: list[list]) -> None:
+		new_tags = []
+		events = []
+		for record in records:
+			if record[0] == 't':
+				tag = _restore(record[1])
+				self.integration.on_tag_read(tag, record[2])
+				if record[2]:
+					new_tags.append(tag)
+			elif record[0] == 'e':
+				events.append(self.integration.on_event_integration(*record[1:]))
+
+		if new_tags:
+			events.append(self.integration.on_tags_integration(new_tags))
+		for result in await asyncio.gather(*events, return_exceptions=True):
+			if isinstance(result, Exception):
+				logging.error(f'[ SINK ] Integration failed: {result}')
+
+	@staticmethod
+	async def _every(interval: float, flush) -> None:
+		while True:
+			await asyncio.sleep(interval)
+			await flush()
+
+
+def run_sink(path: str, batch_size: int = 500) -> None:
+	"""Entry point of the sink process; builds the Integration from the same settings."""
+	from app.services import rfid_manager
+
+	ring = MmapRing.open(path)
+	logging.info(f'[ SINK ] Worker {os.getpid()} draining {path}')
+	try:
+		asyncio.run(SinkWorker(ring, rfid_manager.integration, batch_size).run())
+	except KeyboardInterrupt:
+		pass
+	finally:
+		ring.close()
@@ -0,0 +1,283 @@
+"""
+Device connection supervisor.
+
+Owns one connect task per device. When a task ends (connect() raised or
+returned) only that device is started again, after its own exponential backoff
+with jitter, so a flapping reader does not hold back the others and nothing
+polls the tasks. Connection and reading events from the devices drive the
+health state of each one:
+
+    connecting    connect task running, no connection yet (or lost and retrying)
+    connected     the reader reported a connection
+    reading       connected and the inventory is running
+    backoff       the connect task ended, waiting to start it again
+    failed        FAIL_AFTER attempts in a row ended without a connection;
+                  still retried at the longest backoff
+
+Serial readers with `PORT: "AUTO"` get their port from the PortResolver
+(ports.py) before each attempt. A resolved port that gives no connection
+within PORT_CONNECT_TIMEOUT is forgotten and resolved again; a lost connection
+restarts the attempt so an unplugged reader is looked up again.
+
+States are exported on /metrics as device_state{device,state}.
+"""
+
+import asyncio
+import inspect
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+
+from prometheus_client import Counter, Gauge, Histogram
+from smartx_rfid.devices import DeviceManager
+
+from app.core import event_bus
+from app.core.events import DEVICE_STATES, DeviceStateChanged
+
+from .ports import PortResolver
+
+DEVICE_STATE = Gauge('device_state', '1 for the current connection state of each device', ['device', 'state'])
+DEVICE_RESTARTS = Counter(
+	'device_connect_restarts', 'Connect tasks started again after they ended', ['device']
+)
+DEVICE_DISCONNECTS = Counter('device_disconnects', 'Connections lost after being established', ['device'])
+DEVICE_CONNECT = Histogram(
+	'device_connect_seconds',
+	'From starting a connect attempt to the reader reporting a connection',
+	['device'],
+	buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+
+class DeviceHealth:
+	def __init__(self, name: str):
+		self.name = name
+		self.state = 'connecting'
+		self.since = datetime.now()
+		self.failures = 0
+		self.restarts = 0
+		self.disconnects = 0
+		self.last_error: str | None = None
+		self.connected_at: datetime | None = None
+		self.retry_at: datetime | None = None
+
+	def as_dict(self) -> dict:
+		return {
+			'state': self.state,
+			'state_since': self.since.isoformat(),
+			'failures': self.failures,
+			'restarts': self.restarts,
+			'disconnects': self.disconnects,
+			'last_error': self.last_error,
+			'connected_at': self.connected_at.isoformat() if self.connected_at else None,
+			'retry_at': self.retry_at.isoformat() if self.retry_at else None,
+		}
+
+
+class DeviceSupervisor:
+	FAIL_AFTER = 5
+	PORT_CONNECT_TIMEOUT = 10.0
+
+	def __init__(
+		self,
+		devices: DeviceManager,
+		ports: PortResolver | None = None,
+		base_backoff: float = 1.0,
+		max_backoff: float = 60.0,
+	):
+		self.devices = devices
+		self.ports = ports
+		self.base_backoff = base_backoff
+		self.max_backoff = max_backoff
+		self.health: dict[str, DeviceHealth] = {}
+		self._tasks: dict[str, asyncio.Task] = {}
+		self._retries: dict[str, asyncio.TimerHandle] = {}
+		self._started: dict[str, float] = {}
+		# AUTO serial readers: (vid, pid, baudrate), the port of the current attempt and its deadline
+		self._auto: dict[str, tuple[int, int, int]] = {}
+		self._pinned: dict[str, str] = {}
+		self._deadlines: dict[str, asyncio.TimerHandle] = {}
+		self._restart_reasons: dict[str, str] = {}
+
+	# [ LIFECYCLE ]
+	def start(self, device) -> None:
+		if device.name in self._tasks:
+			return
+		if device.name not in self.health:
+			self.health[device.name] = DeviceHealth(device.name)
+			for state in DEVICE_STATES:
+				DEVICE_STATE.labels(device.name, state).set(0)
+			DEVICE_STATE.labels(device.name, 'connecting').set(1)
+			event_bus.publish(DeviceStateChanged(device.name, 'connecting'))
+		if (
+			self.ports is not None
+			and getattr(device, 'is_auto', False)
+			and getattr(device, 'connection_type', 'SERIAL') == 'SERIAL'
+		):
+			self._auto[device.name] = (device.vid, device.pid, device.baudrate)
+		self._launch(device)
+
+	def _launch(self, device) -> None:
+		name = device.name
+		self._retries.pop(name, None)
+		health = self.health[name]
+		health.retry_at = None
+		self._set_state(health, 'failed' if health.failures >= self.FAIL_AFTER else 'connecting')
+		logging.info(f'[ DEVICES ] Starting connection for device: {name}')
+		self._started[name] = time.monotonic()
+		task = asyncio.create_task(self._connect(device), name=f'device-connect:{name}')
+		self._tasks[name] = task
+		task.add_done_callback(lambda task: self._on_done(device, task))
+
+	async def _connect(self, device) -> None:
+		if device.name in self._auto:
+			await self._pin_port(device)
+		try:
+			result = device.connect()
+			if inspect.isawaitable(result):
+				await result
+		finally:
+			# Devices that keep sockets or background tasks after connect() returns
+			await self.devices._close_device_resources(device)
+
+	async def _pin_port(self, device) -> None:
+		name = device.name
+		vid, pid, baudrate = self._auto[name]
+		exclude = {port for other, port in self._pinned.items() if other != name}
+		port = await self.ports.resolve(name, vid, pid, baudrate, exclude)
+		if port is None:
+			raise ConnectionError(f'no free serial port with VID={vid:04x} PID={pid:04x}')
+		# The reader only enumerates ports itself while is_auto is set
+		device.is_auto = False
+		device.port = port
+		self._pinned[name] = port
+		self._deadlines[name] = asyncio.get_running_loop().call_later(
+			self.PORT_CONNECT_TIMEOUT, self._port_timeout, name
+		)
+
+	def _port_timeout(self, name: str) -> None:
+		self._deadlines.pop(name, None)
+		self.ports.forget(name)
+		self._restart(name, f'no connection on {self._pinned.get(name)} in {self.PORT_CONNECT_TIMEOUT:.0f}s')
+
+	def _restart(self, name: str, reason: str) -> None:
+		"""End the current attempt; it is retried after the usual backoff."""
+		task = self._tasks.get(name)
+		if task is not None and not task.done():
+			self._restart_reasons[name] = reason
+			task.cancel()
+
+	def _end_attempt(self, name: str) -> None:
+		deadline = self._deadlines.pop(name, None)
+		if deadline is not None:
+			deadline.cancel()
+		self._pinned.pop(name, None)
+		self._started.pop(name, None)
+
+	def _on_done(self, device, task: asyncio.Task) -> None:
+		name = device.name
+		if self._tasks.get(name) is not task:
+			return  # stopped or replaced
+		del self._tasks[name]
+		self._end_attempt(name)
+		reason = self._restart_reasons.pop(name, None)
+		if task.cancelled() and reason is None:
+			return
+
+		health = self.health[name]
+		error = None if task.cancelled() else task.exception()
+		if reason is not None:
+			health.last_error = reason
+		else:
+			health.last_error = f'{type(error).__name__}: {error}' if error else 'connect() returned'
+		health.failures += 1
+		health.restarts += 1
+		DEVICE_RESTARTS.labels(name).inc()
+
+		# Equal jitter: readers that dropped together do not come back in lockstep
+		delay = min(self.base_backoff * 2 ** (health.failures - 1), self.max_backoff)
+		delay = delay / 2 + random.uniform(0, delay / 2)
+		health.retry_at = datetime.now() + timedelta(seconds=delay)
+		self._set_state(health, 'failed' if health.failures >= self.FAIL_AFTER else 'backoff')
+		logging.warning(f'[ DEVICES ] {name} connect ended ({health.last_error}), retrying in {delay:.1f}s')
+		self._retries[name] = asyncio.get_running_loop().call_later(delay, self._launch, device)
+
+	async def stop(self, name: str) -> None:
+		retry = self._retries.pop(name, None)
+		if retry is not None:
+			retry.cancel()
+		task = self._tasks.pop(name, None)
+		if task is not None:
+			task.cancel()
+			await asyncio.gather(task, return_exceptions=True)
+		self._end_attempt(name)
+		self._auto.pop(name, None)
+		self._restart_reasons.pop(name, None)
+		health = self.health.pop(name, None)
+		if health is not None:
+			event_bus.publish(DeviceStateChanged(name, None, health.state))
+			for state in DEVICE_STATES:
+				DEVICE_STATE.remove(name, state)
+			for metric in (DEVICE_RESTARTS, DEVICE_DISCONNECTS, DEVICE_CONNECT):
+				try:
+					metric.remove(name)
+				except KeyError:
+					pass
+
+	async def stop_all(self) -> None:
+		for name in list(self.health):
+			await self.stop(name)
+
+	# [ EVENTS ]
+	def on_event(self, name: str, event_type: str, event_data) -> None:
+		health = self.health.get(name)
+		if health is None:
+			return
+		if event_type in ('connection', 'connected'):
+			if event_data:
+				health.failures = 0
+				health.last_error = None
+				health.connected_at = datetime.now()
+				if health.state != 'reading':
+					self._set_state(health, 'connected')
+				self._on_connected(name)
+			elif health.state in ('connected', 'reading'):
+				health.disconnects += 1
+				DEVICE_DISCONNECTS.labels(name).inc()
+				if name in self._pinned:
+					# Unplugged or re-enumerated: resolve the port again
+					self._restart(name, 'connection lost')
+				elif name in self._tasks:
+					# The reader retries inside connect(); _on_done covers the task ending
+					self._set_state(health, 'connecting')
+		elif event_type == 'reading':
+			if event_data and health.state in ('connecting', 'connected'):
+				self._set_state(health, 'reading')
+			elif not event_data and health.state == 'reading':
+				self._set_state(health, 'connected')
+
+	def _on_connected(self, name: str) -> None:
+		started = self._started.pop(name, None)
+		if started is not None:
+			DEVICE_CONNECT.labels(name).observe(time.monotonic() - started)
+		deadline = self._deadlines.pop(name, None)
+		if deadline is not None:
+			deadline.cancel()
+		if name in self._pinned:
+			vid, pid, _ = self._auto[name]
+			self.ports.remember(name, self._pinned[name], vid, pid)
+
+	def _set_state(self, health: DeviceHealth, state: str) -> None:
+		if health.state == state:
+			return
+		DEVICE_STATE.labels(health.name, health.state).set(0)
+		DEVICE_STATE.labels(health.name, state).set(1)
+		event_bus.publish(DeviceStateChanged(health.name, state, health.state))
+		health.state = state
+		health.since = datetime.now()
+
+	# [ STATUS ]
+	def status(self, name: str) -> dict:
+		health = self.health.get(name)
+		return health.as_dict() if health is not None else {'state': None}
@@ -0,0 +1,299 @@
+"""
+Shared tag store for multi-process ingestion.
+
+One store process owns the deduplicating FastTagList; every worker process
+reaches it through RemoteTagList, which has the same interface as TagList, so
+dedup stays global and get_tags/get_tag_count are correct from any worker.
+
+Protocol (TCP on localhost, one request in flight per connection):
+
+    request   <u32 payload length><u8 opcode><JSON payload>
+    response  <u32 payload length><u8 status><JSON payload>   status 0 = ok, 1 = error
+
+Reads arrive in batches (OP_ADD_MANY), so a whole /receive request costs one
+round trip. The store also hands out the "primary" lease: the worker holding it
+runs the device connections, and the lease moves to another worker when that
+process goes away.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+
+from .tag_list import FastTagList
+
+HEADER = struct.Struct('<IB')
+
+OP_ADD_MANY = 1
+OP_LEN = 2
+OP_GET_ALL = 3
+OP_GET_EPCS = 4
+OP_GTIN_COUNTS = 5
+OP_GET_BY_ID = 6
+OP_CONTAINS = 7
+OP_CLEAR = 8
+OP_REMOVE_DEVICE = 9
+OP_REMOVE_BEFORE = 10
+OP_GET_TID = 11
+OP_CLAIM_PRIMARY = 12
+OP_STATS = 13
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+class TagStoreError(Exception):
+	pass
+
+
+def parse_url(url: str) -> tuple[str, int]:
+	"""'tcp://127.0.0.1:5100' -> ('127.0.0.1', 5100)"""
+	parsed = urlparse(url)
+	if parsed.scheme != 'tcp' or not parsed.port:
+		raise ValueError(f'Invalid TAG_STORE_URL {url!r}, expected tcp://host:port')
+	return parsed.hostname or '127.0.0.1', parsed.port
+
+
+def _dumps(value) -> bytes:
+	return json.dumps(value, default=_encode_default, separators=(',', ':')).encode()
+
+
+def _encode_default(value):
+	if isinstance(value, datetime):
+		return value.isoformat()
+	return str(value)
+
+
+def _restore(tag: dict | None) -> dict | None:
+	"""Stored tags carry a datetime `timestamp`; JSON brings it back as a string."""
+	if tag is not None and isinstance(tag.get('timestamp'), str):
+		tag['timestamp'] = datetime.fromisoformat(tag['timestamp'])
+	return tag
+
+
+# [ SERVER ]
+class TagStoreServer:
+	def __init__(self, unique_identifier: str = 'tid', prefix: str | list | None = None):
+		self.tags = FastTagList(unique_identifier=unique_identifier, prefix=prefix)
+		self.requests = 0
+		self.reads = 0
+		self.primary: dict | None = None
+		self._primary_writer: asyncio.StreamWriter | None = None
+		self._handlers = {
+			OP_ADD_MANY: self._add_many,
+			OP_LEN: lambda _: len(self.tags),
+			OP_GET_ALL: lambda _: self.tags.get_all(),
+			OP_GET_EPCS: lambda _: self.tags.get_epcs(),
+			OP_GTIN_COUNTS: lambda _: self.tags.get_gtin_counts(),
+			OP_GET_BY_ID: lambda args: self.tags.get_by_identifier(*args),
+			OP_CONTAINS: lambda identifier: identifier in self.tags,
+			OP_CLEAR: lambda _: self.tags.clear(),
+			OP_REMOVE_DEVICE: lambda device: self.tags.remove_tags_by_device(device),
+			OP_REMOVE_BEFORE: lambda ts: self.tags.remove_tags_before_timestamp(
+				datetime.fromisoformat(ts)
+			),
+			OP_GET_TID: lambda epc: self.tags.get_tid_from_epc(epc),
+			OP_STATS: lambda _: self.stats(),
+		}
+
+	def _add_many(self, items: list) -> list:
+		self.reads += len(items)
+		return [self.tags.add(tag, device=device) for tag, device in items]
+
+	def stats(self) -> dict:
+		return {
+			'tags': len(self.tags),
+			'requests': self.requests,
+			'reads': self.reads,
+			'primary': self.primary,
+		}
+
+	async def serve(self, host: str, port: int) -> None:
+		server = await asyncio.start_server(self._handle, host, port)
+		logging.info(f'[ TAG STORE ] Listening on {host}:{port}')
+		async with server:
+			await server.serve_forever()
+
+	async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		try:
+			while True:
+				length, opcode = HEADER.unpack(await reader.readexactly(HEADER.size))
+				payload = json.loads(await reader.readexactly(length)) if length else None
+				self.requests += 1
+				try:
+					if opcode == OP_CLAIM_PRIMARY:
+						result = self._claim_primary(payload, writer)
+					else:
+						result = self._handlers[opcode](payload)
+					body, status = _dumps(result), STATUS_OK
+				except Exception as e:
+					body, status = _dumps(str(e)), STATUS_ERROR
+				writer.write(HEADER.pack(len(body), status) + body)
+				await writer.drain()
+		except (asyncio.IncompleteReadError, ConnectionError):
+			pass
+		finally:
+			if writer is self._primary_writer:
+				logging.warning(f'[ TAG STORE ] Primary worker {self.primary} disconnected')
+				self.primary = None
+				self._primary_writer = None
+			writer.close()
+
+	def _claim_primary(self, worker: dict, writer: asyncio.StreamWriter) -> bool:
+		"""The lease belongs to the connection that claimed it until that connection closes."""
+		if self._primary_writer is None:
+			self.primary = worker
+			self._primary_writer = writer
+			logging.info(f'[ TAG STORE ] Primary worker: {worker}')
+		return self._primary_writer is writer
+
+
+def run_store(url: str, unique_identifier: str = 'tid', prefix: str | list | None = None) -> None:
+	"""Entry point of the store process."""
+	host, port = parse_url(url)
+	try:
+		asyncio.run(TagStoreServer(unique_identifier, prefix).serve(host, port))
+	except KeyboardInterrupt:
+		pass
+
+
+# [ CLIENT ]
+class _Connection:
+	def __init__(self, address: tuple[str, int], timeout: float):
+		self.sock = socket.create_connection(address, timeout=timeout)
+		self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		self.file = self.sock.makefile('rb')
+
+	def call(self, opcode: int, payload=None):
+		body = _dumps(payload) if payload is not None else b''
+		self.sock.sendall(HEADER.pack(len(body), opcode) + body)
+		head = self.file.read(HEADER.size)
+		if len(head) < HEADER.size:
+			raise ConnectionError('Tag store closed the connection')
+		length, status = HEADER.unpack(head)
+		result = json.loads(self.file.read(length))
+		if status != STATUS_OK:
+			raise TagStoreError(result)
+		return result
+
+	def close(self):
+		try:
+			self.file.close()
+			self.sock.close()
+		except OSError:
+			pass
+
+
+class RemoteTagList:
+	"""
+	TagList backed by the shared store process.
+
+	Calls are blocking round trips over localhost (tens of microseconds); each
+	thread keeps its own connection and reconnects once if the store restarted.
+	"""
+
+	def __init__(self, url: str, timeout: float = 5.0):
+		self.url = url
+		self.address = parse_url(url)
+		self.timeout = timeout
+		self._local = threading.local()
+		self._lease: _Connection | None = None
+
+	def _call(self, opcode: int, payload=None):
+		for attempt in (1, 2):
+			conn = getattr(self._local, 'conn', None)
+			try:
+				if conn is None:
+					conn = self._local.conn = _Connection(self.address, self.timeout)
+				return conn.call(opcode, payload)
+			except (OSError, ConnectionError):
+				if conn is not None:
+					conn.close()
+				self._local.conn = None
+				if attempt == 2:
+					raise
+
+	# TagList interface
+	def add(self, tag: dict, device: str = 'Unknown'):
+		return self.add_many([(tag, device)])[0]
+
+	def add_many(self, items: list[tuple[dict, str]]) -> list[tuple[bool, dict | None]]:
+		try:
+			results = self._call(OP_ADD_MANY, items)
+		except Exception as e:
+			logging.error(f'[ TAG STORE ] add failed: {e}')
+			return [(False, None)] * len(items)
+		return [(new, _restore(stored)) for new, stored in results]
+
+	def __len__(self) -> int:
+		return self._call(OP_LEN)
+
+	def __contains__(self, identifier: str) -> bool:
+		return self._call(OP_CONTAINS, identifier)
+
+	def get_all(self) -> list[dict]:
+		return [_restore(tag) for tag in self._call(OP_GET_ALL)]
+
+	def get_by_identifier(self, identifier_value: str, identifier_type: str = 'epc') -> dict | None:
+		return _restore(self._call(OP_GET_BY_ID, [identifier_value, identifier_type]))
+
+	def get_epcs(self) -> list[str]:
+		return self._call(OP_GET_EPCS)
+
+	def get_tid_from_epc(self, epc: str) -> str | None:
+		return self._call(OP_GET_TID, epc)
+
+	def get_gtin_counts(self) -> dict[str, int]:
+		return self._call(OP_GTIN_COUNTS)
+
+	def clear(self) -> None:
+		self._call(OP_CLEAR)
+
+	def remove_tags_by_device(self, device: str) -> None:
+		self._call(OP_REMOVE_DEVICE, device)
+
+	def remove_tags_before_timestamp(self, timestamp: datetime) -> None:
+		self._call(OP_REMOVE_BEFORE, timestamp.isoformat())
+
+	# Store specific
+	def stats(self) -> dict:
+		return self._call(OP_STATS)
+
+	def claim_primary(self) -> bool:
+		"""
+		Try to become the primary worker; keeps the lease connection open if granted.
+
+		Blocking: call it from a worker thread.
+		"""
+		if self._lease is not None:
+			return True
+		conn = _Connection(self.address, self.timeout)
+		try:
+			granted = conn.call(OP_CLAIM_PRIMARY, {'pid': os.getpid(), 'host': socket.gethostname()})
+		except Exception:
+			conn.close()
+			raise
+		if granted:
+			self._lease = conn
+		else:
+			conn.close()
+		return granted
+
+
+async def wait_for_primary(tags: RemoteTagList, retry: float = 5.0) -> None:
+	"""Wait until this worker holds the primary lease (another worker may hold it now)."""
+	while True:
+		try:
+			if await asyncio.to_thread(tags.claim_primary):
+				logging.info(f'[ TAG STORE ] Worker {os.getpid()} is primary')
+				return
+		except Exception as e:
+			logging.warning(f'[ TAG STORE ] Primary lease unavailable: {e}')
+		await asyncio.sleep(retry)
@@ -0,0 +1,4 @@
+from ._main import ReadSimulator
+from app.services import rfid_manager
+
+simulator = ReadSimulator(rfid_manager=rfid_manager)
@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from itertools import count
+
+from app.schemas.simulator import ContinuousSimulatorConfig
+from app.services.rfid.epc import sgtin96_prefix
+
+# Reads emitted between two yields to the event loop inside one tick
+YIELD_EVERY = 500
+# Never try to catch up more than this many seconds of backlog at once
+MAX_BACKLOG_S = 1.0
+
+
+class _Field:
+	"""
+	Tags currently in front of one virtual device.
+
+	Fixed-capacity ring ordered by entry time, so adding a tag (evicting the
+	oldest when full), expiring by dwell time and picking a random tag are O(1).
+	"""
+
+	def __init__(self, capacity: int):
+		self.capacity = capacity
+		self._slots: list = [None] * capacity
+		self._start = 0
+		self.count = 0
+
+	def add(self, tag: dict) -> None:
+		if self.count == self.capacity:
+			self._start = (self._start + 1) % self.capacity
+			self.count -= 1
+		self._slots[(self._start + self.count) % self.capacity] = tag
+		self.count += 1
+
+	def expire(self, cutoff: float) -> None:
+		while self.count and self._slots[self._start]['entered'] < cutoff:
+			self._slots[self._start] = None
+			self._start = (self._start + 1) % self.capacity
+			self.count -= 1
+
+	def pick(self) -> dict:
+		return self._slots[(self._start + random.randrange(self.count)) % self.capacity]
+
+	def clear(self) -> None:
+		self._slots = [None] * self.capacity
+		self._start = 0
+		self.count = 0
+
+
+class _VirtualDevice:
+	def __init__(self, name: str, population: int):
+		self.name = name
+		self.field = _Field(population)
+		self.reading = True
+		self.next_toggle: float | None = None
+		self.reads = 0
+
+
+class ReadSimulator:
+	"""
+	Background read generator feeding RfidManager like real readers would.
+
+	Reads are spread over N virtual devices at a target rate. Each device keeps a
+	population of tags that enter the field, get re-read (duplicate_ratio) with a
+	per-tag RSSI around rssi_mean, and leave after dwell_s or when the field is
+	full. Optional reading on/off cycles send `reading` events, like a reader
+	triggered by a sensor. Work is done in ticks of tick_ms and the loop is
+	released every YIELD_EVERY reads, so the simulator never stalls the API.
+	"""
+
+	def __init__(self, rfid_manager):
+		self.rfid_manager = rfid_manager
+		self.config: ContinuousSimulatorConfig | None = None
+		self._task: asyncio.Task | None = None
+		self._devices: list[_VirtualDevice] = []
+		self._serials = count(1)
+		# GTIN -> SGTIN-96 bits above the serial
+		self._prefixes: dict[str, int] = {}
+		self._reset_stats()
+
+	def _reset_stats(self):
+		self.started_at: float | None = None
+		self.stopped_at: float | None = None
+		self.reads = 0
+		self.new_tags = 0
+		self.duplicates = 0
+		self.dropped_backlog = 0
+		self._samples: deque[tuple[float, int]] = deque(maxlen=64)
+
+	@property
+	def running(self) -> bool:
+		return self._task is not None and not self._task.done()
+
+	# [ CONTROL ]
+	async def start(self, config: ContinuousSimulatorConfig) -> dict:
+		"""(Re)start the simulator with `config`."""
+		await self.stop()
+		self.config = config
+		self._devices = [
+			_VirtualDevice(f'SIMULATOR_{i + 1}', config.population) for i in range(config.devices)
+		]
+		self._reset_stats()
+		self._task = asyncio.create_task(self._run(config))
+		logging.info(
+			f'[ SIMULATOR ] Started: {config.rate} reads/s over {config.devices} devices'
+		)
+		return self.status()
+
+	async def stop(self) -> dict:
+		if self.running:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			logging.info(f'[ SIMULATOR ] Stopped after {self.reads} reads')
+		self._task = None
+		return self.status()
+
+	# [ GENERATION ]
+	async def _run(self, config: ContinuousSimulatorConfig):
+		loop = asyncio.get_running_loop()
+		tick = config.tick_ms / 1000
+		start = loop.time()
+		self.started_at = time.time()
+		scheduled = 0
+		device_index = 0
+
+		try:
+			for i, device in enumerate(self._devices):
+				self._set_reading(device, True, start, config)
+				if device.next_toggle is not None:
+					# Stagger the cycles so devices don't all stop at once
+					device.next_toggle = start + config.reading_on_s * (i + 1) / len(self._devices)
+
+			while True:
+				now = loop.time()
+				elapsed = now - start
+				if config.duration_s is not None and elapsed >= config.duration_s:
+					break
+
+				due = int(config.rate * elapsed) - scheduled
+				backlog = int(config.rate * MAX_BACKLOG_S)
+				if due > backlog:
+					# The loop was busy for longer than MAX_BACKLOG_S: report, don't burst
+					self.dropped_backlog += due - backlog
+					scheduled += due - backlog
+					due = backlog
+
+				cutoff = now - config.dwell_s
+				active = []
+				for device in self._devices:
+					if device.next_toggle is not None and now >= device.next_toggle:
+						self._set_reading(device, not device.reading, now, config)
+					device.field.expire(cutoff)
+					if device.reading:
+						active.append(device)
+
+				if active:
+					for i in range(due):
+						device = active[device_index % len(active)]
+						device_index += 1
+						self._read(device, now, config)
+						if i % YIELD_EVERY == YIELD_EVERY - 1:
+							await asyncio.sleep(0)
+				scheduled += due
+				self._samples.append((now, self.reads))
+
+				await asyncio.sleep(tick)
+		finally:
+			self.stopped_at = time.time()
+
+	def _set_reading(self, device: _VirtualDevice, reading: bool, now: float, config):
+		if config.reading_on_s <= 0 or config.reading_off_s <= 0:
+			device.reading = True
+			device.next_toggle = None
+			return
+
+		if reading:
+			# A new batch of items arrives with each reading cycle
+			device.field.clear()
+		device.reading = reading
+		device.next_toggle = now + (config.reading_on_s if reading else config.reading_off_s)
+		self.rfid_manager.on_event(name=device.name, event_type='reading', event_data=reading)
+
+	def _read(self, device: _VirtualDevice, now: float, config: ContinuousSimulatorConfig):
+		field = device.field
+		if field.count and random.random() < config.duplicate_ratio:
+			tag = field.pick()
+			self.duplicates += 1
+		else:
+			tag = self._new_tag(now, config)
+			field.add(tag)
+			self.new_tags += 1
+
+		# Mostly the antenna facing the tag, sometimes a neighbour
+		ant = tag['ant']
+		if config.antennas > 1 and random.random() < 0.1:
+			ant = (ant % config.antennas) + 1
+		rssi = int(min(-20, max(-95, tag['rssi'] + random.gauss(0, 2))))
+
+		self.rfid_manager.on_tag(
+			name=device.name,
+			tag_data={'epc': tag['epc'], 'tid': tag['tid'], 'ant': ant, 'rssi': rssi},
+		)
+		device.reads += 1
+		self.reads += 1
+
+	def _new_tag(self, now: float, config: ContinuousSimulatorConfig) -> dict:
+		serial = next(self._serials)
+		gtin = config.gtins[serial % len(config.gtins)]
+		return {
+			'epc': self._encode(gtin, serial),
+			'tid': f'e280{serial:020x}',
+			'ant': random.randint(1, config.antennas),
+			'rssi': random.gauss(config.rssi_mean, config.rssi_std),
+			'entered': now,
+		}
+
+	def _encode(self, gtin: str, serial: int) -> str:
+		prefix = self._prefixes.get(gtin)
+		if prefix is None:
+			prefix = self._prefixes[gtin] = sgtin96_prefix(gtin, company_prefix_len=7)
+		return f'{prefix | serial:024x}'
+
+	# [ STATUS ]
+	def _recent_rate(self, window_s: float = 5.0) -> float:
+		if len(self._samples) < 2:
+			return 0.0
+		last_time, last_reads = self._samples[-1]
+		for sample_time, sample_reads in self._samples:
+			if last_time - sample_time <= window_s:
+				break
+		if last_time == sample_time:
+			return 0.0
+		return round((last_reads - sample_reads) / (last_time - sample_time), 1)
+
+	def status(self) -> dict:
+		elapsed = 0.0
+		if self.started_at is not None:
+			elapsed = (self.stopped_at or time.time()) - self.started_at
+		return {
+			'running': self.running,
+			'config': self.config.model_dump() if self.config else None,
+			'elapsed_s': round(elapsed, 1),
+			'target_rate': self.config.rate if self.config else 0,
+			'achieved_rate': round(self.reads / elapsed, 1) if elapsed > 0 else 0.0,
+			'recent_rate': self._recent_rate() if self.running else 0.0,
+			'reads': self.reads,
+			'new_tags': self.new_tags,
+			'duplicates': self.duplicates,
+			'dropped_backlog': self.dropped_backlog,
+			'devices': [
+				{
+					'name': d.name,
+					'reading': d.reading,
+					'in_field': d.field.count,
+					'reads': d.reads,
+				}
+				for d in self._devices
+			],
+		}
@@ -0,0 +1,169 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Project root: the folder that holds app/, examples/ and config/
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def bootstrap() -> None:
+	"""
+	Make `app` importable and resolve its paths like main.py does.
+
+	get_frozen_path() resolves relative to sys.argv[0] when not frozen, so it is
+	pointed at the project root before anything from `app` is imported.
+	"""
+	sys.argv[0] = str(ROOT / 'main.py')
+	if str(ROOT) not in sys.path:
+		sys.path.insert(0, str(ROOT))
+
+
+def quiet_logging(level: int = logging.WARNING) -> None:
+	"""
+	Raise the log level after `app` is imported.
+
+	The app logs every tag at INFO (and drivers log at DEBUG), which would dominate
+	the timings otherwise.
+	"""
+	logging.getLogger().setLevel(level)
+	for handler in logging.getLogger().handlers:
+		handler.setLevel(level)
+
+
+def percentile(values: List[float], pct: float) -> float:
+	"""Nearest-rank percentile, `pct` in 0-100."""
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+	return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: float, count: int) -> Dict[str, Any]:
+	"""Throughput and latency summary; latencies are in seconds, reported in ms."""
+	return {
+		'count': count,
+		'elapsed_s': round(elapsed, 4),
+		'ops_per_s': round(count / elapsed, 1) if elapsed > 0 else 0.0,
+		'mean_ms': round(statistics.fmean(latencies) * 1000, 4) if latencies else 0.0,
+		'p50_ms': round(percentile(latencies, 50) * 1000, 4),
+		'p99_ms': round(percentile(latencies, 99) * 1000, 4),
+		'max_ms': round(max(latencies) * 1000, 4) if latencies else 0.0,
+	}
+
+
+class Timer:
+	"""Context manager measuring elapsed wall time with perf_counter."""
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		self.elapsed = 0.0
+		return self
+
+	def __exit__(self, *exc):
+		self.elapsed = time.perf_counter() - self.start
+		return False
+
+
+def measure(func: Callable[[Any], Any], ops: int, repeat: int = 5, setup: Callable[[], Any] | None = None) -> Dict[str, Any]:
+	"""
+	Time `func(state)` `repeat` times, each on a fresh `setup()` state.
+
+	`ops` is how many operations one call performs. The best run is reported as the
+	throughput figure since it is the least disturbed by the rest of the machine.
+	"""
+	runs = []
+	for _ in range(repeat):
+		state = setup() if setup is not None else None
+		start = time.perf_counter()
+		func(state)
+		runs.append(time.perf_counter() - start)
+	return _runs_summary(runs, ops)
+
+
+async def measure_async(func, ops: int, repeat: int = 5, setup: Callable[[], Any] | None = None) -> Dict[str, Any]:
+	"""measure() for coroutine functions."""
+	runs = []
+	for _ in range(repeat):
+		state = setup() if setup is not None else None
+		start = time.perf_counter()
+		await func(state)
+		runs.append(time.perf_counter() - start)
+	return _runs_summary(runs, ops)
+
+
+def _runs_summary(runs: List[float], ops: int) -> Dict[str, Any]:
+	best = min(runs)
+	return {
+		'ops': ops,
+		'repeat': len(runs),
+		'best_s': round(best, 6),
+		'median_s': round(statistics.median(runs), 6),
+		'ops_per_s': round(ops / best, 1) if best > 0 else 0.0,
+		'us_per_op': round(best / ops * 1e6, 3) if ops else 0.0,
+	}
+
+
+def load_results(path: str) -> Dict[str, Any]:
+	"""Load the `results` of a file written by write_results()."""
+	with open(path, 'r', encoding='utf-8') as f:
+		return json.load(f)['results']
+
+
+def compare_results(
+	current: Dict[str, Dict[str, Any]],
+	baseline: Dict[str, Dict[str, Any]],
+	threshold: float = 0.15,
+	key: str = 'ops_per_s',
+) -> Dict[str, Any]:
+	"""
+	Compare per-case throughput with a baseline.
+
+	A case regresses when its `key` dropped by more than `threshold` (0.15 = 15%).
+	Cases missing on either side are listed but never counted as regressions.
+	"""
+	cases = {}
+	regressions = []
+	for name in sorted(set(current) | set(baseline)):
+		old = baseline.get(name, {}).get(key)
+		new = current.get(name, {}).get(key)
+		if not old or new is None:
+			cases[name] = {'baseline': old, 'current': new, 'change_pct': None, 'regression': False}
+			continue
+		change = (new - old) / old
+		regression = change < -threshold
+		cases[name] = {
+			'baseline': old,
+			'current': new,
+			'change_pct': round(change * 100, 1),
+			'regression': regression,
+		}
+		if regression:
+			regressions.append(name)
+	return {'threshold_pct': threshold * 100, 'regressions': regressions, 'cases': cases}
+
+
+def write_results(name: str, results: Dict[str, Any], output: str | None = None) -> str:
+	"""Print results as JSON and save them to `output` (default: bench_results/<name>.json)."""
+	payload = {
+		'benchmark': name,
+		'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		'python': sys.version.split()[0],
+		'results': results,
+	}
+	if output is None:
+		output = str(ROOT / 'bench_results' / f'{name}.json')
+	os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+	with open(output, 'w', encoding='utf-8') as f:
+		json.dump(payload, f, indent=4)
+	print(json.dumps(payload, indent=4))
+	return output
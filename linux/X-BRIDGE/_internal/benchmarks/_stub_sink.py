@@ -0,0 +1,132 @@
+"""
+Minimal HTTP server standing in for WEBHOOK_URL / XTRACK_URL during load tests.
+
+Each sink runs its own event loop in a daemon thread so its latency and
+bookkeeping do not compete with the bridge's loop. Every request is answered
+after a configurable delay, and a configurable share of them gets a 500.
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from typing import Callable, Optional
+
+# EPC of the tag carried by a webhook (JSON) or Xtrack (XML) payload
+EPC_PATTERNS = (
+	re.compile(rb'"epc":\s*"([0-9a-fA-F]{24})"'),
+	re.compile(rb'TAGID=([0-9a-fA-F]{24})'),
+)
+
+
+class StubSink:
+	def __init__(
+		self,
+		name: str,
+		latency_ms: float = 0.0,
+		jitter_ms: float = 0.0,
+		error_rate: float = 0.0,
+		on_epc: Optional[Callable[[str, str, float], None]] = None,
+	):
+		"""
+		Args:
+		    name: Label used in reports
+		    latency_ms: Delay before answering each request
+		    jitter_ms: Uniform random extra delay (0..jitter_ms)
+		    error_rate: Share of requests answered with 500 (0-1)
+		    on_epc: Called as on_epc(sink_name, epc, perf_counter) for each payload
+		"""
+		self.name = name
+		self.latency_ms = latency_ms
+		self.jitter_ms = jitter_ms
+		self.error_rate = error_rate
+		self.on_epc = on_epc
+
+		self.requests = 0
+		self.errors = 0
+		self.port: int | None = None
+
+		self._loop: asyncio.AbstractEventLoop | None = None
+		self._server: asyncio.AbstractServer | None = None
+		self._ready = threading.Event()
+		self._thread: threading.Thread | None = None
+
+	@property
+	def url(self) -> str:
+		return f'http://127.0.0.1:{self.port}/{self.name}'
+
+	def start(self) -> 'StubSink':
+		self._thread = threading.Thread(target=self._run, name=f'stub-{self.name}', daemon=True)
+		self._thread.start()
+		if not self._ready.wait(5):
+			raise RuntimeError(f'Stub sink {self.name} did not start')
+		return self
+
+	def stop(self) -> None:
+		if self._loop is not None and self._loop.is_running():
+			asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+			self._loop.call_soon_threadsafe(self._loop.stop)
+		if self._thread is not None:
+			self._thread.join(timeout=5)
+
+	async def _shutdown(self) -> None:
+		self._server.close()
+		tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+		for task in tasks:
+			task.cancel()
+		await asyncio.gather(*tasks, return_exceptions=True)
+
+	def stats(self) -> dict:
+		return {'requests': self.requests, 'errors_returned': self.errors}
+
+	def _run(self) -> None:
+		self._loop = asyncio.new_event_loop()
+		asyncio.set_event_loop(self._loop)
+		self._server = self._loop.run_until_complete(
+			asyncio.start_server(self._handle, '127.0.0.1', 0)
+		)
+		self.port = self._server.sockets[0].getsockname()[1]
+		self._ready.set()
+		try:
+			self._loop.run_forever()
+		finally:
+			self._server.close()
+			self._loop.close()
+
+	async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+		try:
+			head = await reader.readuntil(b'\r\n\r\n')
+			length = 0
+			for line in head.split(b'\r\n'):
+				if line.lower().startswith(b'content-length:'):
+					length = int(line.split(b':', 1)[1])
+			body = await reader.readexactly(length) if length else b''
+			received = time.perf_counter()
+
+			self.requests += 1
+			if self.on_epc is not None:
+				for pattern in EPC_PATTERNS:
+					match = pattern.search(body)
+					if match:
+						self.on_epc(self.name, match.group(1).decode().lower(), received)
+						break
+
+			delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+			if delay > 0:
+				await asyncio.sleep(delay / 1000)
+
+			if random.random() < self.error_rate:
+				self.errors += 1
+				status = b'500 Internal Server Error'
+			else:
+				status = b'200 OK'
+			writer.write(
+				b'HTTP/1.1 ' + status + b'\r\nContent-Length: 2\r\n'
+				b'Content-Type: application/json\r\nConnection: close\r\n\r\n{}'
+			)
+			await writer.drain()
+		except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+			pass
+		finally:
+			writer.close()
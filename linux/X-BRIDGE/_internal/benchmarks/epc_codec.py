@@ -0,0 +1,152 @@
+"""
+Verify the table-driven EPC codec (app/services/rfid/epc.py) against pyepc and
+compare their throughput.
+
+Random SGTIN-96 and SSCC-96 values across every partition are encoded and
+decoded by both libraries and must match exactly; GRAI-96 and GIAI-96 (not
+supported by pyepc) are checked by round trip. Any mismatch exits with status 1.
+
+Usage:
+    python -m benchmarks.epc_codec
+    python -m benchmarks.epc_codec --count 100000 --products 50 --verify 50000
+"""
+
+import argparse
+import random
+import sys
+
+from ._common import bootstrap, measure, quiet_logging, write_results
+
+bootstrap()
+
+from pyepc import SGTIN, SSCC  # noqa: E402
+
+from app.services.rfid import epc  # noqa: E402
+
+DIGITS = '0123456789'
+
+
+def digits(n: int) -> str:
+	return ''.join(random.choice(DIGITS) for _ in range(n))
+
+
+def random_gtin() -> str:
+	body = digits(13)
+	return body + epc.check_digit(body)
+
+
+# [ VERIFY ]
+def verify(count: int) -> list[str]:
+	"""Cross-check `count` random values per scheme; returns the mismatches found."""
+	errors = []
+	for _ in range(count):
+		cp_len = random.randint(6, 12)
+		company_prefix = digits(cp_len)
+		serial = random.randint(0, epc.SERIAL_38_MAX)
+
+		sgtin = SGTIN(company_prefix, digits(1), digits(12 - cp_len), str(serial))
+		hex_epc = sgtin.encode()
+		gtin = SGTIN.decode(hex_epc).gtin
+		decoded = epc.decode(hex_epc)
+		if (
+			epc.decode_gtin(hex_epc) != gtin
+			or decoded['gtin'] != gtin
+			or decoded['serial'] != str(serial)
+			or epc.encode_sgtin96(gtin, serial, cp_len) != hex_epc.lower()
+		):
+			errors.append(f'sgtin {hex_epc}')
+
+		sscc = SSCC(company_prefix, digits(1), digits(16 - cp_len))
+		hex_epc = sscc.encode()
+		plain = SSCC.decode(hex_epc).sscc
+		if epc.decode(hex_epc)['sscc'] != plain or epc.encode_sscc96(plain, cp_len) != hex_epc.lower():
+			errors.append(f'sscc {hex_epc}')
+
+		body = '0' + company_prefix + digits(12 - cp_len)
+		grai = body + epc.check_digit(body)
+		decoded = epc.decode(epc.encode_grai96(grai, serial, cp_len))
+		if decoded['grai'] != grai or decoded['serial'] != str(serial):
+			errors.append(f'grai {grai}.{serial}')
+
+		partition = epc.PARTITIONS[epc.GIAI_96][12 - cp_len]
+		asset = random.randint(0, min(10**partition.ref_digits, partition.ref_mask + 1) - 1)
+		decoded = epc.decode(epc.encode_giai96(company_prefix, asset))
+		if decoded['giai'] != company_prefix + str(asset):
+			errors.append(f'giai {company_prefix}.{asset}')
+	return errors
+
+
+# [ THROUGHPUT ]
+def pyepc_gtin(hex_epc: str):
+	try:
+		return SGTIN.decode(hex_epc).gtin
+	except Exception:
+		return None
+
+
+def bench(results: dict, count: int, products: int, repeat: int) -> None:
+	gtins = [random_gtin() for _ in range(products)]
+	serials = range(1, count + 1)
+	epcs = [epc.encode_sgtin96(gtins[i % products], serial) for i, serial in enumerate(serials)]
+	ssccs = [SSCC(digits(7), digits(1), digits(9)).encode().lower() for _ in range(count)]
+
+	results['encode.pyepc'] = measure(
+		lambda _: [
+			SGTIN.from_sgtin(gtin=gtins[i % products], serial_number=str(s), company_prefix_len=7).encode()
+			for i, s in enumerate(serials)
+		],
+		count,
+		repeat,
+	)
+	results['encode.codec'] = measure(
+		lambda _: [epc.encode_sgtin96(gtins[i % products], s) for i, s in enumerate(serials)], count, repeat
+	)
+	results['encode.codec_batch'] = measure(
+		lambda _: [epc.encode_sgtin96_batch(gtin, serials[i::products]) for i, gtin in enumerate(gtins)],
+		count,
+		repeat,
+	)
+
+	results['decode_gtin.pyepc'] = measure(lambda _: [pyepc_gtin(e) for e in epcs], count, repeat)
+	# Cold: memo cleared before each run, so every product is decoded once
+	results['decode_gtin.codec_cold'] = measure(
+		lambda _: epc.decode_gtins(epcs), count, repeat, setup=epc._GTIN_CACHE.clear
+	)
+	results['decode_gtin.codec_warm'] = measure(lambda _: epc.decode_gtins(epcs), count, repeat)
+
+	results['decode.sscc.pyepc'] = measure(lambda _: [SSCC.decode(e).sscc for e in ssccs], count, repeat)
+	results['decode.sscc.codec'] = measure(lambda _: epc.decode_many(ssccs), count, repeat)
+
+	mixed = epcs[: count // 2] + ssccs[: count // 2]
+	results['count_by_identity'] = measure(lambda _: epc.count_by_identity(mixed), len(mixed), repeat)
+
+	for name, base in (
+		('encode', 'encode.pyepc'),
+		('decode_gtin', 'decode_gtin.pyepc'),
+		('decode.sscc', 'decode.sscc.pyepc'),
+	):
+		for case in [c for c in results if c.startswith(name + '.') and c != base and 'pyepc' not in c]:
+			results[case]['speedup_vs_pyepc'] = round(
+				results[case]['ops_per_s'] / max(results[base]['ops_per_s'], 1e-9), 1
+			)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+	parser.add_argument('--count', type=int, default=50000, help='EPCs per throughput case')
+	parser.add_argument('--products', type=int, default=20, help='Distinct GTINs in the population')
+	parser.add_argument('--verify', type=int, default=10000, help='Random values checked per scheme')
+	parser.add_argument('--repeat', type=int, default=5)
+	parser.add_argument('--seed', type=int, default=None)
+	parser.add_argument('--output', default=None)
+	args = parser.parse_args()
+
+	quiet_logging()
+	random.seed(args.seed)
+	errors = verify(args.verify)
+	results = {'verified_per_scheme': args.verify, 'mismatches': errors[:20]}
+	bench(results, args.count, args.products, args.repeat)
+	write_results('epc_codec', results, args.output)
+	if errors:
+		print(f'{len(errors)} mismatch(es) between the codec and pyepc')
+		sys.exit(1)
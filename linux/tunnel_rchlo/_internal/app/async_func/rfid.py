@@ -19,23 +19,21 @@ async def connect_on_startup():
 
 	backoff_seconds = 1
 	while True:
-		# get current connect tasks
+		# Wake up when the last connect task ends instead of checking every second
 		tasks = getattr(rfid_manager.devices, '_connect_tasks', []) or []
+		if tasks:
+			await asyncio.wait(tasks)
 		# If there are no tasks or all are done, attempt to reconnect after backoff
-		if not tasks or all(t.done() for t in tasks):
-			await asyncio.sleep(backoff_seconds)
-			try:
-				await rfid_manager.devices.connect_devices()
-			except Exception as e:
-				logging.error(f'Error reconnecting devices: {e}')
-				# increase backoff up to a limit to avoid tight restart loops
-				backoff_seconds = min(backoff_seconds * 2, 60)
-				continue
-			# reset backoff on successful start
-			backoff_seconds = 1
-		else:
-			# tasks are running; check again later
-			await asyncio.sleep(1)
+		await asyncio.sleep(backoff_seconds)
+		try:
+			await rfid_manager.devices.connect_devices()
+		except Exception as e:
+			logging.error(f'Error reconnecting devices: {e}')
+			# increase backoff up to a limit to avoid tight restart loops
+			backoff_seconds = min(backoff_seconds * 2, 60)
+			continue
+		# reset backoff on successful start
+		backoff_seconds = 1
 
 
 async def clear_old_tags():
@@ -52,6 +50,16 @@ async def clear_old_tags():
 		rfid_manager.tags.remove_tags_before_timestamp(timestamp)
 
 
+async def flush_box_events():
+	"""Write the box audit rows decided since the last flush."""
+	try:
+		while True:
+			await asyncio.sleep(settings.BOX_EVENTS_FLUSH_INTERVAL or 5)
+			await rfid_manager.integration.flush_box_events()
+	finally:
+		await rfid_manager.integration.flush_box_events()
+
+
 async def clear_db():
 	"""Clear database at startup and daily at midnight."""
 	seconds_until_midnight = 0
@@ -3,6 +3,8 @@ from smartx_rfid.utils.logger_manager import LoggerManager
 import os
 from .build_templates import TemplateManager
 from .indicator import Indicator
+from .events import event_bus
+from .tracing import Tracer
 from smartx_rfid.utils.path import get_frozen_path
 
 # DEFAULT VARS
@@ -19,6 +21,9 @@ EXAMPLE_PATH = get_frozen_path('examples')
 # settings
 settings = Settings(CONFIG_PATH)
 
+# GPO decision tracing
+tracer = Tracer(slow_ms=lambda: settings.SLOW_DECISION_MS)
+
 # logging
 logger = LoggerManager(
 	log_path=settings.LOG_PATH,
@@ -47,6 +47,34 @@ class Settings:
 		self.XTRACK_URL: str | None = data.get('XTRACK_URL', None)
 		self.PORT: int = data.get('PORT', 5000)
 
+		# Box decision: decide once the new-tag rate over the settle window drops
+		# below SETTLE_RATE (tags/s). The window is SETTLE_FACTOR times the usual gap
+		# between new tags, kept within SETTLE_WINDOW_MIN..MAX seconds.
+		self.SETTLE_RATE: float | None = data.get('SETTLE_RATE', 1.0)
+		self.SETTLE_FACTOR: float = data.get('SETTLE_FACTOR', 5.0)
+		self.SETTLE_WINDOW_MIN: float = data.get('SETTLE_WINDOW_MIN', 0.1)
+		self.SETTLE_WINDOW_MAX: float = data.get('SETTLE_WINDOW_MAX', 1.0)
+		# A short box is only rejected as settled after being read this long, in
+		# seconds: a reader pausing early on must not reject it after one quiet window
+		self.SETTLE_MIN_TIME: float = data.get('SETTLE_MIN_TIME', 3.0)
+		# Longest a box may be read before it is decided, in seconds
+		self.SETTLE_MAX_TIME: float | None = data.get('SETTLE_MAX_TIME', 15.0)
+		# Decisions at least this slow (ms, last tag to GPO written) are kept for
+		# /tracing/get_slow; the settle window is part of it
+		self.SLOW_DECISION_MS: float | None = data.get('SLOW_DECISION_MS', 500.0)
+
+		# Box audit: box_events write interval (seconds) and shift start times for the
+		# throughput rollups
+		self.BOX_EVENTS_FLUSH_INTERVAL: float = data.get('BOX_EVENTS_FLUSH_INTERVAL', 5.0)
+		self.SHIFTS: list[dict] = data.get(
+			'SHIFTS',
+			[
+				{'name': 'A', 'start': '06:00'},
+				{'name': 'B', 'start': '14:00'},
+				{'name': 'C', 'start': '22:00'},
+			],
+		)
+
 	def get_current_settings(self):
 		return {
 			key: value
@@ -18,7 +18,7 @@ except ImportError:
 
 # Import all model modules to ensure they're registered
 from .mixin import BaseMixin, Base  # noqa: F401
-from .rfid import Event, Tag  # noqa: F401
+from .rfid import BoxEvent, Event, Tag  # noqa: F401
 
 
 def get_all_models() -> List[Type]:
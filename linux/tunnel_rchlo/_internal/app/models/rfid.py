@@ -2,13 +2,25 @@
 RFID models for SMARTX Connector.
 
 Defines the Tag and Event models for storing RFID reader data
-with proper indexing and relationships.
+with proper indexing and relationships, and the BoxEvent audit trail
+of tunnel box decisions.
 """
 
+import zlib
+
 from sqlalchemy import DateTime, func
 
 try:
-	from sqlalchemy import Column, Index, Integer, String, Text, UniqueConstraint
+	from sqlalchemy import (
+		Boolean,
+		Column,
+		Index,
+		Integer,
+		LargeBinary,
+		String,
+		Text,
+		UniqueConstraint,
+	)
 except ImportError as e:
 	raise ImportError(
 		'SQLAlchemy is required. Please install it with: pip install sqlalchemy'
@@ -110,3 +122,73 @@ class Event(Base, BaseMixin):
 		Index('ix_events_device_created', 'device', 'created_at'),
 		Index('ix_events_type_created', 'event_type', 'created_at'),
 	)
+
+
+class BoxEvent(Base, BaseMixin):
+	"""
+	Audit row for every box decided by a tunnel.
+
+	Written in batches by BoxAudit. `epcs` holds the EPCs counted for the box,
+	sorted, comma-joined and zlib-compressed: EPCs of one box share long
+	prefixes, so a box of a hundred tags takes a few hundred bytes. Read them
+	back with get_epcs().
+	"""
+
+	__tablename__ = 'box_events'
+
+	# Primary key
+	id = Column(Integer, primary_key=True, autoincrement=True)
+
+	# Tunnel (device name) and box
+	device = Column(String(100), nullable=False)
+	box_id = Column(String(100), nullable=True)
+	expected_qty = Column(Integer, nullable=False, default=0)
+	actual_qty = Column(Integer, nullable=False, default=0)
+
+	# approved / rejected, and what triggered it (settled, overflow, stop, cap, no_box)
+	decision = Column(String(10), nullable=False)
+	reason = Column(String(20), nullable=False)
+	gpo_ok = Column(Boolean, nullable=True)
+	message = Column(String(255), nullable=True)
+
+	# Timings
+	informed_at = Column(DateTime(timezone=True), nullable=True)
+	started_at = Column(DateTime(timezone=True), nullable=True)
+	first_tag_at = Column(DateTime(timezone=True), nullable=True)
+	last_tag_at = Column(DateTime(timezone=True), nullable=True)
+	decided_at = Column(DateTime(timezone=True), nullable=False)
+	gpo_ack_at = Column(DateTime(timezone=True), nullable=True)
+
+	epcs = Column(LargeBinary, nullable=True)
+
+	# Used by the daily cleanup (STORAGE_DAYS)
+	created_at = Column(
+		DateTime(timezone=True),
+		server_default=func.now(),
+		nullable=False,
+	)
+
+	__table_args__ = (
+		Index('ix_box_events_decided_at', 'decided_at'),
+		Index('ix_box_events_device_decided', 'device', 'decided_at'),
+		Index('ix_box_events_box_id', 'box_id'),
+		Index('ix_box_events_created_at', 'created_at'),
+	)
+
+	@staticmethod
+	def pack_epcs(epcs) -> bytes | None:
+		if not epcs:
+			return None
+		return zlib.compress(','.join(sorted(epcs)).encode('ascii'))
+
+	def get_epcs(self) -> list[str]:
+		if not self.epcs:
+			return []
+		return zlib.decompress(self.epcs).decode('ascii').split(',')
+
+	def to_dict(self, exclude: list | None = None, include_relationships: bool = False) -> dict:
+		exclude = exclude or []
+		data = super().to_dict(exclude=[*exclude, 'epcs'], include_relationships=include_relationships)
+		if 'epcs' not in exclude:
+			data['epcs'] = self.get_epcs()
+		return data
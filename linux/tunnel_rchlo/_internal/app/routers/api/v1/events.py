@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, StreamingResponse
+from smartx_rfid.utils.path import get_prefix_from_path
+
+from app.core import event_bus
+from app.core.events import EVENT_TYPES
+
+router_prefix = get_prefix_from_path(__file__)
+router = APIRouter(prefix=router_prefix, tags=[router_prefix])
+
+KEEPALIVE_SECONDS = 15
+
+
+@router.get(
+	'/stream',
+	summary='Stream application events',
+	description=(
+		'Server-sent events from the in-process event bus: one SSE message per event, named '
+		'after its type (' + ', '.join(EVENT_TYPES) + '), with the event as JSON. `types` is a '
+		'comma-separated filter; all types are sent when it is empty. A slow client loses the '
+		'oldest queued events, not the newest.'
+	),
+)
+async def stream_events(types: str | None = None):
+	names = [name.strip() for name in (types or '').split(',') if name.strip()]
+	unknown = [name for name in names if name not in EVENT_TYPES]
+	if unknown:
+		return JSONResponse(status_code=400, content={'error': f'Unknown event types: {", ".join(unknown)}'})
+
+	subscription = event_bus.subscribe(*(EVENT_TYPES[name] for name in names), maxsize=256)
+
+	async def generate():
+		with subscription:
+			yield 'retry: 2000\n\n'
+			while True:
+				try:
+					event = await asyncio.wait_for(subscription.get(), KEEPALIVE_SECONDS)
+				except asyncio.TimeoutError:
+					yield ': keep-alive\n\n'
+					continue
+				for event in [event, *subscription.drain()]:
+					data = json.dumps(event.to_dict(), default=str)
+					yield f'event: {type(event).__name__}\ndata: {data}\n\n'
+
+	return StreamingResponse(
+		generate(), media_type='text/event-stream', headers={'Cache-Control': 'no-cache'}
+	)
@@ -1,100 +1,398 @@
+"""
+Box controller.
+
+Boxes informed by the scanner (`box_id;qty`) wait in a FIFO until a tunnel
+starts reading; the box at the head is then bound to that tunnel, so the next
+box can be informed while the current one is still being read. A box informed
+for a device only goes to that tunnel; boxes informed without one go to a
+shared queue that any tunnel takes from when its own queue is empty (one
+scanner, one tunnel).
+
+Each tunnel, keyed by device name, has its own current box, decision flag and
+tag scope, so one bridge can drive several tunnels.
+
+A box is decided as soon as its reading has settled instead of after a fixed
+delay or the reader stopping: the rate of new tags over a short window, sized
+from the gaps between new tags of that box, must drop below SETTLE_RATE. Then
+the box is approved when the count matches and rejected when it is short, but
+a short box keeps being read until SETTLE_MIN_TIME has passed. More tags than
+expected reject it at once; SETTLE_MAX_TIME caps the whole read, and the reader
+stopping still decides right away. Decision latency is exported on
+/metrics to tune the settle settings against false rejects.
+
+Every decision, with its timings and EPCs, is handed to BoxAudit once the GPO
+write returns and ends up in the box_events table. It is also traced (flow
+`tunnel`, see app/core/tracing.py) from the last tag of the box to the GPO
+write completing:
+
+    ingest      on_tag receiving the last new tag until validate_tags runs
+    settle      until the decision (settle window, overflow, cap or reader stop)
+    dispatch    until the approve/reject task runs on the event loop
+    gpo_write   the write_gpo call
+"""
+
 import logging
+import time
+from collections import deque
+from datetime import datetime
 from smartx_rfid.devices import DeviceManager
 from smartx_rfid.utils import TagList
 import asyncio
-from smartx_rfid.utils import delayed_function
+from prometheus_client import Histogram
 
+from app.core import settings, event_bus, tracer
+from app.core.events import AlertRaised, BoxInfoChanged, ControllerDecision
+from app.core.tracing import Trace
 
-class Controller:
-	def __init__(self, devices: DeviceManager, tags: TagList):
+from .box_audit import BoxAudit
+
+BOX_DECISION = Histogram(
+	'box_decision_seconds',
+	'From reading start to the box decision',
+	['tunnel', 'decision', 'reason'],
+	buckets=(0.25, 0.5, 1, 1.5, 2, 3, 5, 8, 13, 20, 30),
+)
+BOX_SETTLE = Histogram(
+	'box_settle_seconds',
+	'From the last new tag of a box to its decision',
+	['tunnel', 'reason'],
+	buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 5),
+)
+
+
+class Tunnel:
+	def __init__(self, name: str):
+		self.name = name
 		self.box_info: dict = {}
+		self.queue: deque[dict] = deque()
+		self.tags = TagList(unique_identifier='tid', prefix=settings.TAG_PREFIX)
+		self.state_sent = False
+		# Reading session of the current box (perf_counter times, wall clock for the audit)
+		self.started: float | None = None
+		self.last_tag: float | None = None
+		self.validated: float | None = None
+		self.gap: float | None = None
+		self.arrivals: deque[float] = deque(maxlen=512)
+		self.settle_task: asyncio.Task | None = None
+		self.started_at: datetime | None = None
+		self.first_tag_at: datetime | None = None
+		self.last_tag_at: datetime | None = None
+
+	def start_session(self) -> None:
+		self.tags.clear()
+		self.started = time.perf_counter()
+		self.last_tag = None
+		self.validated = None
+		self.gap = None
+		self.arrivals.clear()
+		self.started_at = datetime.now()
+		self.first_tag_at = None
+		self.last_tag_at = None
+
+	def on_new_tag(self, now: float) -> None:
+		if self.last_tag is not None:
+			gap = now - self.last_tag
+			# Smoothed gap between new tags of this box
+			self.gap = gap if self.gap is None else 0.3 * gap + 0.7 * self.gap
+		self.last_tag = now
+		self.arrivals.append(now)
+		self.last_tag_at = datetime.now()
+		if self.first_tag_at is None:
+			self.first_tag_at = self.last_tag_at
+
+	def settle_window(self) -> float:
+		if self.gap is None:
+			return settings.SETTLE_WINDOW_MAX
+		window = settings.SETTLE_FACTOR * self.gap
+		return min(max(window, settings.SETTLE_WINDOW_MIN), settings.SETTLE_WINDOW_MAX)
+
+	def read_rate(self, now: float, window: float) -> float:
+		"""New tags per second over the last `window` seconds."""
+		return sum(1 for arrival in self.arrivals if now - arrival < window) / window
+
+	def as_dict(self) -> dict:
+		return {
+			'box_info': self.box_info,
+			'queue': list(self.queue),
+			'tag_count': len(self.tags),
+			'state_sent': self.state_sent,
+			'reading_for': round(time.perf_counter() - self.started, 3) if self.started else None,
+			'settle_window': round(self.settle_window(), 3),
+		}
+
+
+class Controller:
+	MAX_QUEUED_BOXES = 20
+
+	def __init__(self, devices: DeviceManager, tags: TagList, audit: BoxAudit | None = None):
 		self.tags = tags
 		self.devices = devices
-		self.state_sent = False
-		self.validation_time = 1
+		self.audit = audit
+		self.tunnels: dict[str, Tunnel] = {}
+		# Boxes informed without a device
+		self.queue: deque[dict] = deque()
 		self.state_msg = {}
 
+	def tunnel(self, name: str) -> Tunnel:
+		tunnel = self.tunnels.get(name)
+		if tunnel is None:
+			tunnel = self.tunnels[name] = Tunnel(name)
+		return tunnel
+
+	def has_device(self, name: str) -> bool:
+		return self.devices.get_device(name) is not None
+
+	@property
+	def box_info(self) -> dict:
+		"""Box of the first tunnel reading one, else the next box in the shared queue."""
+		for tunnel in self.tunnels.values():
+			if tunnel.box_info:
+				return tunnel.box_info
+		return self.queue[0] if self.queue else {}
+
+	def status(self) -> dict:
+		return {
+			'queue': list(self.queue),
+			'tunnels': {name: tunnel.as_dict() for name, tunnel in self.tunnels.items()},
+		}
+
 	# [BOX INFO]
-	def update_box_info(self, box_info: str):
+	def update_box_info(self, box_info: str, device: str | None = None) -> dict | None:
+		"""Queue an informed box; returns it, or None when it was not accepted."""
 		box_info = box_info.replace('ç', ';')
 		parts = box_info.split(';')
 		box_id = None
 		qty = 0
+		if device and not self.has_device(device):
+			error_msg = f"Device '{device}' not found, box info was not queued"
+			self.set_state_msg(error_msg, 'error')
+			logging.error(error_msg)
+			return None
 		if not len(parts) == 2:
 			error_msg = f'Invalid box info format: {box_info}'
-			self.state_msg = {'text': error_msg, 'level': 'error'}
+			self.set_state_msg(error_msg, 'error')
 			logging.error(error_msg)
-			return
+			return None
 		box_id, qty_str = parts
 		try:
 			qty = int(qty_str)
 		except ValueError:
 			logging.warning(f"Invalid quantity '{qty_str}' in box info: {box_info}")
-			self.state_msg = {'text': f"Invalid quantity '{qty_str}' in box info", 'level': 'error'}
-			return
-		self.box_info = {'box_id': box_id, 'qty': qty}
-		logging.info(f'Updating box info: {self.box_info}')
-		self.state_msg = {'text': 'Box info updated', 'level': 'success'}
+			self.set_state_msg(f"Invalid quantity '{qty_str}' in box info", 'error')
+			return None
+
+		box = {'box_id': box_id, 'qty': qty, 'informed_at': datetime.now().isoformat()}
+		queue = self.tunnel(device).queue if device else self.queue
+		if queue and queue[-1]['box_id'] == box_id:
+			# Scanned twice: the last read wins
+			queue[-1] = box
+		elif len(queue) >= self.MAX_QUEUED_BOXES:
+			error_msg = f'Box queue is full ({len(queue)} boxes), {box_id} was not queued'
+			self.set_state_msg(error_msg, 'error')
+			logging.error(error_msg)
+			return None
+		else:
+			queue.append(box)
+		logging.info(f"Queued box info for {device or 'any tunnel'}: {box} ({len(queue)} waiting)")
+		event_bus.publish(BoxInfoChanged(dict(box), device))
+		self.set_state_msg(f'Box info updated ({len(queue)} waiting)', 'success')
+		return box
+
+	def clear_queue(self, device: str | None = None) -> int:
+		"""Drop the boxes waiting for `device`, or every waiting box; returns how many."""
+		if device:
+			tunnel = self.tunnels.get(device)
+			queues = [tunnel.queue] if tunnel else []
+		else:
+			queues = [self.queue, *(tunnel.queue for tunnel in self.tunnels.values())]
+		count = sum(len(queue) for queue in queues)
+		for queue in queues:
+			queue.clear()
+		event_bus.publish(BoxInfoChanged({}, device))
+		return count
+
+	def start_box(self, name: str) -> bool:
+		"""Reading started on `name`: bind the next box to the tunnel and validate it."""
+		tunnel = self.tunnel(name)
+		tunnel.start_session()
+		# A box still undecided (reading restarted) stays on the tunnel
+		if not tunnel.box_info or tunnel.state_sent:
+			queue = tunnel.queue or self.queue
+			tunnel.box_info = queue.popleft() if queue else {}
+			event_bus.publish(BoxInfoChanged(dict(tunnel.box_info), name))
+		tunnel.state_sent = False
+		if tunnel.settle_task is not None:
+			tunnel.settle_task.cancel()
+		if not self.validate_box_info(name):
+			return False
+		tunnel.settle_task = asyncio.create_task(self._settle(name, tunnel.box_info))
+		return True
+
+	def set_state_msg(self, text: str, level: str):
+		# Read (and cleared) by /controller/get_state; streamed as AlertRaised
+		self.state_msg = {'text': text, 'level': level}
+		event_bus.publish(AlertRaised(text, level, source='controller'))
 
 	def validate_box_info(self, name: str):
+		box_info = self.tunnel(name).box_info
 		status = True
-		if self.box_info.get('box_id') is None:
-			logging.warning('Box info is missing box_id')
+		if box_info.get('box_id') is None:
+			logging.warning(f'{name}: box info is missing box_id')
 			status = False
-		if self.box_info.get('qty', 0) <= 0:
-			logging.warning('Box info has invalid quantity')
+		if box_info.get('qty', 0) <= 0:
+			logging.warning(f'{name}: box info has invalid quantity')
 			status = False
 
 		if not status:
-			self.reject_box(name)
+			self.reject_box(name, reason='no_box')
 		return status
 
+	# [TAGS]
+	def add_tag(self, name: str, tag: dict, received: float | None = None) -> bool:
+		"""Count a tag for the tunnel's box; True when it is new to the box."""
+		tunnel = self.tunnel(name)
+		new_tag, _ = tunnel.tags.add(tag, device=name)
+		if new_tag:
+			tunnel.on_new_tag(time.perf_counter() if received is None else received)
+		return new_tag
+
+	def clear_tags(self, device: str | None = None):
+		if device:
+			tunnels = [self.tunnels[device]] if device in self.tunnels else []
+		else:
+			tunnels = self.tunnels.values()
+		for tunnel in tunnels:
+			tunnel.tags.clear()
+
 	# [ACTIONS]
-	def approve_box(self, name: str):
-		asyncio.create_task(self._approve(name))
-		self.state_sent = True
+	def approve_box(self, name: str, reason: str = 'stop'):
+		tunnel = self.tunnel(name)
+		record = self._record_decision(tunnel, 'approved', reason)
+		trace = self._trace_decision(tunnel, 'approved', reason)
+		asyncio.create_task(self._approve(name, tunnel.box_info, record, trace))
+		tunnel.state_sent = True
 
-	def reject_box(self, name: str):
-		asyncio.create_task(self._reject(name))
-		self.state_sent = True
+	def reject_box(self, name: str, reason: str = 'stop'):
+		tunnel = self.tunnel(name)
+		record = self._record_decision(tunnel, 'rejected', reason)
+		trace = self._trace_decision(tunnel, 'rejected', reason)
+		asyncio.create_task(self._reject(name, tunnel.box_info, record, trace))
+		tunnel.state_sent = True
 
-	async def _approve(self, name: str):
-		logging.info(f"{'='*20} Approving box {'='*20}")
-		logging.info(f'Box info: {self.box_info}')
-		success, msg = await self.devices.write_gpo(
-			device_name=name, pin=1, state=True, control='pulsed', time=300
+	def _trace_decision(self, tunnel: Tunnel, decision: str, reason: str) -> Trace:
+		decided = time.perf_counter()
+		# Without tags (cap, reader stop) the trace starts at the decision
+		last_tag = tunnel.last_tag
+		trace = Trace(
+			'tunnel',
+			tunnel.name,
+			origin=decided if last_tag is None else last_tag,
+			box_id=tunnel.box_info.get('box_id'),
+			decision=decision,
+			reason=reason,
+		)
+		if last_tag is not None:
+			if tunnel.validated is not None and tunnel.validated >= last_tag:
+				trace.span('ingest', last_tag, tunnel.validated)
+			trace.span('settle', trace.end, decided)
+		return trace
+
+	def _record_decision(self, tunnel: Tunnel, decision: str, reason: str) -> dict:
+		"""Metrics and log line of a decision; returns its box_events row (GPO fields pending)."""
+		box_info = tunnel.box_info
+		informed_at = box_info.get('informed_at')
+		record = {
+			'device': tunnel.name,
+			'box_id': box_info.get('box_id'),
+			'expected_qty': box_info.get('qty', 0),
+			'actual_qty': len(tunnel.tags),
+			'decision': decision,
+			'reason': reason,
+			'informed_at': datetime.fromisoformat(informed_at) if informed_at else None,
+			'started_at': tunnel.started_at,
+			'first_tag_at': tunnel.first_tag_at,
+			'last_tag_at': tunnel.last_tag_at,
+			'decided_at': datetime.now(),
+			'epcs': tunnel.tags.get_epcs(),
+		}
+		if tunnel.started is None:
+			return record
+		now = time.perf_counter()
+		elapsed = now - tunnel.started
+		BOX_DECISION.labels(tunnel.name, decision, reason).observe(elapsed)
+		settle = ''
+		if tunnel.last_tag is not None:
+			BOX_SETTLE.labels(tunnel.name, reason).observe(now - tunnel.last_tag)
+			settle = f', {(now - tunnel.last_tag) * 1000:.0f} ms after the last new tag'
+		logging.info(
+			f'{tunnel.name}: box {decision} ({reason}) {elapsed:.2f}s after reading start{settle}'
 		)
+		return record
+
+	def _audit(self, record: dict, success: bool, msg) -> None:
+		if self.audit is None:
+			return
+		record['gpo_ok'] = bool(success)
+		record['gpo_ack_at'] = datetime.now()
+		record['message'] = str(msg)[:255] if msg else None
+		self.audit.record(record)
+
+	async def _approve(self, name: str, box_info: dict, record: dict, trace: Trace):
+		logging.info(f"{'='*20} Approving box {'='*20}")
+		logging.info(f'{name} box info: {box_info}')
+		trace.span('dispatch', trace.end)
+		with trace.stage('gpo_write'):
+			success, msg = await self.devices.write_gpo(
+				device_name=name, pin=1, state=True, control='pulsed', time=300
+			)
+		tracer.finish(trace, 'approved' if success else 'gpo_failed')
 		if not success:
 			error_msg = f'Failed to write GPO for approving box: {msg}'
-			self.state_msg = {'text': error_msg, 'level': 'error'}
+			self.set_state_msg(error_msg, 'error')
 			logging.error(error_msg)
 		else:
-			self.state_msg = {'text': 'Box approved successfully!', 'level': 'success'}
+			self.set_state_msg('Box approved successfully!', 'success')
 			logging.info('GPO write successful for approving box')
-		self.reset_box()
+		self._audit(record, success, msg)
+		event_bus.publish(
+			ControllerDecision(name, 'approved', dict(box_info), success, str(msg or ''), record['reason'])
+		)
+		self.reset_box(name, box_info)
 
-	async def _reject(self, name: str):
+	async def _reject(self, name: str, box_info: dict, record: dict, trace: Trace):
 		logging.info(f"{'='*20} Rejecting box {'='*20}")
-		logging.info(f'Box info: {self.box_info}')
-		success, msg = await self.devices.write_gpo(
-			device_name=name, pin=2, state=True, control='pulsed', time=300
-		)
+		logging.info(f'{name} box info: {box_info}')
+		trace.span('dispatch', trace.end)
+		with trace.stage('gpo_write'):
+			success, msg = await self.devices.write_gpo(
+				device_name=name, pin=2, state=True, control='pulsed', time=300
+			)
+		tracer.finish(trace, 'rejected' if success else 'gpo_failed')
 		if not success:
 			error_msg = f'Failed to write GPO for rejecting box: {msg}'
-			self.state_msg = {'text': error_msg, 'level': 'error'}
+			self.set_state_msg(error_msg, 'error')
 			logging.error(error_msg)
 		else:
-			self.state_msg = {'text': 'Box rejected', 'level': 'error'}
+			self.set_state_msg('Box rejected', 'error')
 			logging.info('GPO write successful for rejecting box')
-		self.reset_box()
+		self._audit(record, success, msg)
+		event_bus.publish(
+			ControllerDecision(name, 'rejected', dict(box_info), success, str(msg or ''), record['reason'])
+		)
+		self.reset_box(name, box_info)
 
-	def reset_box(self):
-		self.box_info = {}
+	def reset_box(self, name: str, box_info: dict | None = None):
+		tunnel = self.tunnel(name)
+		# The next box may already be on the tunnel by the time the GPO write returns
+		if box_info is not None and tunnel.box_info is not box_info:
+			return
+		tunnel.box_info = {}
+		event_bus.publish(BoxInfoChanged({}, name))
 
 	# [VALIDATION]
-	def _validate(self):
-		current_qty = len(self.tags)
-		expected_qty = self.box_info.get('qty', 0)
+	def _validate(self, tunnel: Tunnel):
+		current_qty = len(tunnel.tags)
+		expected_qty = tunnel.box_info.get('qty', 0)
 		if current_qty < expected_qty:
 			return 0
 		elif current_qty > expected_qty:
@@ -103,30 +401,55 @@ class Controller:
 			return 1
 
 	def validate_tags(self, name: str, make_action: bool = False):
-		if self.state_sent:
+		tunnel = self.tunnel(name)
+		if tunnel.state_sent:
 			return
+		if not make_action:
+			# Called for a new tag: end of its ingest stage
+			tunnel.validated = time.perf_counter()
 		if not self.validate_box_info(name):
 			return
 		# Check if tag count matches box quantity
 		if make_action:
-			logging.info(f"{'='*20} Validating box {'='*20}")
-		logging.info(f"Current qty: {len(self.tags)}, Expected qty: {self.box_info.get('qty', 0)}")
-		state = self._validate()
+			logging.info(f"{'='*20} Validating box ({name}) {'='*20}")
+		logging.info(
+			f"{name} current qty: {len(tunnel.tags)}, Expected qty: {tunnel.box_info.get('qty', 0)}"
+		)
+		state = self._validate(tunnel)
 
-		# Reading is still in progress, wait and re-validate
-		if state == 0:
-			if make_action:
-				self.reject_box(name)
-		# Box OK
-		elif state == 1:
-			if make_action:
+		# Box NOK
+		if state == 2:
+			self.reject_box(name, reason='overflow')
+		# Reading stopped: decide with what was read
+		elif make_action:
+			if state == 1:
 				self.approve_box(name)
 			else:
-				asyncio.create_task(
-					delayed_function(
-						self.validate_tags, self.validation_time, name, make_action=True
-					)
-				)
-		# Box NOK
-		elif state == 2:
-			self.reject_box(name)
+				self.reject_box(name)
+		# Otherwise _settle decides once the reading settles
+
+	async def _settle(self, name: str, box_info: dict):
+		tunnel = self.tunnel(name)
+		while True:
+			window = tunnel.settle_window()
+			await asyncio.sleep(max(window / 4, 0.02))
+			if tunnel.state_sent or tunnel.box_info is not box_info:
+				return
+			now = time.perf_counter()
+			if settings.SETTLE_MAX_TIME is not None and now - tunnel.started >= settings.SETTLE_MAX_TIME:
+				reason = 'cap'
+			elif settings.SETTLE_RATE is None or tunnel.last_tag is None:
+				# Nothing read yet: wait for tags, the cap or the reader stopping
+				continue
+			elif tunnel.read_rate(now, window) >= settings.SETTLE_RATE:
+				continue
+			elif self._validate(tunnel) == 0 and now - tunnel.started < settings.SETTLE_MIN_TIME:
+				# Short but quiet this early: keep reading until SETTLE_MIN_TIME
+				continue
+			else:
+				reason = 'settled'
+			if self._validate(tunnel) == 1:
+				self.approve_box(name, reason=reason)
+			else:
+				self.reject_box(name, reason=reason)
+			return
@@ -9,6 +9,8 @@ from app.core import Indicator
 
 from app.models import Base
 
+from .box_audit import BoxAudit
+
 
 class Integration:
 	def __init__(self):
@@ -16,6 +18,7 @@ class Integration:
 		self.webhook_manager: WebhookManager | None = None
 		self.webhook_xtrack: WebhookXtrack | None = None
 		self.indicator = Indicator()
+		self.box_audit = BoxAudit()
 		self.setup_integration()
 
 	# [ SETUP ]
@@ -194,3 +197,30 @@ class Integration:
 				'has_more': (offset + limit) < total,
 				'data': records,
 			}
+
+	# [ BOX AUDIT ]
+	async def flush_box_events(self) -> int:
+		if self.db_manager is None:
+			self.box_audit.discard()
+			return 0
+		return await self.box_audit.flush(self.db_manager)
+
+	async def query_box_history(self, **filters) -> dict:
+		if self.db_manager is None:
+			raise Exception('Database manager is not initialized')
+
+		def _run():
+			with self.db_manager.get_session() as session:
+				return BoxAudit.query_history(session, **filters)
+
+		return await asyncio.to_thread(_run)
+
+	async def query_box_throughput(self, **filters) -> list[dict]:
+		if self.db_manager is None:
+			raise Exception('Database manager is not initialized')
+
+		def _run():
+			with self.db_manager.get_session() as session:
+				return BoxAudit.query_throughput(session, **filters)
+
+		return await asyncio.to_thread(_run)
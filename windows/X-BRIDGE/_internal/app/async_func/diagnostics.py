@@ -0,0 +1,6 @@
+from app.services.diagnostics import loop_monitor
+
+
+async def monitor_event_loop():
+	"""Measure event-loop lag and report stalls through the watchdog thread."""
+	await loop_monitor.run()
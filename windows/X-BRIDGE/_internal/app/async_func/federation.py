@@ -0,0 +1,16 @@
+import asyncio
+
+from app.core import settings
+from app.services.federation import federation
+
+
+async def follow_federation_peers():
+	"""Keep the federated view in sync with the change streams of FEDERATION_PEERS."""
+	while not settings.FEDERATION_PEERS:
+		await asyncio.sleep(60)
+
+	await federation.run(
+		settings.FEDERATION_PEERS,
+		wait=settings.FEDERATION_WAIT,
+		interval=settings.FEDERATION_INTERVAL,
+	)
@@ -0,0 +1,94 @@
+"""
+Multi-process ingestion: one shared tag store process plus N uvicorn workers.
+
+Every worker serves the whole API on PORT (the kernel spreads connections
+between them) and keeps its tags in the store process through RemoteTagList,
+so dedup and the /rfid views are global. The worker holding the store's primary
+lease is the only one that connects to readers; if it dies another worker takes
+over. Integrations (database, webhooks) run in whichever worker received the
+read.
+
+Usage, from the project root (the folder holding `app/`):
+
+    python -m app.cluster --workers 4
+    python -m app.cluster --workers 4 --store tcp://127.0.0.1:5200
+
+INGEST_WORKERS and TAG_STORE_URL in config.json are used when the flags are
+omitted.
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def create_worker_app():
+	"""uvicorn factory run in every worker process."""
+	from app.core import SWAGGER_PATH, settings
+	from app.core.build_app import create_application
+
+	return create_application(settings.TITLE, SWAGGER_PATH)
+
+
+def wait_for_port(url: str, timeout: float = 10.0) -> None:
+	from app.services.rfid.tag_store import parse_url
+
+	address = parse_url(url)
+	deadline = time.monotonic() + timeout
+	while True:
+		try:
+			socket.create_connection(address, timeout=1).close()
+			return
+		except OSError:
+			if time.monotonic() > deadline:
+				raise RuntimeError(f'Tag store did not start on {url}')
+			time.sleep(0.1)
+
+
+def main() -> None:
+	# Resolve app paths like main.py does (workers inherit argv and the environment)
+	sys.argv[0] = str(ROOT / 'main.py')
+	if str(ROOT) not in sys.path:
+		sys.path.insert(0, str(ROOT))
+
+	import uvicorn
+
+	from app.core import settings
+	from app.services.rfid.tag_store import run_store
+
+	parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+	parser.add_argument('--workers', type=int, default=settings.INGEST_WORKERS)
+	parser.add_argument('--store', default=settings.TAG_STORE_URL, help='tcp://host:port of the tag store')
+	parser.add_argument('--host', default='0.0.0.0')
+	parser.add_argument('--port', type=int, default=settings.PORT)
+	args = parser.parse_args(sys.argv[1:])
+
+	url = args.store or f'tcp://127.0.0.1:{args.port + 100}'
+	os.environ['TAG_STORE_URL'] = url
+
+	store = multiprocessing.get_context('spawn').Process(
+		target=run_store, args=(url, 'tid', settings.TAG_PREFIX), name='tag-store', daemon=True
+	)
+	store.start()
+	try:
+		wait_for_port(url)
+		uvicorn.run(
+			'app.cluster:create_worker_app',
+			factory=True,
+			host=args.host,
+			port=args.port,
+			workers=max(1, args.workers),
+		)
+	finally:
+		store.terminate()
+		store.join(timeout=5)
+
+
+if __name__ == '__main__':
+	main()
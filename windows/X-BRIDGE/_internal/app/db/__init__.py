@@ -1,6 +1,8 @@
 from smartx_rfid.db import DatabaseManager
 import logging
 from app.models import get_all_models
+from .async_manager import AsyncDatabaseManager, is_async_database_url  # noqa: F401
+from .upsert import upsert_rows  # noqa: F401
 
 
 def setup_database(database_url: str = None) -> DatabaseManager:
@@ -23,3 +25,26 @@ def setup_database(database_url: str = None) -> DatabaseManager:
 	logging.info('DatabaseManager setup complete.')
 
 	return db_manager
+
+
+def setup_async_database(database_url: str = None) -> AsyncDatabaseManager:
+	"""Same as setup_database, for DATABASE_URLs using an asyncio driver (e.g. sqlite+aiosqlite)."""
+	logging.info(f"{'='*60}")
+	logging.info('Initializing AsyncDatabaseManager')
+	db_manager = AsyncDatabaseManager(
+		database_url=database_url, echo=True, pool_size=5, pool_timeout=30
+	)
+
+	logging.info('Initializing database...')
+	db_manager.initialize()
+
+	logging.info('Registering models...')
+	models = get_all_models()
+	for model in models:
+		logging.info(f'Registering model: {model.__name__}')
+		db_manager.register_models(model)
+
+	# Tables are created on the first session, once the event loop is running
+	logging.info('AsyncDatabaseManager setup complete.')
+
+	return db_manager
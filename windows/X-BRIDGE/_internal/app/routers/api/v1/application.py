@@ -39,8 +39,23 @@ async def get_current_settings():
 	description='Update the current application settings with the provided data',
 )
 async def update_settings(settings_data: SettingsSchema):  # type: ignore
-	settings_service.update_settings(settings_data.model_dump(exclude_unset=True))
-	return JSONResponse(content={'status': 'updated', 'settings': settings.get_current_settings()})
+	reload = await settings_service.update_settings(settings_data.model_dump(exclude_unset=True))
+	return JSONResponse(
+		content={'status': 'updated', 'settings': settings.get_current_settings(), 'reload': reload}
+	)
+
+
+@router.post(
+	'/reload_settings',
+	summary='Reload the configuration file without restarting',
+	description=(
+		'Re-reads config.json and rebuilds only what the changed settings affect (database, '
+		'webhooks, logger, tag prefix filter). Reader connections and tags are kept. '
+		'`restart_required` lists settings that only apply after a restart.'
+	),
+)
+async def reload_settings():
+	return JSONResponse(content=await settings_service.reload())
 
 
 @router.post('/create_device/{device_name}', summary='Create a new device configuration')
@@ -0,0 +1,149 @@
+import asyncio
+import os
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import FileResponse, JSONResponse
+from smartx_rfid.utils.path import get_prefix_from_path
+
+from app.core import settings
+from app.routers.api.v1.diagnostics import verify_diagnostics_token
+from app.services import rfid_manager
+from app.services.replay import ReplayBusyError, replayer
+from app.services.rfid.capture import EXTENSION, CaptureError, capture_info
+
+router_prefix = get_prefix_from_path(__file__)
+router = APIRouter(
+	prefix=router_prefix, tags=[router_prefix], dependencies=[Depends(verify_diagnostics_token)]
+)
+
+
+def capture_path(file: str) -> str:
+	"""Path of a capture inside CAPTURE_PATH; only the file name of `file` is used."""
+	name = os.path.basename(file)
+	if not name.endswith(EXTENSION):
+		name += EXTENSION
+	return os.path.join(settings.CAPTURE_PATH, name)
+
+
+@router.post(
+	'/start',
+	summary='Start recording raw reads',
+	description=(
+		'Records every call to on_event, on_tag, on_tags and handle_r700_event (device, type, payload '
+		'and monotonic time) to a compressed capture file in CAPTURE_PATH. Recording stops '
+		'automatically at `max_mb` (default CAPTURE_MAX_MB).'
+	),
+)
+async def start_capture(name: str | None = None, max_mb: float | None = None):
+	try:
+		status = rfid_manager.recorder.start(
+			settings.CAPTURE_PATH, name=name, max_mb=max_mb or settings.CAPTURE_MAX_MB
+		)
+	except CaptureError as e:
+		return JSONResponse(status_code=409, content={'error': str(e)})
+	except OSError as e:
+		return JSONResponse(status_code=500, content={'error': str(e)})
+	return JSONResponse(status_code=200, content=status)
+
+
+@router.post(
+	'/stop',
+	summary='Stop recording',
+)
+async def stop_capture():
+	return JSONResponse(status_code=200, content=rfid_manager.recorder.stop())
+
+
+@router.get(
+	'/status',
+	summary='Get recording status',
+)
+async def get_capture_status():
+	return JSONResponse(status_code=200, content=rfid_manager.recorder.status())
+
+
+@router.get(
+	'/list',
+	summary='List capture files',
+	description='Returns the captures in CAPTURE_PATH with their record count and duration.',
+)
+async def list_captures():
+	def collect():
+		if not os.path.isdir(settings.CAPTURE_PATH):
+			return []
+		captures = []
+		for name in sorted(os.listdir(settings.CAPTURE_PATH)):
+			if not name.endswith(EXTENSION):
+				continue
+			try:
+				captures.append(capture_info(os.path.join(settings.CAPTURE_PATH, name)))
+			except (CaptureError, OSError, ValueError) as e:
+				captures.append({'file': name, 'error': str(e)})
+		return captures
+
+	return JSONResponse(status_code=200, content=await asyncio.to_thread(collect))
+
+
+@router.get(
+	'/download/{file}',
+	summary='Download a capture file',
+)
+async def download_capture(file: str):
+	path = capture_path(file)
+	if not os.path.isfile(path):
+		return JSONResponse(status_code=404, content={'error': f'Capture {file} not found'})
+	return FileResponse(path, filename=os.path.basename(path), media_type='application/octet-stream')
+
+
+@router.delete(
+	'/{file}',
+	summary='Delete a capture file',
+)
+async def delete_capture(file: str):
+	path = capture_path(file)
+	recorder = rfid_manager.recorder
+	if recorder.active and os.path.abspath(recorder.writer.path) == os.path.abspath(path):
+		return JSONResponse(status_code=409, content={'error': 'Capture is being recorded'})
+	if not os.path.isfile(path):
+		return JSONResponse(status_code=404, content={'error': f'Capture {file} not found'})
+	os.remove(path)
+	return JSONResponse(status_code=200, content={'message': f'Capture {os.path.basename(path)} deleted'})
+
+
+@router.post(
+	'/replay',
+	summary='Replay a capture',
+	description=(
+		'Feeds a capture back through the same RfidManager entry points, in the background. '
+		'`speed` scales the recorded timing (1 = real time, 10 = ten times faster, 0 = as fast '
+		'as possible); `loops` repeats the capture. Integrations receive the replayed reads '
+		'like live ones.'
+	),
+)
+async def start_replay(file: str, speed: float = 1.0, loops: int = 1):
+	path = capture_path(file)
+	if not os.path.isfile(path):
+		return JSONResponse(status_code=404, content={'error': f'Capture {file} not found'})
+	try:
+		status = await replayer.start(path, speed=speed, loops=loops)
+	except ReplayBusyError as e:
+		return JSONResponse(status_code=409, content={'error': str(e)})
+	except (CaptureError, ValueError) as e:
+		return JSONResponse(status_code=400, content={'error': str(e)})
+	return JSONResponse(status_code=200, content=status)
+
+
+@router.post(
+	'/replay/stop',
+	summary='Stop the running replay',
+)
+async def stop_replay():
+	return JSONResponse(status_code=200, content=await replayer.stop())
+
+
+@router.get(
+	'/replay/status',
+	summary='Get replay progress',
+)
+async def get_replay_status():
+	return JSONResponse(status_code=200, content=replayer.status())
@@ -0,0 +1,208 @@
+import asyncio
+import secrets
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from smartx_rfid.utils.path import get_prefix_from_path
+
+from app.core import settings
+from app.services import rfid_manager
+from app.services.diagnostics import (
+	ProfilerBusyError,
+	SamplingProfiler,
+	SnapshotNotFoundError,
+	heap_profiler,
+	loop_monitor,
+	profiler,
+	structure_counts,
+)
+
+
+LOOPBACK_HOSTS = {'127.0.0.1', '::1', 'localhost'}
+
+
+async def verify_diagnostics_token(
+	request: Request, x_diagnostics_token: str | None = Header(None)
+):
+	"""
+	Require the X-Diagnostics-Token header when DIAGNOSTICS_TOKEN is configured;
+	without a token only clients on this machine are allowed.
+	"""
+	expected = settings.DIAGNOSTICS_TOKEN
+	if not expected:
+		host = request.client.host if request.client else None
+		if host not in LOOPBACK_HOSTS:
+			raise HTTPException(
+				status_code=403, detail='Diagnostics are local only until DIAGNOSTICS_TOKEN is set'
+			)
+		return
+	if not secrets.compare_digest(x_diagnostics_token or '', expected):
+		raise HTTPException(status_code=401, detail='Invalid or missing X-Diagnostics-Token')
+
+
+router_prefix = get_prefix_from_path(__file__)
+router = APIRouter(
+	prefix=router_prefix, tags=[router_prefix], dependencies=[Depends(verify_diagnostics_token)]
+)
+
+
+@router.get(
+	'/get_loop_lag',
+	summary='Get event loop lag',
+	description='Returns the last and maximum event loop lag and how many stalls were detected.',
+)
+async def get_loop_lag():
+	return JSONResponse(status_code=200, content=loop_monitor.get_stats())
+
+
+@router.get(
+	'/get_loop_stalls',
+	summary='Get recent event loop stalls',
+	description=(
+		'Returns the most recent stalls (loop blocked longer than LOOP_STALL_THRESHOLD), '
+		'newest first, each with the stack of the blocked loop thread captured while it '
+		'was stuck.'
+	),
+)
+async def get_loop_stalls(limit: int | None = None):
+	return JSONResponse(status_code=200, content=loop_monitor.get_stalls(limit))
+
+
+@router.get(
+	'/profile',
+	summary='Profile CPU usage',
+	description=(
+		'Samples the stacks of every thread (event loop and workers) for `seconds` '
+		'(max 60) every `interval_ms` and returns either a top-N table by function, '
+		'collapsed stacks for flamegraph.pl / speedscope, or a speedscope JSON file. '
+		'Threads waiting for work are left out unless `idle=true`. Only one profile '
+		'can run at a time.'
+	),
+)
+async def profile(
+	seconds: float = 10,
+	interval_ms: float = 10,
+	format: Literal['top', 'collapsed', 'speedscope'] = 'top',
+	top: int = 30,
+	idle: bool = False,
+):
+	try:
+		result = await asyncio.to_thread(profiler.profile, seconds, interval_ms / 1000, idle)
+	except ProfilerBusyError as e:
+		return JSONResponse(status_code=409, content={'error': str(e)})
+
+	if format == 'collapsed':
+		return PlainTextResponse(SamplingProfiler.to_collapsed(result))
+	if format == 'speedscope':
+		return JSONResponse(
+			status_code=200,
+			content=SamplingProfiler.to_speedscope(result),
+			headers={'Content-Disposition': 'attachment; filename="profile.speedscope.json"'},
+		)
+	return JSONResponse(status_code=200, content=SamplingProfiler.to_top(result, top))
+
+
+# [ HEAP ]
+@router.get(
+	'/get_heap_status',
+	summary='Get heap profiler status',
+	description='Returns whether tracemalloc is tracing, traced/peak bytes, RSS, GC counts and stored snapshots.',
+)
+async def get_heap_status():
+	return JSONResponse(status_code=200, content=heap_profiler.status())
+
+
+@router.post(
+	'/heap/start',
+	summary='Start tracemalloc',
+	description=(
+		'Starts tracing allocations keeping `frames` frames per traceback. Tracing slows '
+		'allocations down and uses memory, stop it once the investigation is done.'
+	),
+)
+async def heap_start(frames: int = 25):
+	return JSONResponse(status_code=200, content=heap_profiler.start(max(1, frames)))
+
+
+@router.post('/heap/stop', summary='Stop tracemalloc')
+async def heap_stop():
+	return JSONResponse(status_code=200, content=heap_profiler.stop())
+
+
+@router.post(
+	'/heap/snapshot',
+	summary='Take a heap snapshot',
+	description=(
+		'Stores a tracemalloc snapshot (when tracing) plus live object counts per type. '
+		'The last 8 snapshots are kept.'
+	),
+)
+async def heap_snapshot(label: str | None = None):
+	snapshot = await asyncio.to_thread(heap_profiler.take_snapshot, label)
+	return JSONResponse(status_code=200, content=snapshot)
+
+
+@router.delete('/heap/snapshot/{snapshot_id}', summary='Delete a heap snapshot')
+async def heap_delete_snapshot(snapshot_id: int):
+	try:
+		heap_profiler.delete_snapshot(snapshot_id)
+	except SnapshotNotFoundError as e:
+		return JSONResponse(status_code=404, content={'error': str(e)})
+	return JSONResponse(status_code=200, content={'deleted': snapshot_id})
+
+
+@router.get(
+	'/heap/top/{snapshot_id}',
+	summary='Top allocations of a snapshot',
+	description='Largest allocations grouped by `lineno`, `filename` or `traceback`, or most common `type`.',
+)
+async def heap_top(
+	snapshot_id: int,
+	group_by: Literal['lineno', 'filename', 'traceback', 'type'] = 'lineno',
+	limit: int = 20,
+):
+	try:
+		result = await asyncio.to_thread(heap_profiler.top, snapshot_id, group_by, limit)
+	except SnapshotNotFoundError as e:
+		return JSONResponse(status_code=404, content={'error': str(e)})
+	except ValueError as e:
+		return JSONResponse(status_code=400, content={'error': str(e)})
+	return JSONResponse(status_code=200, content=result)
+
+
+@router.get(
+	'/heap/diff',
+	summary='Diff two heap snapshots',
+	description=(
+		'Returns what grew from snapshot `first` to snapshot `second`, grouped by '
+		'`lineno`, `filename`, `traceback` or object `type`, biggest growth first.'
+	),
+)
+async def heap_diff(
+	first: int,
+	second: int,
+	group_by: Literal['lineno', 'filename', 'traceback', 'type'] = 'lineno',
+	limit: int = 20,
+):
+	try:
+		result = await asyncio.to_thread(heap_profiler.diff, first, second, group_by, limit)
+	except SnapshotNotFoundError as e:
+		return JSONResponse(status_code=404, content={'error': str(e)})
+	except ValueError as e:
+		return JSONResponse(status_code=400, content={'error': str(e)})
+	return JSONResponse(status_code=200, content=result)
+
+
+@router.get(
+	'/get_object_counts',
+	summary='Get sizes of the main in-memory structures',
+	description=(
+		'Tags in memory, pending asyncio tasks by coroutine, presence/rollup buffers, '
+		'database pool status and live httpx clients.'
+	),
+)
+async def get_object_counts():
+	# all_tasks() on the loop; the gc walk in a thread so reads keep flowing
+	counts = await asyncio.to_thread(structure_counts, rfid_manager, asyncio.all_tasks())
+	return JSONResponse(status_code=200, content=counts)
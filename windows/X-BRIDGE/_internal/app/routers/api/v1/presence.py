@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from smartx_rfid.utils.path import get_prefix_from_path
+
+from app.services import rfid_manager
+
+router_prefix = get_prefix_from_path(__file__)
+router = APIRouter(prefix=router_prefix, tags=[router_prefix])
+
+
+@router.get(
+	'/get_presence',
+	summary='Get current tag presence',
+	description=(
+		'Returns where each tag was last seen (device, antenna, RSSI, first/last seen and '
+		'read count) from the tag_presence table. Filter by device, antenna and by tags '
+		'seen in the last `seen_within` seconds.'
+	),
+)
+async def get_presence(
+	device: str | None = None,
+	ant: int | None = None,
+	seen_within: int | None = None,
+	limit: int = 1000,
+	offset: int = 0,
+):
+	seen_since = None
+	if seen_within is not None:
+		seen_since = datetime.now() - timedelta(seconds=seen_within)
+	try:
+		result = await rfid_manager.integration.query_presence(
+			device=device, ant=ant, seen_since=seen_since, limit=limit, offset=offset
+		)
+	except Exception as e:
+		return JSONResponse(status_code=500, content={'error': str(e)})
+	return JSONResponse(status_code=200, content=result)
+
+
+@router.get(
+	'/get_device_presence/{device_name}',
+	summary='Get tags currently at a device',
+	description='Returns the tags whose last read was on the specified device.',
+)
+async def get_device_presence(
+	device_name: str, seen_within: int | None = None, limit: int = 1000, offset: int = 0
+):
+	return await get_presence(
+		device=device_name, seen_within=seen_within, limit=limit, offset=offset
+	)
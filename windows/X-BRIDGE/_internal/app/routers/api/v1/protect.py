@@ -0,0 +1,121 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
+from smartx_rfid.utils.path import get_prefix_from_path
+
+from app.schemas.protected import ProtectListModel, ProtectResumeModel
+from app.services.protect import JobNotFoundError, JobStateError, protect_jobs
+
+router_prefix = get_prefix_from_path(__file__)
+router = APIRouter(prefix=router_prefix, tags=[router_prefix])
+
+
+@router.post(
+	'/submit/{device_name}',
+	summary='Submit a bulk protected-mode job',
+	description=(
+		'Starts activating or deactivating protected mode on a list of tags in the background '
+		'and returns the job at once. Up to PROTECT_WINDOW commands are in flight on the device, '
+		'and jobs of the same device run one after the other. Follow it with /get_job or the '
+		'ProtectJobProgress events of /api/v1/events/stream.'
+	),
+)
+async def submit_job(device_name: str, protect_list: ProtectListModel):
+	try:
+		job = await protect_jobs.submit(
+			device_name, protect_list.epcs, protect_list.password, protect_list.active
+		)
+	except ValueError as e:
+		return JSONResponse(status_code=400, content={'error': str(e)})
+	except OSError as e:
+		return JSONResponse(status_code=500, content={'error': str(e)})
+	return JSONResponse(status_code=202, content=job)
+
+
+@router.get(
+	'/get_jobs',
+	summary='List bulk protected-mode jobs',
+	description='Returns the jobs kept in PROTECT_JOBS_PATH, newest first.',
+)
+async def get_jobs(device: str | None = None, status: str | None = None):
+	return JSONResponse(status_code=200, content=await protect_jobs.get_jobs(device, status))
+
+
+@router.get(
+	'/get_job/{job_id}',
+	summary='Get a bulk protected-mode job',
+	description=(
+		'Status (queued, running, completed, cancelled, interrupted) and progress of a job. '
+		'`error` says why an interrupted job stopped.'
+	),
+)
+async def get_job(job_id: str):
+	try:
+		job = await protect_jobs.get_job(job_id)
+	except JobNotFoundError as e:
+		return JSONResponse(status_code=404, content={'error': str(e)})
+	return JSONResponse(status_code=200, content=job)
+
+
+@router.get(
+	'/get_results/{job_id}',
+	summary='Get the results of a bulk protected-mode job',
+	description=(
+		'Result of each EPC sent so far (success, error, time). `success=false` lists only '
+		'the failed ones.'
+	),
+)
+async def get_results(
+	job_id: str,
+	success: bool | None = None,
+	limit: int = Query(default=100, ge=1, le=5000),
+	offset: int = Query(default=0, ge=0),
+):
+	try:
+		results = await protect_jobs.get_results(job_id, success, limit, offset)
+	except JobNotFoundError as e:
+		return JSONResponse(status_code=404, content={'error': str(e)})
+	except OSError as e:
+		return JSONResponse(status_code=500, content={'error': str(e)})
+	return JSONResponse(status_code=200, content=results)
+
+
+@router.post(
+	'/cancel/{job_id}',
+	summary='Cancel a bulk protected-mode job',
+	description='Stops sending commands; the ones in flight finish and are recorded.',
+)
+async def cancel_job(job_id: str):
+	try:
+		job = await protect_jobs.cancel(job_id)
+	except JobNotFoundError as e:
+		return JSONResponse(status_code=404, content={'error': str(e)})
+	except JobStateError as e:
+		return JSONResponse(status_code=409, content={'error': str(e)})
+	return JSONResponse(status_code=200, content=job)
+
+
+@router.post(
+	'/resume/{job_id}',
+	summary='Resume a bulk protected-mode job',
+	description=(
+		'Continues a cancelled or interrupted job with the EPCs that have no result yet. '
+		'`retry_failed` also sends the failed EPCs again (completed jobs too). The tag '
+		'password is not stored on disk: send it again for jobs submitted before the bridge '
+		'restarted.'
+	),
+)
+async def resume_job(
+	job_id: str, retry_failed: bool = False, resume: ProtectResumeModel | None = None
+):
+	password = resume.password if resume is not None else None
+	try:
+		job = await protect_jobs.resume(job_id, retry_failed, password)
+	except ValueError as e:
+		return JSONResponse(status_code=400, content={'error': str(e)})
+	except JobNotFoundError as e:
+		return JSONResponse(status_code=404, content={'error': str(e)})
+	except JobStateError as e:
+		return JSONResponse(status_code=409, content={'error': str(e)})
+	except OSError as e:
+		return JSONResponse(status_code=500, content={'error': str(e)})
+	return JSONResponse(status_code=202, content=job)
@@ -20,8 +20,7 @@ async def receive_tags(device_name: str, tags: list[TagSchema] | TagSchema):
 	if isinstance(tags, TagSchema):
 		tags = [tags]
 
-	for tag in tags:
-		rfid_manager.on_event(name=device_name, event_type='tag', event_data=tag.model_dump())
+	rfid_manager.on_tags(name=device_name, tags=[tag.model_dump() for tag in tags])
 
 	return JSONResponse(
 		status_code=200,
@@ -1,22 +1,34 @@
+import os
+from typing import Literal
+
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from smartx_rfid.utils.path import get_prefix_from_path
 from smartx_rfid.schemas.tag import WriteTagValidator
 from app.schemas import write_tag_example
 
+from app.core import settings, event_bus
+from app.core.events import TagsCleared
 from app.services import rfid_manager
+from app.services.federation import federation
+from app.services.rfid.epc import count_by_identity
 from app.models import get_all_models
 
 router_prefix = get_prefix_from_path(__file__)
 router = APIRouter(prefix=router_prefix, tags=[router_prefix])
 
+# `scope=federated` answers from the view merged with FEDERATION_PEERS (see /federation)
+Scope = Literal['local', 'federated']
+
 
 @router.get(
 	'/get_tags',
 	summary='Get all tags',
 	description='Returns a list of all detected RFID tags.',
 )
-async def get_tags():
+async def get_tags(scope: Scope = 'local'):
+	if scope == 'federated':
+		return federation.merged_tags()
 	return rfid_manager.tags.get_all()
 
 
@@ -25,10 +37,38 @@ async def get_tags():
 	summary='Get tag count',
 	description='Returns the total number of detected RFID tags.',
 )
-async def get_tag_count():
+async def get_tag_count(scope: Scope = 'local'):
+	if scope == 'federated':
+		return {'count': len(federation.merged_tags())}
 	return {'count': len(rfid_manager.tags)}
 
 
+@router.get(
+	'/get_tag_store',
+	summary='Get shared tag store status',
+	description='Tag count, request/read totals and primary worker of the shared tag store (TAG_STORE_URL).',
+)
+async def get_tag_store():
+	if not settings.TAG_STORE_URL:
+		return JSONResponse(status_code=404, content={'error': 'TAG_STORE_URL not set'})
+	try:
+		return {'url': settings.TAG_STORE_URL, 'worker': os.getpid(), **rfid_manager.tags.stats()}
+	except Exception as e:
+		return JSONResponse(status_code=500, content={'error': str(e)})
+
+
+@router.get(
+	'/get_sink_status',
+	summary='Get integration sink worker status',
+	description=(
+		'Ring occupancy, pending/dropped records, lag and process state of the integration '
+		'sink worker (SINK_WORKER). The same figures are exported on /metrics as sink_*.'
+	),
+)
+async def get_sink_status():
+	return rfid_manager.sink.status()
+
+
 @router.post(
 	'/clear_tags',
 	summary='Clear all tags',
@@ -36,6 +76,7 @@ async def get_tag_count():
 )
 async def clear_tags():
 	rfid_manager.tags.clear()
+	event_bus.publish(TagsCleared())
 	return JSONResponse(
 		status_code=200,
 		content={'message': 'All tags have been cleared.'},
@@ -49,6 +90,7 @@ async def clear_tags():
 )
 async def clear_tags_device(device_name: str):
 	rfid_manager.tags.remove_tags_by_device(device=device_name)
+	event_bus.publish(TagsCleared(device=device_name))
 	return JSONResponse(
 		status_code=200,
 		content={'message': f'All tags for device {device_name} have been cleared.'},
@@ -60,7 +102,9 @@ async def clear_tags_device(device_name: str):
 	summary='Get all EPCs',
 	description='Returns a list of all detected EPCs from RFID tags.',
 )
-async def get_epcs():
+async def get_epcs(scope: Scope = 'local'):
+	if scope == 'federated':
+		return [tag['epc'] for tag in federation.merged_tags() if 'epc' in tag]
 	return rfid_manager.tags.get_epcs()
 
 
@@ -69,8 +113,8 @@ async def get_epcs():
 	summary='Get all TIDs',
 	description='Returns a list of all detected TIDs from RFID tags.',
 )
-async def get_tids():
-	tags = rfid_manager.tags.get_all()
+async def get_tids(scope: Scope = 'local'):
+	tags = federation.merged_tags() if scope == 'federated' else rfid_manager.tags.get_all()
 	return [tag.get('tid') for tag in tags]
 
 
@@ -79,16 +123,37 @@ async def get_tids():
 	summary='Get GTIN count',
 	description='Returns the total number of unique GTINs from detected RFID tags.',
 )
-async def get_gtin_count():
+async def get_gtin_count(scope: Scope = 'local'):
+	if scope == 'federated':
+		counts = {}
+		for tag in federation.merged_tags():
+			gtin = tag.get('gtin') or 'UNKNOWN'
+			counts[gtin] = counts.get(gtin, 0) + 1
+		return counts
 	return rfid_manager.tags.get_gtin_counts()
 
 
+@router.get(
+	'/get_identity_count',
+	summary='Get count per GS1 identity',
+	description=(
+		'Counts detected tags per EPC scheme and class-level identity: GTIN for SGTIN-96, '
+		'SSCC for SSCC-96 logistic units, GRAI for GRAI-96 returnable assets and company '
+		'prefix for GIAI-96. Other EPCs are counted under `unknown`.'
+	),
+)
+async def get_identity_count(scope: Scope = 'local'):
+	return count_by_identity(await get_epcs(scope))
+
+
 @router.get(
 	'/get_tag_info/{epc}',
 	summary='Get tag information',
 	description='Returns detailed information about detected RFID tags.',
 )
-async def get_tag_info(epc: str):
+async def get_tag_info(epc: str, scope: Scope = 'local'):
+	if scope == 'federated':
+		return next((tag for tag in federation.merged_tags() if tag.get('epc') == epc), None)
 	return rfid_manager.tags.get_by_identifier(identifier_value=epc, identifier_type='epc')
 
 
@@ -112,7 +177,7 @@ async def generate_table_report(table_name: str, limit: int = 1000, offset: int
 		return JSONResponse(status_code=400, content={'error': 'Invalid table name'})
 
 	try:
-		return rfid_manager.integration.generate_table_report(
+		return await rfid_manager.integration.generate_table_report(
 			model=table_model, limit=limit, offset=offset
 		)
 	except Exception as e:
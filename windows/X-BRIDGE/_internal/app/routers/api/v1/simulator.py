@@ -1,12 +1,14 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from smartx_rfid.utils.path import get_prefix_from_path
+import asyncio
 import logging
 
 from app.services import rfid_manager
+from app.services.simulator import simulator
 
-from app.schemas.simulator import TagListSimulator, TagGtinSimulator
-from pyepc import SGTIN
+from app.schemas.simulator import ContinuousSimulatorConfig, TagListSimulator, TagGtinSimulator
+from app.services.rfid.epc import encode_sgtin96_batch
 
 router_prefix = get_prefix_from_path(__file__)
 router = APIRouter(prefix=router_prefix, tags=[router_prefix])
@@ -86,6 +88,10 @@ async def simulate_tag_list(tag_list: TagListSimulator):
 				'rssi': -50 - (i % 30),  # RSSI variando entre -50 e -80
 			}
 
+			# Libera o loop a cada bloco para não travar a API
+			if i and i % 500 == 0:
+				await asyncio.sleep(0)
+
 			# Envia o evento para o sistema
 			if not rfid_manager.on_tag(
 				name=device_name,
@@ -158,17 +164,11 @@ async def gtin_list(tag_generator: TagGtinSimulator):
 	try:
 		tags_generated = []
 
-		# Generate sequential tags from GTIN
-		for i in range(qtd):
-			# Create SGTIN from GTIN and sequential serial number
-			sgtin = SGTIN.from_sgtin(
-				gtin=gtin,
-				serial_number=str(start_serial + i),
-				company_prefix_len=7,  # Standard 7-digit company prefix
-			)
-			# Encode to hexadecimal EPC
-			epc_hex = sgtin.encode().lower()
+		# Encode every SGTIN-96 at once (standard 7-digit company prefix)
+		epcs = encode_sgtin96_batch(gtin, range(start_serial, start_serial + qtd), company_prefix_len=7)
 
+		# Generate sequential tags from GTIN
+		for i, epc_hex in enumerate(epcs):
 			# Create tag data structure
 			tag_data = {
 				'epc': epc_hex,
@@ -177,6 +177,10 @@ async def gtin_list(tag_generator: TagGtinSimulator):
 				'rssi': -50 - (i % 30),  # RSSI varying between -50 and -80
 			}
 
+			# Release the loop every chunk so large batches don't stall the API
+			if i and i % 500 == 0:
+				await asyncio.sleep(0)
+
 			# Send tag event to processing pipeline
 			if not rfid_manager.on_tag(
 				name=device_name,
@@ -201,3 +205,38 @@ async def gtin_list(tag_generator: TagGtinSimulator):
 	except Exception as e:
 		logging.error(f'Error while processing GTIN tag generation: {e}')
 		raise HTTPException(status_code=500, detail=f'Error generating GTIN tags: {str(e)}')
+
+
+@router.post(
+	'/start',
+	summary='Start the continuous simulator',
+	description=(
+		'Emits reads in the background at `rate` reads/s across virtual devices '
+		'SIMULATOR_1..N. Tags enter and leave the field (population, dwell_s), are re-read '
+		'according to duplicate_ratio and have per-tag RSSI around rssi_mean. With '
+		'reading_on_s/reading_off_s set, each device cycles `reading` start/stop events. '
+		'Restarts the simulator if it is already running.'
+	),
+)
+async def start_simulator(config: ContinuousSimulatorConfig):
+	return JSONResponse(status_code=200, content=await simulator.start(config))
+
+
+@router.post(
+	'/stop',
+	summary='Stop the continuous simulator',
+)
+async def stop_simulator():
+	return JSONResponse(status_code=200, content=await simulator.stop())
+
+
+@router.get(
+	'/status',
+	summary='Get continuous simulator status',
+	description=(
+		'Target vs achieved rate (overall and over the last 5 s), reads, new tags, '
+		'duplicates, reads skipped because the loop fell behind, and per-device state.'
+	),
+)
+async def simulator_status():
+	return JSONResponse(status_code=200, content=simulator.status())
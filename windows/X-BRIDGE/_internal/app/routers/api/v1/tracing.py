@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Query
+from smartx_rfid.utils.path import get_prefix_from_path
+
+from app.core import settings, tracer
+
+router_prefix = get_prefix_from_path(__file__)
+router = APIRouter(prefix=router_prefix, tags=[router_prefix])
+
+
+@router.get(
+	'/get_slow',
+	summary='Get recent slow GPO decisions',
+	description=(
+		'Returns the most recent GPO decisions that took at least SLOW_DECISION_MS from their '
+		'origin (last tag of a box, or the GPO request) to the GPO write completing, newest '
+		'first, with the duration of each stage. Per-stage histograms are on /metrics as '
+		'decision_stage_seconds.'
+	),
+)
+async def get_slow(flow: str | None = None, limit: int = Query(default=20, ge=1, le=100)):
+	return {'threshold_ms': settings.SLOW_DECISION_MS, 'traces': tracer.get_slow(flow, limit)}
@@ -0,0 +1,24 @@
+import asyncio
+
+from prometheus_client import Gauge
+
+from .heap import HeapProfiler, SnapshotNotFoundError, structure_counts  # noqa: F401
+from .loop_monitor import LoopMonitor
+from .profiler import ProfilerBusyError, SamplingProfiler  # noqa: F401
+from app.core import settings
+from app.services import rfid_manager
+
+loop_monitor = LoopMonitor(
+	interval=settings.LOOP_MONITOR_INTERVAL,
+	stall_threshold=settings.LOOP_STALL_THRESHOLD,
+)
+profiler = SamplingProfiler()
+heap_profiler = HeapProfiler()
+
+# Application gauges on /metrics (evaluated at scrape time)
+Gauge('rfid_tags_in_memory', 'Tags held in the in-memory TagList').set_function(
+	lambda: len(rfid_manager.tags)
+)
+Gauge('asyncio_tasks', 'Tasks alive on the event loop').set_function(
+	lambda: len(asyncio.all_tasks(loop_monitor.loop)) if loop_monitor.loop else 0
+)
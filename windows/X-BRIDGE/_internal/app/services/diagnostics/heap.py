@@ -0,0 +1,278 @@
+import asyncio
+import gc
+import logging
+import os
+import sys
+import tracemalloc
+from collections import Counter, OrderedDict
+from datetime import datetime
+from itertools import count
+
+from prometheus_client import Gauge
+
+GROUP_BY = ('lineno', 'filename', 'traceback', 'type')
+
+# Allocations made by the import system, tracemalloc and the snapshots' own type
+# counts are noise in diffs
+TRACE_FILTERS = (
+	tracemalloc.Filter(False, tracemalloc.__file__),
+	tracemalloc.Filter(False, __file__),
+	tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+	tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+	tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class SnapshotNotFoundError(Exception):
+	"""Raised when a snapshot id is unknown (never taken or already evicted)."""
+
+
+def read_rss() -> float:
+	"""Resident set size of this process in bytes (0 when unavailable)."""
+	try:
+		if sys.platform.startswith('linux'):
+			with open('/proc/self/statm') as f:
+				return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+		if sys.platform == 'win32':
+			import ctypes
+			from ctypes import wintypes
+
+			class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+				_fields_ = [
+					('cb', wintypes.DWORD),
+					('PageFaultCount', wintypes.DWORD),
+					('PeakWorkingSetSize', ctypes.c_size_t),
+					('WorkingSetSize', ctypes.c_size_t),
+					('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+					('QuotaPagedPoolUsage', ctypes.c_size_t),
+					('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+					('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+					('PagefileUsage', ctypes.c_size_t),
+					('PeakPagefileUsage', ctypes.c_size_t),
+				]
+
+			counters = PROCESS_MEMORY_COUNTERS()
+			counters.cb = ctypes.sizeof(counters)
+			handle = ctypes.windll.kernel32.GetCurrentProcess()
+			if ctypes.windll.psapi.GetProcessMemoryInfo(
+				handle, ctypes.byref(counters), counters.cb
+			):
+				return counters.WorkingSetSize
+	except Exception as e:
+		logging.debug(f'[ HEAP ] Unable to read RSS: {e}')
+	return 0
+
+
+def type_counts() -> Counter:
+	"""Live gc-tracked objects per type (module.qualname)."""
+	counts: Counter = Counter()
+	for obj in gc.get_objects():
+		cls = type(obj)
+		counts[f'{cls.__module__}.{cls.__qualname__}'] += 1
+	return counts
+
+
+# [ METRICS ]
+PROCESS_RSS = Gauge('process_rss_bytes', 'Resident set size of the bridge process')
+PROCESS_RSS.set_function(read_rss)
+
+GC_PENDING = Gauge(
+	'python_gc_generation_objects',
+	'Objects counted towards the next collection of each GC generation (gc.get_count)',
+	['generation'],
+)
+for _generation in range(3):
+	GC_PENDING.labels(str(_generation)).set_function(lambda g=_generation: gc.get_count()[g])
+
+TRACED_MEMORY = Gauge(
+	'python_tracemalloc_traced_bytes', 'Memory traced by tracemalloc (0 when not tracing)'
+)
+TRACED_MEMORY.set_function(
+	lambda: tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+)
+
+
+class HeapProfiler:
+	"""
+	tracemalloc control plus numbered snapshots that can be diffed.
+
+	Every snapshot also stores live object counts per type (from gc), so diffs
+	grouped by `type` work even if tracemalloc was never started. Only the last
+	`max_snapshots` are kept since a tracemalloc snapshot holds every traced
+	allocation.
+	"""
+
+	def __init__(self, max_snapshots: int = 8):
+		self.max_snapshots = max_snapshots
+		self._snapshots: OrderedDict[int, dict] = OrderedDict()
+		self._ids = count(1)
+
+	# [ TRACING ]
+	def start(self, frames: int = 25) -> dict:
+		if tracemalloc.is_tracing():
+			tracemalloc.stop()
+		tracemalloc.start(frames)
+		logging.info(f'[ HEAP ] tracemalloc started ({frames} frames)')
+		return self.status()
+
+	def stop(self) -> dict:
+		if tracemalloc.is_tracing():
+			tracemalloc.stop()
+			logging.info('[ HEAP ] tracemalloc stopped')
+		return self.status()
+
+	def status(self) -> dict:
+		tracing = tracemalloc.is_tracing()
+		current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+		return {
+			'tracing': tracing,
+			'frames': tracemalloc.get_traceback_limit() if tracing else 0,
+			'traced_bytes': current,
+			'traced_peak_bytes': peak,
+			'rss_bytes': read_rss(),
+			'gc_count': list(gc.get_count()),
+			'snapshots': [self._summary(s) for s in self._snapshots.values()],
+		}
+
+	# [ SNAPSHOTS ]
+	def take_snapshot(self, label: str | None = None) -> dict:
+		"""Record a snapshot (blocking, walks the whole heap; call via to_thread)."""
+		trace = None
+		if tracemalloc.is_tracing():
+			trace = tracemalloc.take_snapshot().filter_traces(TRACE_FILTERS)
+
+		snapshot = {
+			'id': next(self._ids),
+			'label': label,
+			'taken_at': datetime.now().isoformat(),
+			'rss_bytes': read_rss(),
+			'trace': trace,
+			'types': type_counts(),
+		}
+		self._snapshots[snapshot['id']] = snapshot
+		while len(self._snapshots) > self.max_snapshots:
+			self._snapshots.popitem(last=False)
+		return self._summary(snapshot)
+
+	def delete_snapshot(self, snapshot_id: int) -> None:
+		self._get(snapshot_id)
+		del self._snapshots[snapshot_id]
+
+	def _get(self, snapshot_id: int) -> dict:
+		snapshot = self._snapshots.get(snapshot_id)
+		if snapshot is None:
+			raise SnapshotNotFoundError(f'Snapshot {snapshot_id} not found')
+		return snapshot
+
+	@staticmethod
+	def _summary(snapshot: dict) -> dict:
+		trace = snapshot['trace']
+		return {
+			'id': snapshot['id'],
+			'label': snapshot['label'],
+			'taken_at': snapshot['taken_at'],
+			'rss_bytes': snapshot['rss_bytes'],
+			'traced': trace is not None,
+			'traced_bytes': sum(t.size for t in trace.traces) if trace is not None else None,
+			'objects': sum(snapshot['types'].values()),
+		}
+
+	def top(self, snapshot_id: int, group_by: str = 'lineno', limit: int = 20) -> dict:
+		"""Largest allocation sites (or most common types) in one snapshot."""
+		snapshot = self._get(snapshot_id)
+		if group_by == 'type':
+			stats = [
+				{'type': name, 'count': n} for name, n in snapshot['types'].most_common(limit)
+			]
+		else:
+			trace = self._require_trace(snapshot)
+			stats = [self._stat(s) for s in trace.statistics(group_by)[:limit]]
+		return {**self._summary(snapshot), 'group_by': group_by, 'stats': stats}
+
+	def diff(self, first_id: int, second_id: int, group_by: str = 'lineno', limit: int = 20) -> dict:
+		"""What grew between two snapshots, biggest growth first."""
+		first, second = self._get(first_id), self._get(second_id)
+		if group_by == 'type':
+			types = set(first['types']) | set(second['types'])
+			deltas = [
+				{
+					'type': name,
+					'count': second['types'][name],
+					'count_diff': second['types'][name] - first['types'][name],
+				}
+				for name in types
+				if second['types'][name] != first['types'][name]
+			]
+			deltas.sort(key=lambda d: d['count_diff'], reverse=True)
+			stats = deltas[:limit]
+		else:
+			older, newer = self._require_trace(first), self._require_trace(second)
+			stats = [self._stat(s) for s in newer.compare_to(older, group_by)[:limit]]
+
+		return {
+			'first': self._summary(first),
+			'second': self._summary(second),
+			'rss_diff_bytes': second['rss_bytes'] - first['rss_bytes'],
+			'group_by': group_by,
+			'stats': stats,
+		}
+
+	@staticmethod
+	def _require_trace(snapshot: dict):
+		if snapshot['trace'] is None:
+			raise ValueError(
+				f'Snapshot {snapshot["id"]} has no tracemalloc data; start tracing first or use group_by=type'
+			)
+		return snapshot['trace']
+
+	@staticmethod
+	def _stat(stat) -> dict:
+		result = {
+			'where': [f'{frame.filename}:{frame.lineno}' for frame in stat.traceback],
+			'size_bytes': stat.size,
+			'count': stat.count,
+		}
+		if hasattr(stat, 'size_diff'):
+			result['size_diff_bytes'] = stat.size_diff
+			result['count_diff'] = stat.count_diff
+		return result
+
+
+# [ APPLICATION STRUCTURES ]
+def structure_counts(rfid_manager, tasks: set[asyncio.Task] | None = None) -> dict:
+	"""
+	Sizes of the structures suspected of growing in long-running bridges. Walks every
+	gc-tracked object: run it in a thread, with `tasks` taken on the event loop.
+	"""
+	tasks = tasks or set()
+	by_coro = Counter(
+		getattr(task.get_coro(), '__qualname__', type(task.get_coro()).__name__) for task in tasks
+	)
+
+	integration = rfid_manager.integration
+	db_pool = None
+	engine = getattr(integration.db_manager, '_engine', None)
+	if engine is not None:
+		pool = engine.pool
+		db_pool = {
+			'status': pool.status(),
+			'checked_out': pool.checkedout() if hasattr(pool, 'checkedout') else None,
+		}
+
+	objects = gc.get_objects()
+	http_clients = Counter()
+	for obj in objects:
+		cls = type(obj)
+		if cls.__name__ in ('AsyncClient', 'Client') and str(cls.__module__).startswith('httpx'):
+			http_clients[cls.__name__] += 1
+
+	return {
+		'tags_in_memory': len(rfid_manager.tags),
+		'tasks': len(tasks),
+		'tasks_by_coroutine': dict(by_coro.most_common()),
+		'presence_pending': len(integration.presence),
+		'rollup_pending': len(integration.rollup),
+		'db_pool': db_pool,
+		'http_clients': dict(http_clients),
+		'gc_tracked_objects': len(objects),
+	}
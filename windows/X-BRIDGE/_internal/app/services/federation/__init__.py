@@ -0,0 +1,5 @@
+from ._main import Federation, PeerSubscriber, dumps  # noqa: F401
+from app.core import settings
+from app.services import rfid_manager
+
+federation = Federation(rfid_manager, node_id=settings.NODE_ID, port=settings.PORT)
@@ -0,0 +1,202 @@
+"""
+Federation: a merged tag view across several bridges.
+
+Every bridge serves its own change stream on /api/v1/federation/changes (a
+long poll over the ChangeJournal of its tag list). A bridge with
+FEDERATION_PEERS follows each peer's stream: the first request, a peer restart
+(new epoch) or a gap (the peer forgot tombstones we had not seen yet) returns a
+full snapshot, every other request only the tags changed and removed since the
+last sequence number we applied.
+
+The federated view dedupes by tag identifier across the local node and all
+peers; each tag carries `node` (the node that read it last) and `nodes`
+(every node holding it).
+"""
+
+import asyncio
+import json
+import logging
+import socket
+from collections import deque
+from datetime import datetime
+
+import httpx
+
+from app.services.rfid.tag_list import FastTagList
+
+UNIQUE_IDENTIFIER = 'tid'
+
+
+def _restore(item: dict) -> dict:
+	if isinstance(item.get('timestamp'), str):
+		item['timestamp'] = datetime.fromisoformat(item['timestamp'])
+	return item
+
+
+def dumps(value) -> bytes:
+	return json.dumps(value, default=str, separators=(',', ':')).encode()
+
+
+# [ SUBSCRIBER ]
+class PeerSubscriber:
+	"""Follows one peer's change stream and keeps that peer's tags and events."""
+
+	def __init__(self, url: str, wait: float = 15.0, interval: float = 0.5, max_events: int = 1000):
+		self.url = url.rstrip('/')
+		self.wait = wait
+		self.interval = interval
+		self.node: str | None = None
+		self.epoch: str | None = None
+		self.seq = 0
+		self.tags: dict[str, dict] = {}
+		self.events: deque[dict] = deque(maxlen=max_events)
+		self.state = 'connecting'
+		self.error: str | None = None
+		self.last_sync: datetime | None = None
+		self.resyncs = 0
+		self.deltas = 0
+
+	async def run(self) -> None:
+		backoff = 1
+		async with httpx.AsyncClient(timeout=self.wait + 10) as client:
+			while True:
+				try:
+					response = await client.get(
+						f'{self.url}/api/v1/federation/changes',
+						params={'epoch': self.epoch or '', 'since': self.seq, 'wait': self.wait},
+					)
+					response.raise_for_status()
+					self.apply(response.json())
+					backoff = 1
+					# Lets changes accumulate into the next delta
+					await asyncio.sleep(self.interval)
+				except asyncio.CancelledError:
+					raise
+				except Exception as e:
+					if self.state != 'error':
+						logging.warning(f'[ FEDERATION ] {self.url} unreachable: {e}')
+					self.state = 'error'
+					self.error = str(e)
+					await asyncio.sleep(backoff)
+					backoff = min(backoff * 2, 30)
+
+	def apply(self, data: dict) -> None:
+		if data['resync']:
+			if self.epoch is not None:
+				logging.info(f'[ FEDERATION ] Resync from {self.url} ({data["node"]})')
+			self.tags = {tag[UNIQUE_IDENTIFIER]: _restore(tag) for tag in data['tags']}
+			self.resyncs += 1
+		else:
+			for tag in data['tags']:
+				self.tags[tag[UNIQUE_IDENTIFIER]] = _restore(tag)
+			for uid in data['removed']:
+				self.tags.pop(uid, None)
+			self.deltas += 1
+		self.events.extend(_restore(event) for event in data['events'])
+
+		self.node = data['node']
+		self.epoch = data['epoch']
+		self.seq = data['seq']
+		self.state = 'synced'
+		self.error = None
+		self.last_sync = datetime.now()
+
+	def status(self) -> dict:
+		return {
+			'url': self.url,
+			'node': self.node,
+			'state': self.state,
+			'error': self.error,
+			'epoch': self.epoch,
+			'seq': self.seq,
+			'tags': len(self.tags),
+			'resyncs': self.resyncs,
+			'deltas': self.deltas,
+			'last_sync': self.last_sync.isoformat() if self.last_sync else None,
+		}
+
+
+# [ FEDERATION ]
+class Federation:
+	def __init__(self, rfid_manager, node_id: str | None = None, port: int = 5000):
+		self.rfid_manager = rfid_manager
+		self.node_id = node_id or f'{socket.gethostname()}:{port}'
+		self.peers: list[PeerSubscriber] = []
+
+	# Serving our own stream
+	async def changes(self, epoch: str | None, since: int, wait: float) -> dict:
+		journal = self.rfid_manager.journal
+		tags = self.rfid_manager.tags
+		# Only the local FastTagList is journaled (not the shared store of app.cluster)
+		journaled = isinstance(tags, FastTagList) and tags.journal is journal
+
+		if journaled and not journal.needs_resync(epoch, since):
+			await journal.wait(since, wait)
+			# None when the wait ended on a clear() or on tombstones being forgotten
+			delta = journal.delta(epoch, since)
+			if delta is not None:
+				seq, changed, removed, events = delta
+				return self._response(seq, False, tags.get_many(changed), removed, events)
+
+		# Sequence number first: anything changing during the snapshot is sent again next time
+		seq, _, _, events = journal.changes(since if epoch == journal.epoch else 0)
+		return self._response(seq, True, tags.get_all(), [], events)
+
+	def _response(self, seq: int, resync: bool, tags: list, removed: list, events: list) -> dict:
+		return {
+			'node': self.node_id,
+			'epoch': self.rfid_manager.journal.epoch,
+			'seq': seq,
+			'resync': resync,
+			'tags': tags,
+			'removed': removed,
+			'events': events,
+		}
+
+	# Following peers
+	async def run(self, urls: list[str], wait: float = 15.0, interval: float = 0.5) -> None:
+		self.peers = [PeerSubscriber(url, wait=wait, interval=interval) for url in urls]
+		logging.info(f'[ FEDERATION ] Node {self.node_id} following {len(self.peers)} peers')
+		try:
+			await asyncio.gather(*(peer.run() for peer in self.peers))
+		finally:
+			self.peers = []
+
+	# Merged view
+	def merged_tags(self) -> list[dict]:
+		"""Local and peer tags deduped by identifier; `count` is summed over the nodes."""
+		sources = [(self.node_id, self.rfid_manager.tags.get_all())]
+		sources += [(peer.node or peer.url, list(peer.tags.values())) for peer in self.peers]
+
+		merged: dict[str, dict] = {}
+		for node, tags in sources:
+			for tag in tags:
+				uid = tag.get(UNIQUE_IDENTIFIER)
+				current = merged.get(uid)
+				if current is None:
+					merged[uid] = {**tag, 'node': node, 'nodes': [node]}
+					continue
+				nodes = current['nodes'] + [node]
+				count = (current.get('count') or 0) + (tag.get('count') or 0)
+				if tag['timestamp'] > current['timestamp']:
+					current.update(tag, node=node)
+				current['nodes'] = nodes
+				current['count'] = count
+		return list(merged.values())
+
+	def merged_events(self, limit: int = 100) -> list[dict]:
+		events = [{**event, 'node': self.node_id} for event in self.rfid_manager.journal.changes(0)[3]]
+		for peer in self.peers:
+			events += [{**event, 'node': peer.node or peer.url} for event in peer.events]
+		events.sort(key=lambda event: event['timestamp'], reverse=True)
+		return events[:limit]
+
+	def status(self) -> dict:
+		journal = self.rfid_manager.journal
+		return {
+			'node': self.node_id,
+			'epoch': journal.epoch,
+			'seq': journal.seq,
+			'floor': journal.floor,
+			'peers': [peer.status() for peer in self.peers],
+		}
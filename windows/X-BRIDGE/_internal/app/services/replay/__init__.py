@@ -0,0 +1,4 @@
+from ._main import CaptureReplayer, ReplayBusyError  # noqa: F401
+from app.services import rfid_manager
+
+replayer = CaptureReplayer(rfid_manager=rfid_manager)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+import time
+
+from app.services.rfid.capture import METHODS, capture_info, iter_chunks
+
+# Calls made between two yields to the event loop at max speed
+YIELD_EVERY = 500
+
+
+class ReplayBusyError(Exception):
+	pass
+
+
+class CaptureReplayer:
+	"""
+	Feeds a capture file back through RfidManager's entry points.
+
+	`speed` scales the recorded timing (1 = as captured, 10 = ten times faster);
+	0 replays as fast as the event loop allows. Frames are read and decompressed
+	in a worker thread one at a time, so captures of any size replay in constant
+	memory.
+	"""
+
+	def __init__(self, rfid_manager):
+		self.rfid_manager = rfid_manager
+		self._task: asyncio.Task | None = None
+		self._reset(None, 0.0, 1)
+
+	def _reset(self, path: str | None, speed: float, loops: int):
+		self.path = path
+		self.speed = speed
+		self.loops = loops
+		self.info: dict | None = None
+		self.started_at: float | None = None
+		self.stopped_at: float | None = None
+		self.records = 0
+		self.errors = 0
+		self.max_lag_s = 0.0
+		self.position_s = 0.0
+		self.loop_index = 0
+		self.error: str | None = None
+
+	@property
+	def running(self) -> bool:
+		return self._task is not None and not self._task.done()
+
+	# [ CONTROL ]
+	async def start(self, path: str, speed: float = 1.0, loops: int = 1) -> dict:
+		if self.running:
+			raise ReplayBusyError(f'Already replaying {os.path.basename(self.path)}')
+		if speed < 0:
+			raise ValueError('speed must be >= 0')
+		info = await asyncio.to_thread(capture_info, path)
+		self._reset(path, speed, max(1, loops))
+		self.info = info
+		self._task = asyncio.create_task(self._run())
+		logging.info(
+			f"[ REPLAY ] {info['file']}: {info['records']} records at "
+			f"{'max speed' if speed == 0 else f'{speed}x'}"
+		)
+		return self.status()
+
+	async def stop(self) -> dict:
+		if self.running:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			logging.info(f'[ REPLAY ] Stopped after {self.records} records')
+		return self.status()
+
+	async def wait(self) -> dict:
+		"""Wait for the current replay to finish."""
+		if self._task is not None:
+			await asyncio.gather(self._task, return_exceptions=True)
+		return self.status()
+
+	# [ REPLAY ]
+	async def _run(self):
+		loop = asyncio.get_running_loop()
+		handlers = {method: getattr(self.rfid_manager, method) for method in METHODS}
+		self.started_at = time.time()
+		try:
+			for self.loop_index in range(self.loops):
+				base = loop.time()
+				chunks = iter_chunks(self.path)
+				while True:
+					chunk = await asyncio.to_thread(next, chunks, None)
+					if chunk is None:
+						break
+					for i, (t, method, kwargs) in enumerate(chunk):
+						if self.speed:
+							delay = base + t / self.speed - loop.time()
+							if delay > 0:
+								await asyncio.sleep(delay)
+							elif -delay > self.max_lag_s:
+								self.max_lag_s = -delay
+						elif i % YIELD_EVERY == YIELD_EVERY - 1:
+							await asyncio.sleep(0)
+
+						handler = handlers.get(method)
+						try:
+							handler(**kwargs)
+						except Exception as e:
+							self.errors += 1
+							if self.errors <= 10:
+								logging.error(f'[ REPLAY ] {method} failed: {e}')
+						self.records += 1
+						self.position_s = t
+		except asyncio.CancelledError:
+			raise
+		except Exception as e:
+			self.error = str(e)
+			logging.error(f'[ REPLAY ] Aborted: {e}')
+		finally:
+			self.stopped_at = time.time()
+
+	# [ STATUS ]
+	def status(self) -> dict:
+		elapsed = 0.0
+		if self.started_at is not None:
+			elapsed = (self.stopped_at or time.time()) - self.started_at
+		return {
+			'running': self.running,
+			'file': os.path.basename(self.path) if self.path else None,
+			'speed': self.speed,
+			'loops': self.loops,
+			'loop': self.loop_index + 1 if self.path else 0,
+			'capture': self.info,
+			'elapsed_s': round(elapsed, 3),
+			'position_s': round(self.position_s, 3),
+			'records': self.records,
+			'records_per_s': round(self.records / elapsed, 1) if elapsed > 0 else 0.0,
+			'errors': self.errors,
+			'max_lag_ms': round(self.max_lag_s * 1000, 1),
+			'error': self.error,
+		}
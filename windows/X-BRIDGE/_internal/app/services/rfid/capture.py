@@ -0,0 +1,265 @@
+"""
+Raw read capture: every input reaching RfidManager.on_event, on_tag, on_tags
+and handle_r700_event, appended to a compressed file that the replayer can feed
+back through the same entry points.
+
+File layout:
+
+    b'XBCAP1\\n'
+    <header JSON>\\n
+    frame*
+
+Each frame is a little-endian (compressed length, record count, crc32, t of
+its last record) header followed by a zlib block of newline separated JSON records
+`[t, method, kwargs]`, where t is seconds since the capture started (monotonic
+clock). Frames are self-contained, so a capture cut short by a crash or power
+loss is readable up to its last complete frame.
+"""
+
+import json
+import logging
+import os
+import socket
+import struct
+import time
+import zlib
+from datetime import datetime
+from functools import wraps
+from typing import Iterator
+
+MAGIC = b'XBCAP1\n'
+FRAME = struct.Struct('<IIId')
+EXTENSION = '.xbcap'
+
+# Entry points that are recorded and may be replayed
+METHODS = ('on_event', 'on_tag', 'on_tags', 'handle_r700_event')
+
+
+class CaptureError(Exception):
+	pass
+
+
+# [ FILE FORMAT ]
+class CaptureWriter:
+	"""Append-only writer; records are buffered and written one frame per `chunk_records`."""
+
+	def __init__(self, path: str, header: dict, chunk_records: int = 2000, level: int = 1):
+		self.path = path
+		self.chunk_records = chunk_records
+		self.level = level
+		self.records = 0
+		self.frames = 0
+		self._buffer: list[str] = []
+		self._last_t = 0.0
+		self._file = open(path, 'xb')
+		self._file.write(MAGIC + json.dumps(header).encode() + b'\n')
+		self._file.flush()
+		self.bytes_written = self._file.tell()
+
+	def write(self, t: float, method: str, kwargs: dict) -> None:
+		self._buffer.append(json.dumps([round(t, 6), method, kwargs], default=str))
+		self._last_t = t
+		self.records += 1
+		if len(self._buffer) >= self.chunk_records:
+			self.flush()
+
+	def flush(self) -> None:
+		if not self._buffer or self._file is None:
+			return
+		data = zlib.compress('\n'.join(self._buffer).encode(), self.level)
+		self._file.write(FRAME.pack(len(data), len(self._buffer), zlib.crc32(data), self._last_t) + data)
+		self._file.flush()
+		self.bytes_written += FRAME.size + len(data)
+		self.frames += 1
+		self._buffer.clear()
+
+	def close(self) -> None:
+		if self._file is None:
+			return
+		try:
+			self.flush()
+		finally:
+			# A failed flush must not keep the buffer or the file around
+			file, self._file = self._file, None
+			self._buffer.clear()
+			file.close()
+
+
+def read_header(path: str) -> dict:
+	with open(path, 'rb') as f:
+		return _read_header(f)
+
+
+def _read_header(f) -> dict:
+	if f.read(len(MAGIC)) != MAGIC:
+		raise CaptureError(f'{os.path.basename(f.name)} is not a capture file')
+	return json.loads(f.readline())
+
+
+def iter_chunks(path: str) -> Iterator[list]:
+	"""
+	Yield the records of each frame as lists of [t, method, kwargs].
+
+	Stops silently at a truncated or corrupt trailing frame.
+	"""
+	with open(path, 'rb') as f:
+		_read_header(f)
+		while True:
+			head = f.read(FRAME.size)
+			if len(head) < FRAME.size:
+				return
+			length, count, crc, _ = FRAME.unpack(head)
+			data = f.read(length)
+			if len(data) < length or zlib.crc32(data) != crc:
+				logging.warning(f'[ CAPTURE ] {os.path.basename(path)}: stopping at damaged frame')
+				return
+			yield [json.loads(line) for line in zlib.decompress(data).split(b'\n')]
+
+
+def capture_info(path: str) -> dict:
+	"""Header plus record counts of a capture, reading only the frame headers."""
+	records = frames = 0
+	duration = 0.0
+	size = os.path.getsize(path)
+	with open(path, 'rb') as f:
+		header = _read_header(f)
+		while True:
+			head = f.read(FRAME.size)
+			if len(head) < FRAME.size:
+				break
+			length, count, _, last_t = FRAME.unpack(head)
+			if f.tell() + length > size:
+				break
+			f.seek(length, os.SEEK_CUR)
+			records += count
+			frames += 1
+			duration = last_t
+	return {
+		'file': os.path.basename(path),
+		'size_bytes': size,
+		'records': records,
+		'frames': frames,
+		'duration_s': round(duration, 3),
+		**header,
+	}
+
+
+# [ RECORDER ]
+class ReadRecorder:
+	"""
+	Records RfidManager inputs while a capture is active.
+
+	Only the outermost entry point of a call is written: handle_r700_event calls
+	on_tag/on_event internally and on_event forwards tags to on_tag, and replaying
+	the outer call reproduces the inner ones.
+	"""
+
+	def __init__(self):
+		self.writer: CaptureWriter | None = None
+		self.depth = 0
+		self.max_bytes: int | None = None
+		self._start = 0.0
+		self._started_at: str | None = None
+		self._counts: dict[str, int] = {}
+
+	@property
+	def active(self) -> bool:
+		return self.writer is not None
+
+	def start(self, directory: str, name: str | None = None, max_mb: float | None = None) -> dict:
+		if self.active:
+			raise CaptureError(f'Capture already running: {os.path.basename(self.writer.path)}')
+		os.makedirs(directory, exist_ok=True)
+		name = os.path.basename(name or datetime.now().strftime('capture_%Y%m%d_%H%M%S'))
+		if not name.endswith(EXTENSION):
+			name += EXTENSION
+		path = os.path.join(directory, name)
+		if os.path.exists(path):
+			raise CaptureError(f'Capture {name} already exists')
+
+		self._started_at = datetime.now().isoformat()
+		header = {'version': 1, 'started_at': self._started_at, 'host': socket.gethostname()}
+		self.writer = CaptureWriter(path, header)
+		self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+		self._counts = {method: 0 for method in METHODS}
+		self._start = time.monotonic()
+		logging.info(f'[ CAPTURE ] Recording to {path}')
+		return self.status()
+
+	def stop(self) -> dict:
+		if not self.active:
+			return self.status()
+		writer = self.writer
+		try:
+			writer.close()
+		finally:
+			status = self.status()
+			self.writer = None
+		logging.info(f'[ CAPTURE ] Stopped {os.path.basename(writer.path)}: {writer.records} records')
+		status['recording'] = False
+		return status
+
+	def _abort(self) -> None:
+		# Never lets a disk error reach the RFID entry point being recorded
+		try:
+			self.stop()
+		except Exception as e:
+			logging.error(f'[ CAPTURE ] Could not close the capture file: {e}')
+
+	def record(self, method: str, kwargs: dict) -> None:
+		try:
+			self.writer.write(time.monotonic() - self._start, method, kwargs)
+		except Exception as e:
+			logging.error(f'[ CAPTURE ] Write failed, stopping capture: {e}')
+			self._abort()
+			return
+		self._counts[method] += 1
+		if self.max_bytes is not None and self.writer.bytes_written >= self.max_bytes:
+			logging.warning('[ CAPTURE ] Size limit reached')
+			self._abort()
+
+	def flush(self) -> None:
+		if not self.active:
+			return
+		try:
+			self.writer.flush()
+		except Exception as e:
+			logging.error(f'[ CAPTURE ] Write failed, stopping capture: {e}')
+			self._abort()
+
+	def status(self) -> dict:
+		if not self.active:
+			return {'recording': False}
+		return {
+			'recording': True,
+			'file': os.path.basename(self.writer.path),
+			'started_at': self._started_at,
+			'elapsed_s': round(time.monotonic() - self._start, 1),
+			'records': self.writer.records,
+			'by_method': dict(self._counts),
+			'bytes_written': self.writer.bytes_written,
+			'max_bytes': self.max_bytes,
+		}
+
+
+def captured(func):
+	"""Record calls to an RfidManager entry point in `self.recorder` while it is active."""
+	code = func.__code__
+	names = code.co_varnames[1 : code.co_argcount]
+	method = func.__name__
+
+	@wraps(func)
+	def wrapper(self, *args, **kwargs):
+		recorder = self.recorder
+		if recorder.writer is None or recorder.depth:
+			return func(self, *args, **kwargs)
+		if args:
+			kwargs.update(zip(names, args))
+		recorder.record(method, kwargs)
+		recorder.depth += 1
+		try:
+			return func(self, **kwargs)
+		finally:
+			recorder.depth -= 1
+
+	return wrapper
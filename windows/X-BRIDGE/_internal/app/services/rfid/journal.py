@@ -0,0 +1,142 @@
+"""
+Change journal of the local tag list, read by federation peers.
+
+Every change gets the next sequence number. Per tag only the last change is
+kept (an OrderedDict in sequence order), so a peer asking for `since=N` gets
+each tag that changed after N once, however many reads it had. Removals are
+kept as a bounded list of tombstones; once one is forgotten, or after clear(),
+`floor` moves up and peers that are further behind must resync from a snapshot.
+
+`epoch` is new on every start, so a peer also resyncs after this bridge restarts.
+"""
+
+import asyncio
+import threading
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+
+
+class ChangeJournal:
+	def __init__(self, max_tombstones: int = 20000, max_events: int = 1000):
+		self.epoch = uuid.uuid4().hex[:12]
+		self.seq = 0
+		self.floor = 0
+		self.max_tombstones = max_tombstones
+		self._changed: OrderedDict[str, int] = OrderedDict()
+		self._removed: OrderedDict[str, int] = OrderedDict()
+		self._events: deque[dict] = deque(maxlen=max_events)
+		self._lock = threading.Lock()
+		self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+	# [ WRITE ]
+	def touch(self, uid: str) -> None:
+		with self._lock:
+			self.seq += 1
+			self._changed[uid] = self.seq
+			self._changed.move_to_end(uid)
+			self._removed.pop(uid, None)
+		self._notify()
+
+	def remove(self, uids) -> None:
+		with self._lock:
+			for uid in uids:
+				self.seq += 1
+				self._changed.pop(uid, None)
+				self._removed[uid] = self.seq
+				self._removed.move_to_end(uid)
+			while len(self._removed) > self.max_tombstones:
+				_, seq = self._removed.popitem(last=False)
+				self.floor = max(self.floor, seq)
+		self._notify()
+
+	def reset(self) -> None:
+		"""Everything was removed: peers behind this point resync."""
+		with self._lock:
+			self.seq += 1
+			self.floor = self.seq
+			self._changed.clear()
+			self._removed.clear()
+		self._notify()
+
+	def event(self, device: str, event_type: str, event_data) -> None:
+		with self._lock:
+			self.seq += 1
+			self._events.append(
+				{
+					'seq': self.seq,
+					'timestamp': datetime.now(),
+					'device': device,
+					'event_type': event_type,
+					'event_data': event_data,
+				}
+			)
+		self._notify()
+
+	# [ READ ]
+	def needs_resync(self, epoch: str | None, since: int) -> bool:
+		return epoch != self.epoch or since < self.floor or since > self.seq
+
+	def changes(self, since: int) -> tuple[int, list[str], list[str], list[dict]]:
+		"""(seq, changed uids, removed uids, events) after `since`, oldest first."""
+		with self._lock:
+			return self._changes(since)
+
+	def delta(self, epoch: str | None, since: int) -> tuple[int, list[str], list[str], list[dict]] | None:
+		"""changes() for a peer at (epoch, since), or None when that peer must resync."""
+		with self._lock:
+			return None if self.needs_resync(epoch, since) else self._changes(since)
+
+	def _changes(self, since: int) -> tuple[int, list[str], list[str], list[dict]]:
+		return (
+			self.seq,
+			self._tail(self._changed, since),
+			self._tail(self._removed, since),
+			[event for event in self._events if event['seq'] > since],
+		)
+
+	@staticmethod
+	def _tail(entries: OrderedDict[str, int], since: int) -> list[str]:
+		# Values grow along the dict, so walk back from the newest entry
+		uids = []
+		for uid in reversed(entries):
+			if entries[uid] <= since:
+				break
+			uids.append(uid)
+		uids.reverse()
+		return uids
+
+	# [ LONG POLL ]
+	async def wait(self, since: int, timeout: float) -> None:
+		"""Return as soon as there is a change after `since`, or after `timeout`."""
+		if timeout <= 0:
+			return
+		loop = asyncio.get_running_loop()
+		future = loop.create_future()
+		with self._lock:
+			if self.seq > since:
+				return
+			self._waiters.append((loop, future))
+		try:
+			await asyncio.wait_for(future, timeout)
+		except asyncio.TimeoutError:
+			pass
+		finally:
+			with self._lock:
+				if (loop, future) in self._waiters:
+					self._waiters.remove((loop, future))
+
+	def _notify(self) -> None:
+		# Waiters are woken once and re-register on their next poll, so busy
+		# periods cost one wake-up per poll, not per read
+		if not self._waiters:
+			return
+		with self._lock:
+			waiters, self._waiters = self._waiters, []
+		for loop, future in waiters:
+			loop.call_soon_threadsafe(_wake, future)
+
+
+def _wake(future: asyncio.Future) -> None:
+	if not future.done():
+		future.set_result(None)
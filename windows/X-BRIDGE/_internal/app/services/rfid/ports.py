@@ -0,0 +1,157 @@
+"""
+Port resolution for serial readers configured with `PORT: "AUTO"`.
+
+Left to themselves the readers enumerate every serial port on the event loop
+(slow on boxes with many USB devices) on each reconnect and take the first
+VID/PID match, so two identical readers fight over one port. The supervisor
+resolves the port here instead and hands the reader a fixed one:
+
+    1. the last port this device connected on, while it is still plugged in
+       (checked against a cheap listing of the port names, no enumeration)
+    2. otherwise an enumeration filtered by VID/PID, skipping ports held by
+       other readers; with several candidates they are probed in parallel
+       (opened and closed) with a bounded timeout and the first free one wins
+
+A change in the port name listing (hotplug) drops the enumeration and every
+cached port that disappeared. Resolved ports are stored in a JSON file so they
+survive restarts.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+import serial
+import serial.tools.list_ports
+from prometheus_client import Histogram
+
+PORT_RESOLVE = Histogram(
+	'serial_port_resolve_seconds',
+	'Time to resolve an AUTO serial port, by source (cache, scan, probe, missing)',
+	['source'],
+	buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def port_signature() -> frozenset[str] | None:
+	"""Names of the serial ports present, without enumerating their USB details."""
+	try:
+		if sys.platform == 'win32':
+			import winreg
+
+			names = set()
+			with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r'HARDWARE\DEVICEMAP\SERIALCOMM') as key:
+				for i in range(winreg.QueryInfoKey(key)[1]):
+					names.add(winreg.EnumValue(key, i)[1])
+			return frozenset(names)
+		patterns = ('/dev/ttyUSB*', '/dev/ttyACM*', '/dev/tty.usb*', '/dev/cu.usb*')
+		return frozenset(path for pattern in patterns for path in glob.glob(pattern))
+	except Exception as e:
+		logging.debug(f'[ PORTS ] Port listing unavailable: {e}')
+		return None
+
+
+def _probe(port: str, baudrate: int) -> bool:
+	try:
+		# exclusive: on POSIX a port held by another process would open anyway
+		serial.Serial(port, baudrate=baudrate, timeout=0, exclusive=os.name == 'posix' or None).close()
+		return True
+	except Exception:
+		return False
+
+
+class PortResolver:
+	def __init__(self, cache_path: str, probe_timeout: float = 2.0):
+		self.cache_path = cache_path
+		self.probe_timeout = probe_timeout
+		self.cache: dict[str, dict] = self._load()
+		self._signature: frozenset[str] | None = None
+		self._ports: list | None = None
+
+	def _load(self) -> dict:
+		try:
+			with open(self.cache_path, 'r', encoding='utf-8') as f:
+				return json.load(f)
+		except FileNotFoundError:
+			return {}
+		except Exception as e:
+			logging.warning(f'[ PORTS ] Ignoring port cache {self.cache_path}: {e}')
+			return {}
+
+	def _save(self) -> None:
+		try:
+			os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+			with open(self.cache_path, 'w', encoding='utf-8') as f:
+				json.dump(self.cache, f, indent=4)
+		except Exception as e:
+			logging.warning(f'[ PORTS ] Could not save port cache: {e}')
+
+	async def resolve(
+		self, name: str, vid: int, pid: int, baudrate: int, exclude: set[str] = frozenset()
+	) -> str | None:
+		started = time.perf_counter()
+		port, source = await self._resolve(name, vid, pid, baudrate, exclude)
+		PORT_RESOLVE.labels(source).observe(time.perf_counter() - started)
+		if port is not None:
+			logging.info(f'[ PORTS ] {name}: {port} ({source}, {(time.perf_counter() - started) * 1000:.1f} ms)')
+		return port
+
+	async def _resolve(self, name, vid, pid, baudrate, exclude) -> tuple[str | None, str]:
+		signature = await asyncio.to_thread(port_signature)
+		if signature != self._signature:
+			self._on_hotplug(signature)
+
+		cached = self.cache.get(name)
+		if (
+			cached is not None
+			and (cached['vid'], cached['pid']) == (vid, pid)
+			and cached['port'] not in exclude
+			and (signature is None or cached['port'] in signature)
+		):
+			return cached['port'], 'cache'
+
+		if self._ports is None:
+			self._ports = await asyncio.to_thread(serial.tools.list_ports.comports)
+		candidates = [p.device for p in self._ports if p.vid == vid and p.pid == pid and p.device not in exclude]
+		if not candidates:
+			return None, 'missing'
+		if len(candidates) == 1:
+			return candidates[0], 'scan'
+
+		# Several identical readers: the ports another process already holds fail to open
+		probes = [
+			asyncio.wait_for(asyncio.to_thread(_probe, port, baudrate), self.probe_timeout)
+			for port in candidates
+		]
+		results = await asyncio.gather(*probes, return_exceptions=True)
+		free = [port for port, ok in zip(candidates, results) if ok is True]
+		return (free[0], 'probe') if free else (None, 'missing')
+
+	def _on_hotplug(self, signature: frozenset[str] | None) -> None:
+		if self._signature is not None:
+			logging.info('[ PORTS ] Serial ports changed, dropping cached enumeration')
+		self._signature = signature
+		self._ports = None
+		if signature is None:
+			return
+		gone = [name for name, entry in self.cache.items() if entry['port'] not in signature]
+		for name in gone:
+			del self.cache[name]
+		if gone:
+			self._save()
+
+	def remember(self, name: str, port: str, vid: int, pid: int) -> None:
+		entry = {'port': port, 'vid': vid, 'pid': pid}
+		if self.cache.get(name) != entry:
+			self.cache[name] = entry
+			self._save()
+
+	def forget(self, name: str) -> None:
+		# The port did not give a connection: enumerate again next time
+		self._ports = None
+		if self.cache.pop(name, None) is not None:
+			self._save()
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict
+
+from sqlalchemy import func, select
+
+from app.db import upsert_rows
+from app.models import TagPresence
+
+UPDATE_COLUMNS = ('epc', 'tid', 'device', 'ant', 'rssi', 'last_seen')
+
+
+class TagPresenceTracker:
+	"""
+	Buffers tag reads and flushes them into the `tag_presence` table.
+
+	`record()` is called for every read from the ingest path and only merges the
+	read into an in-memory dict keyed by TID/EPC, so the cost per read is O(1)
+	and the database sees one upsert row per tag per flush, not one per read.
+	"""
+
+	def __init__(self):
+		self._pending: Dict[str, Dict[str, Any]] = {}
+		self._lock = Lock()
+
+	def __len__(self) -> int:
+		return len(self._pending)
+
+	def record(self, tag: dict) -> None:
+		"""Merge a stored tag (as returned by TagList.add) into the pending batch."""
+		key = tag.get('tid') or tag.get('epc')
+		if key is None:
+			return
+		seen = tag.get('timestamp') or datetime.now()
+
+		with self._lock:
+			row = self._pending.get(key)
+			if row is None:
+				self._pending[key] = {
+					'tag_key': key,
+					'epc': tag.get('epc'),
+					'tid': tag.get('tid'),
+					'device': tag.get('device'),
+					'ant': tag.get('ant'),
+					'rssi': tag.get('rssi'),
+					'first_seen': seen,
+					'last_seen': seen,
+					'read_count': 1,
+				}
+				return
+			row['epc'] = tag.get('epc')
+			row['device'] = tag.get('device')
+			row['ant'] = tag.get('ant')
+			row['rssi'] = tag.get('rssi')
+			row['last_seen'] = seen
+			row['read_count'] += 1
+
+	def _take(self) -> list[dict]:
+		with self._lock:
+			rows = list(self._pending.values())
+			self._pending = {}
+		return rows
+
+	def _restore(self, rows: list[dict]) -> None:
+		"""Put a failed batch back so the reads are retried on the next flush."""
+		with self._lock:
+			for row in rows:
+				current = self._pending.get(row['tag_key'])
+				if current is None:
+					self._pending[row['tag_key']] = row
+				else:
+					current['first_seen'] = row['first_seen']
+					current['read_count'] += row['read_count']
+
+	async def flush(self, db_manager, is_async: bool) -> int:
+		"""Upsert all pending rows. Returns the number of tags written."""
+		rows = self._take()
+		if not rows:
+			return 0
+
+		try:
+			if is_async:
+				async with db_manager.get_session() as session:
+					await session.run_sync(self._upsert, rows)
+			else:
+				await asyncio.to_thread(self._upsert_sync, db_manager, rows)
+		except Exception as e:
+			logging.error(f'[ PRESENCE ] Error flushing {len(rows)} tags: {e}')
+			self._restore(rows)
+			return 0
+
+		logging.debug(f'[ PRESENCE ] Flushed {len(rows)} tags')
+		return len(rows)
+
+	@staticmethod
+	def _upsert(session, rows: list[dict]) -> int:
+		return upsert_rows(
+			session,
+			TagPresence,
+			rows,
+			conflict_columns=('tag_key',),
+			update_columns=UPDATE_COLUMNS,
+			increment_columns=('read_count',),
+		)
+
+	def _upsert_sync(self, db_manager, rows: list[dict]) -> int:
+		with db_manager.get_session() as session:
+			return self._upsert(session, rows)
+
+	# [ QUERIES ]
+	@staticmethod
+	def build_query(
+		device: str | None = None,
+		ant: int | None = None,
+		seen_since: datetime | None = None,
+	):
+		query = select(TagPresence)
+		if device is not None:
+			query = query.where(TagPresence.device == device)
+		if ant is not None:
+			query = query.where(TagPresence.ant == ant)
+		if seen_since is not None:
+			query = query.where(TagPresence.last_seen >= seen_since)
+		return query
+
+	@staticmethod
+	def run_query(session, query, limit: int, offset: int) -> dict:
+		"""Count and page a presence query on a sync session."""
+		total = session.scalar(select(func.count()).select_from(query.subquery()))
+		records = session.scalars(
+			query.order_by(TagPresence.last_seen.desc()).limit(limit).offset(offset)
+		)
+		return {
+			'total': total,
+			'limit': limit,
+			'offset': offset,
+			'has_more': (offset + limit) < total,
+			'data': [record.to_dict() for record in records],
+		}
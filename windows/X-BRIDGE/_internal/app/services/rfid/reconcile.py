@@ -0,0 +1,201 @@
+"""
+Per-device reconcile of the device JSON files.
+
+DeviceManager only knows how to (re)connect every device at once. The
+reconciler remembers the configuration each device was started with and, when
+the files under DEVICES_PATH change, only touches the devices whose file
+changed:
+
+    added      the device is created and connected
+    removed    the device is disconnected and dropped
+    updated    reading parameters are sent to the running reader when its type
+               supports it (see LIVE_SETTINGS), otherwise only that device is
+               restarted
+
+Every other reader keeps its connection and inventory.
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+from smartx_rfid.devices import DeviceManager
+
+from .supervisor import DeviceSupervisor
+
+
+async def _apply_r700(device) -> None:
+	# The reading config is sent with every inventory start: restart the profile
+	if not device.is_connected or device._session is None:
+		return
+	async with device._command_lock:
+		await device._stop_inventory(device._session)
+		if device.start_reading or device.is_gpi_trigger_on:
+			await device._start_inventory(device._session)
+	if device.is_reading != device.start_reading:
+		device.is_reading = device.start_reading
+		device.on_event(device.name, 'reading', device.start_reading)
+
+
+async def _apply_x714(device) -> None:
+	if device.is_connected:
+		device.config_reader()
+
+
+# reader type -> (config keys that can change live, attributes copied from a device
+# built with the new config, coroutine pushing them to the connected reader)
+LIVE_SETTINGS = {
+	'R700_IOT': (
+		{
+			'reading_config', 'session', 'active_ant', 'read_power', 'read_rssi', 'gpi_start',
+			'start_reading', 'protected_inventory_active', 'protected_inventory_password',
+		},
+		(
+			'reading_config', 'start_reading', 'is_gpi_trigger_on',
+			'is_protected_inventory_active', 'protected_inventory_password',
+		),
+		_apply_r700,
+	),
+	'X714': (
+		{
+			'buzzer', 'session', 'start_reading', 'gpi_start', 'always_send', 'simple_send', 'keyboard',
+			'decode_gtin', 'hotspot', 'prefix', 'protected_inventory_active',
+			'protected_inventory_password', 'ant_dict', 'active_ant', 'read_power', 'read_rssi',
+		},
+		(
+			'buzzer', 'session', 'start_reading', 'gpi_start', 'is_gpi_trigger_on', 'always_send',
+			'simple_send', 'keyboard', 'decode_gtin', 'hotspot', 'prefix', 'protected_inventory_active',
+			'protected_inventory_password', 'ant_dict',
+		),
+		_apply_x714,
+	),
+}
+
+
+class DeviceReconciler:
+	def __init__(self, devices: DeviceManager, supervisor: DeviceSupervisor, devices_path: str):
+		self.devices = devices
+		self.supervisor = supervisor
+		self.devices_path = devices_path
+		# Configuration (lower-cased keys) each known device file was applied with
+		self.configs: dict[str, dict] = {}
+		self._lock = asyncio.Lock()
+		self._ready = False
+
+	def read_configs(self) -> dict[str, dict]:
+		"""Device files as DeviceManager.load_devices reads them (invalid ones skipped)."""
+		configs = {}
+		if not os.path.isdir(self.devices_path):
+			return configs
+		for filename in sorted(os.listdir(self.devices_path)):
+			if not filename.endswith('.json'):
+				continue
+			try:
+				with open(os.path.join(self.devices_path, filename), 'r', encoding='utf-8') as f:
+					data = {k.lower(): v for k, v in json.load(f).items()}
+			except Exception as e:
+				logging.error(f'[ DEVICES ] Skipping {filename}: {e}')
+				continue
+			if data.get('reader') is not None:
+				configs[filename[: -len('.json')]] = data
+		return configs
+
+	async def connect_all(self) -> None:
+		"""Load every device file and connect them all; the baseline later reconciles diff against."""
+		async with self._lock:
+			await self.supervisor.stop_all()
+			await self.devices.disconnect_devices()
+			self.devices.load_devices()
+			self.configs = self.read_configs()
+			for device in self.devices.devices:
+				self.supervisor.start(device)
+			self._ready = True
+
+	async def reconcile(self) -> dict:
+		"""Bring the running devices in line with the device files; returns what changed."""
+		result = {'added': [], 'removed': [], 'updated': [], 'restarted': []}
+		if not self._ready:
+			# Devices are not connected yet (startup or a non-primary ingest worker)
+			return result
+
+		async with self._lock:
+			configs = self.read_configs()
+			for name in self.configs.keys() - configs.keys():
+				await self._stop(name)
+				result['removed'].append(name)
+			for name in configs.keys() - self.configs.keys():
+				self._start(name, configs[name])
+				result['added'].append(name)
+			for name in configs.keys() & self.configs.keys():
+				old, new = self.configs[name], configs[name]
+				if old == new:
+					continue
+				if await self._apply_live(name, old, new):
+					result['updated'].append(name)
+				else:
+					await self._stop(name)
+					self._start(name, new)
+					result['restarted'].append(name)
+			self.configs = configs
+
+		if any(result.values()):
+			logging.info(
+				'[ DEVICES ] Reconciled: '
+				+ ', '.join(f'{action} {names}' for action, names in result.items() if names)
+			)
+		return result
+
+	# [ PER DEVICE ]
+	def _find(self, name: str):
+		return next((device for device in self.devices.devices if device.name == name), None)
+
+	def _start(self, name: str, data: dict) -> None:
+		before = len(self.devices.devices)
+		self.devices.add_device(name, data.get('reader', 'UNKNOWN'), data)
+		if len(self.devices.devices) == before:
+			return  # unknown reader type, already logged
+		device = self.devices.devices[-1]
+		if self.devices._event_func is not None:
+			device.on_event = self.devices._event_func
+		self.supervisor.start(device)
+
+	async def _stop(self, name: str) -> None:
+		device = self._find(name)
+		# Cancelling the connect task closes the device connection
+		await self.supervisor.stop(name)
+		if device is None:
+			return
+		try:
+			device.cancel_all()
+			await device.shutdown()
+		except Exception as e:
+			logging.warning(f'[ DEVICES ] Error stopping {name}: {e}')
+		self.devices.devices.remove(device)
+		logging.info(f'[ DEVICES ] Stopped device: {name}')
+
+	async def _apply_live(self, name: str, old: dict, new: dict) -> bool:
+		reader = str(new.get('reader', '')).upper()
+		device = self._find(name)
+		if device is None or reader != str(old.get('reader', '')).upper() or reader not in LIVE_SETTINGS:
+			return False
+		live_keys, attributes, apply = LIVE_SETTINGS[reader]
+		changed = {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+		if not changed <= live_keys:
+			return False
+
+		# Built with the new config only to reuse the reader's own validation and defaults
+		before = len(self.devices.devices)
+		self.devices.add_device(name, reader, new)
+		if len(self.devices.devices) == before:
+			return False
+		candidate = self.devices.devices.pop()
+		for attribute in attributes:
+			setattr(device, attribute, getattr(candidate, attribute))
+		try:
+			await apply(device)
+		except Exception as e:
+			logging.warning(f'[ DEVICES ] Could not apply {sorted(changed)} to {name} live: {e}')
+			return False
+		logging.info(f'[ DEVICES ] Applied {sorted(changed)} to {name} without reconnecting')
+		return True
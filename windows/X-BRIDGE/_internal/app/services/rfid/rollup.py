@@ -0,0 +1,204 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, Tuple
+
+from sqlalchemy import delete, func, select
+
+from app.db import upsert_rows
+from app.models import ReadRollupHour, ReadRollupMinute
+
+# (minute bucket, device, ant, gtin)
+RollupKey = Tuple[datetime, str, int, str]
+
+RESOLUTIONS = {'minute': ReadRollupMinute, 'hour': ReadRollupHour}
+GROUP_COLUMNS = ('device', 'ant', 'gtin')
+
+
+class ReadRollupCounter:
+	"""
+	In-memory read counters flushed into the read_rollup_minute/hour tables.
+
+	`record()` is called from RfidManager.on_tag for every read and only bumps a
+	counter; `flush()` turns the counters into one upsert per table, so dashboards
+	read pre-aggregated rows regardless of how large `tags` grows.
+	"""
+
+	def __init__(self):
+		# key -> [read_count, new_tag_count]
+		self._counters: Dict[RollupKey, list[int]] = {}
+		self._lock = Lock()
+
+	def __len__(self) -> int:
+		return len(self._counters)
+
+	def record(self, tag: dict, new_tag: bool) -> None:
+		seen = tag.get('timestamp') or datetime.now()
+		key = (
+			seen.replace(second=0, microsecond=0),
+			tag.get('device') or 'Unknown',
+			tag.get('ant') or 0,
+			tag.get('gtin') or 'UNKNOWN',
+		)
+		with self._lock:
+			counter = self._counters.get(key)
+			if counter is None:
+				self._counters[key] = [1, 1 if new_tag else 0]
+			else:
+				counter[0] += 1
+				if new_tag:
+					counter[1] += 1
+
+	def _take(self) -> Dict[RollupKey, list[int]]:
+		with self._lock:
+			counters = self._counters
+			self._counters = {}
+		return counters
+
+	def _restore(self, counters: Dict[RollupKey, list[int]]) -> None:
+		with self._lock:
+			for key, (reads, new_tags) in counters.items():
+				current = self._counters.setdefault(key, [0, 0])
+				current[0] += reads
+				current[1] += new_tags
+
+	@staticmethod
+	def _rows(counters: Dict[RollupKey, list[int]]) -> tuple[list[dict], list[dict]]:
+		"""Build minute rows and the same counts re-bucketed by hour."""
+		minute_rows = []
+		hours: Dict[RollupKey, list[int]] = {}
+		for (bucket, device, ant, gtin), (reads, new_tags) in counters.items():
+			minute_rows.append(
+				{
+					'bucket': bucket,
+					'device': device,
+					'ant': ant,
+					'gtin': gtin,
+					'read_count': reads,
+					'new_tag_count': new_tags,
+				}
+			)
+			hour_key = (bucket.replace(minute=0), device, ant, gtin)
+			hour = hours.setdefault(hour_key, [0, 0])
+			hour[0] += reads
+			hour[1] += new_tags
+
+		hour_rows = [
+			{
+				'bucket': bucket,
+				'device': device,
+				'ant': ant,
+				'gtin': gtin,
+				'read_count': reads,
+				'new_tag_count': new_tags,
+			}
+			for (bucket, device, ant, gtin), (reads, new_tags) in hours.items()
+		]
+		return minute_rows, hour_rows
+
+	@staticmethod
+	def _upsert(session, minute_rows: list[dict], hour_rows: list[dict]) -> None:
+		for model, rows in ((ReadRollupMinute, minute_rows), (ReadRollupHour, hour_rows)):
+			upsert_rows(
+				session,
+				model,
+				rows,
+				conflict_columns=('bucket', 'device', 'ant', 'gtin'),
+				increment_columns=('read_count', 'new_tag_count'),
+			)
+
+	async def flush(self, db_manager, is_async: bool) -> int:
+		"""Write pending counters to both tables. Returns the number of minute rows."""
+		counters = self._take()
+		if not counters:
+			return 0
+
+		minute_rows, hour_rows = self._rows(counters)
+		try:
+			if is_async:
+				async with db_manager.get_session() as session:
+					await session.run_sync(self._upsert, minute_rows, hour_rows)
+			else:
+
+				def _run():
+					with db_manager.get_session() as session:
+						self._upsert(session, minute_rows, hour_rows)
+
+				await asyncio.to_thread(_run)
+		except Exception as e:
+			logging.error(f'[ ROLLUP ] Error flushing {len(minute_rows)} rollup rows: {e}')
+			self._restore(counters)
+			return 0
+
+		logging.debug(f'[ ROLLUP ] Flushed {len(minute_rows)} minute / {len(hour_rows)} hour rows')
+		return len(minute_rows)
+
+	# [ RETENTION ]
+	@staticmethod
+	def _purge(session, retention: dict[str, int | None]) -> dict[str, int]:
+		deleted = {}
+		now = datetime.now()
+		for resolution, days in retention.items():
+			if not isinstance(days, int):
+				continue
+			model = RESOLUTIONS[resolution]
+			result = session.execute(
+				delete(model).where(model.bucket < now - timedelta(days=days))
+			)
+			deleted[model.__tablename__] = result.rowcount or 0
+		return deleted
+
+	async def purge(self, db_manager, is_async: bool, retention: dict[str, int | None]) -> dict:
+		"""Delete buckets older than the per-resolution retention (in days)."""
+		if is_async:
+			async with db_manager.get_session() as session:
+				return await session.run_sync(self._purge, retention)
+
+		def _run():
+			with db_manager.get_session() as session:
+				return self._purge(session, retention)
+
+		return await asyncio.to_thread(_run)
+
+	# [ QUERIES ]
+	@staticmethod
+	def query_series(
+		session,
+		resolution: str,
+		start: datetime,
+		end: datetime,
+		group_by: list[str],
+		device: str | None = None,
+		ant: int | None = None,
+		gtin: str | None = None,
+	) -> list[dict]:
+		"""Sum reads per bucket (and per `group_by` columns) on a sync session."""
+		model = RESOLUTIONS[resolution]
+		group_columns = [getattr(model, name) for name in group_by]
+		query = (
+			select(
+				model.bucket,
+				*group_columns,
+				func.sum(model.read_count).label('read_count'),
+				func.sum(model.new_tag_count).label('new_tag_count'),
+			)
+			.where(model.bucket >= start, model.bucket < end)
+			.group_by(model.bucket, *group_columns)
+			.order_by(model.bucket)
+		)
+		if device is not None:
+			query = query.where(model.device == device)
+		if ant is not None:
+			query = query.where(model.ant == ant)
+		if gtin is not None:
+			query = query.where(model.gtin == gtin)
+
+		series = []
+		for row in session.execute(query):
+			point = dict(row._mapping)
+			point['bucket'] = point['bucket'].isoformat()
+			point['read_count'] = int(point['read_count'] or 0)
+			point['new_tag_count'] = int(point['new_tag_count'] or 0)
+			series.append(point)
+		return series
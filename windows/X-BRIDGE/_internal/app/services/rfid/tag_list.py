@@ -0,0 +1,101 @@
+from datetime import datetime
+from typing import Any, Dict
+
+from smartx_rfid.utils import TagList
+
+from .epc import decode_gtin
+from .journal import ChangeJournal
+
+
+class FastTagList(TagList):
+	"""
+	TagList that decodes GTINs with the table-driven codec in epc.py.
+
+	smartx_rfid's TagList builds a pyepc SGTIN object for every new tag (and on
+	every EPC change); this keeps the stored tag identical but resolves the GTIN
+	from precomputed partition tables with a per-product memo.
+
+	With a `journal`, every change and removal is also recorded there for
+	federation peers.
+	"""
+
+	def __init__(self, *args, journal: ChangeJournal | None = None, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.journal = journal
+
+	def _new_tag(self, tag: Dict[str, Any], device: str) -> Dict[str, Any]:
+		tid_val = tag.get('tid')
+		tid_key = 'Unknown'
+		if tid_val:
+			tid_key = tid_val[:8].lower()
+			if not tid_key.startswith('e'):
+				tid_key = 'e' + tid_key
+
+		stored_tag = {
+			'timestamp': datetime.now(),
+			'device': device,
+			**tag,
+			'gtin': decode_gtin(tag.get('epc')),
+			'chip': self.chip_map.get(tid_key, 'Unknown'),
+			'count': 1,
+		}
+		self._tags[tag[self.unique_identifier]] = stored_tag
+		if self.journal is not None:
+			self.journal.touch(tag[self.unique_identifier])
+		return stored_tag
+
+	def _existing_tag(self, tag: Dict[str, Any], device: str) -> Dict[str, Any]:
+		current = self._tags[tag[self.unique_identifier]]
+
+		current['count'] += 1
+		current['timestamp'] = datetime.now()
+		current['rssi'] = tag.get('rssi')
+		current['ant'] = tag.get('ant')
+		if device != current['device']:
+			current['device'] = device
+		epc = tag.get('epc')
+		if epc != current.get('epc'):
+			current['epc'] = epc
+			current['gtin'] = decode_gtin(epc)
+		if tag.get('protected') != current.get('protected'):
+			current['protected'] = tag.get('protected')
+		if self.journal is not None:
+			self.journal.touch(tag[self.unique_identifier])
+		return current
+
+	def add_many(self, items: list[tuple[Dict[str, Any], str]]) -> list[tuple[bool, Dict[str, Any] | None]]:
+		"""add() for a batch of (tag, device) pairs; same interface as RemoteTagList."""
+		return [self.add(tag, device=device) for tag, device in items]
+
+	def set_prefix(self, prefix: str | list | None) -> None:
+		"""Replace the EPC prefix filter (settings reload); tags already stored are kept."""
+		if isinstance(prefix, str):
+			prefix = [prefix]
+		with self._lock:
+			self.prefix = [p.lower() for p in prefix] if prefix is not None else None
+
+	def get_many(self, identifiers: list[str]) -> list[Dict[str, Any]]:
+		"""Stored tags for `identifiers` (unique identifier values); missing ones are skipped."""
+		with self._lock:
+			return [self._tags[uid] for uid in identifiers if uid in self._tags]
+
+	# Removals are done in place so the journal learns which tags went away
+	def clear(self) -> None:
+		with self._lock:
+			self._tags.clear()
+			if self.journal is not None:
+				self.journal.reset()
+
+	def remove_tags_before_timestamp(self, timestamp: datetime) -> None:
+		self._remove(lambda tag: not (tag.get('timestamp') and tag['timestamp'] >= timestamp))
+
+	def remove_tags_by_device(self, device: str) -> None:
+		self._remove(lambda tag: tag.get('device') == device)
+
+	def _remove(self, predicate) -> None:
+		with self._lock:
+			removed = [uid for uid, tag in self._tags.items() if predicate(tag)]
+			for uid in removed:
+				del self._tags[uid]
+			if removed and self.journal is not None:
+				self.journal.remove(removed)
@@ -1,28 +1,127 @@
+import copy
 import json
 import logging
 import os
+import time
 from pathlib import Path
 
-from app.core import settings
+from app.core import settings, logger
 from app.core import DEVICES_PATH, EXAMPLE_PATH, FILES_PATH
 from app.services import rfid_manager
+from app.services.diagnostics import loop_monitor
+from app.services.rfid.tag_list import FastTagList
 import asyncio
 from typing import Any, Dict, Union
 from smartx_rfid.utils import delayed_function
 from app.services.tray import tray_manager
 
+# Settings only read at startup; changing them needs a restart
+RESTART_REQUIRED = {'TITLE', 'PORT', 'INGEST_WORKERS', 'NODE_ID'}
+# Background features that start live when switched on but need a restart to
+# switch off or to change once running
+RESTART_IF_RUNNING = {
+	'SINK_WORKER': ('SINK_WORKER', 'SINK_RING_PATH', 'SINK_RING_MB', 'SINK_BATCH_SIZE'),
+	'FEDERATION_PEERS': ('FEDERATION_PEERS', 'FEDERATION_WAIT', 'FEDERATION_INTERVAL'),
+}
+INTEGRATION_KEYS = {'DATABASE_URL', 'WEBHOOK_URL', 'XTRACK_URL'}
+
 
 class SettingsService:
 	def __init__(self):
 		self.has_changes: bool = False
+		self._reload_lock = asyncio.Lock()
 
-	def update_settings(self, data: dict):
+	async def update_settings(self, data: dict) -> dict:
+		old = copy.deepcopy(settings.get_current_settings())
 		settings.load(data)
 		settings.save()
-		self.has_changes = True
+		return await self.apply_changes(old)
+
+	async def reload(self) -> dict:
+		"""Re-read the config file and apply what changed, without restarting."""
+		old = copy.deepcopy(settings.get_current_settings())
+		settings.load()
+		return await self.apply_changes(old)
+
+	async def apply_changes(self, old: dict) -> dict:
+		"""
+		Rebuild only what depends on the settings that differ from `old`.
+
+		Devices, the tag list and queued integrations are left alone, so no read is
+		lost; settings read where they are used (intervals, BEEP, ...) apply as is.
+		`has_changes` is set when some change only takes effect after a restart.
+		"""
+		async with self._reload_lock:
+			started = time.perf_counter()
+			new = settings.get_current_settings()
+			changed = sorted(key for key in new.keys() | old.keys() if old.get(key) != new.get(key))
+			if not changed:
+				return {'changed': [], 'applied': [], 'restart_required': [], 'elapsed_ms': 0.0}
+
+			logging.info(f'[ SETTINGS ] Reloading: {", ".join(changed)}')
+			applied = []
+			restart = [key for key in changed if key in RESTART_REQUIRED]
+			for switch, keys in RESTART_IF_RUNNING.items():
+				if old.get(switch):
+					restart += [key for key in changed if key in keys]
+
+			integration = rfid_manager.integration
+			if 'DATABASE_URL' in changed:
+				previous = integration.db_manager
+				# Engine setup connects to the database: keep it off the event loop
+				await asyncio.to_thread(integration.load_database)
+				await integration.dispose_database(previous)
+				applied.append('DATABASE_URL')
+			if 'WEBHOOK_URL' in changed:
+				integration.load_webhook()
+				applied.append('WEBHOOK_URL')
+			if 'XTRACK_URL' in changed:
+				integration.load_webhook_xtrack()
+				applied.append('XTRACK_URL')
+			if rfid_manager.sink.active and INTEGRATION_KEYS & set(changed):
+				# The sink worker built its own Integration from the old settings
+				await rfid_manager.sink.recycle(forward_reads=integration.db_manager is not None)
+
+			if 'LOG_PATH' in changed or 'STORAGE_DAYS' in changed:
+				self._reload_logger()
+				applied += [key for key in ('LOG_PATH', 'STORAGE_DAYS') if key in changed]
+
+			if 'TAG_PREFIX' in changed:
+				if isinstance(rfid_manager.tags, FastTagList):
+					rfid_manager.tags.set_prefix(settings.TAG_PREFIX)
+					applied.append('TAG_PREFIX')
+				else:
+					# The shared tag store process filters with its own copy
+					restart.append('TAG_PREFIX')
+
+			if 'LOOP_MONITOR_INTERVAL' in changed or 'LOOP_STALL_THRESHOLD' in changed:
+				loop_monitor.interval = settings.LOOP_MONITOR_INTERVAL
+				loop_monitor.stall_threshold = settings.LOOP_STALL_THRESHOLD
+				applied += [key for key in changed if key.startswith('LOOP_')]
+
+			elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+			self.has_changes = self.has_changes or bool(restart)
+			if restart:
+				logging.warning(f'[ SETTINGS ] Restart required for: {", ".join(restart)}')
+			logging.info(f'[ SETTINGS ] Reload applied in {elapsed_ms} ms')
+			return {
+				'changed': changed,
+				'applied': applied,
+				'restart_required': restart,
+				'elapsed_ms': elapsed_ms,
+			}
+
+	def _reload_logger(self):
+		# The writer thread picks the new file up on its next message
+		log_path = Path(settings.LOG_PATH).resolve()
+		log_path.mkdir(parents=True, exist_ok=True)
+		logger.storage_days = settings.STORAGE_DAYS
+		logger.log_path = log_path
+		logger.filename = logger._get_filename_for_date(logger.current_date)
 
 	def reload_devices(self):
-		asyncio.create_task(rfid_manager.devices.cancel_connect_tasks())
+		# Only the devices whose file changed are connected, stopped or updated
+		asyncio.create_task(rfid_manager.reconciler.reconcile())
 
 	def create_device(self, device_name: str, data: dict) -> tuple[bool, str | None]:
 		try:
@@ -180,9 +279,15 @@ class SettingsService:
 
 			_write_node(data, root)
 
-			# mark changes and reload if necessary
-			asyncio.create_task(delayed_function(tray_manager.restart_application, 1))
+			# apply in place; restart only if a changed setting requires it
+			asyncio.create_task(self._apply_import())
 
 			return True, None
 		except Exception as e:
 			return False, str(e)
+
+	async def _apply_import(self):
+		result = await self.reload()
+		self.reload_devices()
+		if result['restart_required']:
+			await delayed_function(tray_manager.restart_application, 1)
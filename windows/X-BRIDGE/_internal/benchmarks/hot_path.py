@@ -0,0 +1,253 @@
+"""
+Micro-benchmarks for the RFID hot path.
+
+Covers RfidManager.on_tag (unique / duplicate mixes), handle_r700_event, the
+TagList operations at several sizes, Tag model (de)serialization and the
+receive routers through an in-process ASGI client. Integrations (database,
+webhooks, beep) are detached so only the bridge's own code is measured.
+
+Usage:
+    python -m benchmarks.hot_path
+    python -m benchmarks.hot_path --sizes 1000 10000 --repeat 3
+    python -m benchmarks.hot_path --save-baseline
+    python -m benchmarks.hot_path --baseline bench_results/hot_path.baseline.json --threshold 0.1
+
+With --baseline the process exits with status 1 if any case lost more than
+--threshold of its throughput, so it can gate a release build.
+"""
+
+import argparse
+import asyncio
+import shutil
+import sys
+from datetime import datetime, timedelta
+
+from ._common import (
+	ROOT,
+	bootstrap,
+	compare_results,
+	load_results,
+	measure,
+	measure_async,
+	quiet_logging,
+	write_results,
+)
+
+bootstrap()
+
+import httpx  # noqa: E402
+
+from app.core import SWAGGER_PATH, settings  # noqa: E402
+from app.core.build_app import create_application  # noqa: E402
+from app.models import Tag  # noqa: E402
+from app.services import rfid_manager  # noqa: E402
+from app.services.rfid.tag_list import FastTagList  # noqa: E402
+
+BASELINE_PATH = ROOT / 'bench_results' / 'hot_path.baseline.json'
+DEVICES = ('BENCH_1', 'BENCH_2', 'BENCH_3', 'BENCH_4')
+
+
+# [ DATA ]
+def make_reads(count: int, unique_ratio: float = 1.0) -> list[dict]:
+	"""`count` reads where only `unique_ratio` of them are distinct tags (SGTIN-96 EPCs)."""
+	unique = max(1, int(count * unique_ratio))
+	return [
+		{
+			'epc': f'3034{i % unique:020x}',
+			'tid': f'e280{i % unique:020x}',
+			'ant': (i % 4) + 1,
+			'rssi': -40 - (i % 30),
+		}
+		for i in range(count)
+	]
+
+
+def make_r700_events(count: int) -> list[dict]:
+	"""tagInventory events shaped like the Impinj R700 IoT interface stream."""
+	return [
+		{
+			'timestamp': '2024-01-01T00:00:00.000000Z',
+			'hostname': 'impinj-14-1a-2b',
+			'eventType': 'tagInventory',
+			'tagInventoryEvent': {
+				'epc': 'MDQAAAAAAAAAAAAA',
+				'epcHex': f'3034{i:020X}',
+				'tid': '4oAAAAAAAAAAAAAA',
+				'tidHex': f'E280{i:020X}',
+				'antennaPort': (i % 4) + 1,
+				'antennaName': f'Antenna {(i % 4) + 1}',
+				'peakRssiCdbm': -5400 - (i % 30) * 100,
+				'frequency': 920250,
+				'transmitPowerCbm': 3000,
+				'lastSeenTime': '2024-01-01T00:00:00.000000Z',
+				'phaseAngle': 12.5,
+			},
+		}
+		for i in range(count)
+	]
+
+
+def filled_tag_list(size: int) -> FastTagList:
+	tags = FastTagList(unique_identifier='tid')
+	for i, read in enumerate(make_reads(size)):
+		tags.add(read, device=DEVICES[i % len(DEVICES)])
+	return tags
+
+
+def detach_integrations() -> None:
+	integration = rfid_manager.integration
+	integration.db_manager = None
+	integration.webhook_manager = None
+	integration.webhook_xtrack = None
+	settings.BEEP = False
+
+
+async def drain_tasks() -> None:
+	"""Let the integration tasks created by on_tag finish outside the timed section."""
+	pending = asyncio.all_tasks() - {asyncio.current_task()}
+	if pending:
+		await asyncio.gather(*pending, return_exceptions=True)
+
+
+def fresh_tags() -> FastTagList:
+	rfid_manager.tags = FastTagList(unique_identifier='tid', prefix=settings.TAG_PREFIX)
+	return rfid_manager.tags
+
+
+# [ CASES ]
+async def bench_on_tag(results: dict, count: int, repeat: int) -> None:
+	for label, ratio in (('unique', 1.0), ('mixed', 0.5), ('duplicate', 0.01)):
+		reads = make_reads(count, ratio)
+
+		def run(_, reads=reads):
+			for i, read in enumerate(reads):
+				rfid_manager.on_tag(name=DEVICES[i % len(DEVICES)], tag_data=read)
+
+		results[f'on_tag.{label}'] = measure(run, count, repeat, setup=fresh_tags)
+		await drain_tasks()
+
+
+async def bench_r700(results: dict, count: int, repeat: int) -> None:
+	events = make_r700_events(count)
+	results['handle_r700_event'] = measure(
+		lambda _: rfid_manager.handle_r700_event(events), count, repeat, setup=fresh_tags
+	)
+	await drain_tasks()
+
+
+def bench_tag_list(results: dict, sizes: list[int], repeat: int) -> None:
+	for size in sizes:
+		reads = make_reads(size)
+
+		def add_all(tags, reads=reads):
+			for i, read in enumerate(reads):
+				tags.add(read, device=DEVICES[i % len(DEVICES)])
+
+		results[f'tag_list.add.{size}'] = measure(
+			add_all, size, repeat, setup=lambda: FastTagList(unique_identifier='tid')
+		)
+		results[f'tag_list.remove_tags_by_device.{size}'] = measure(
+			lambda tags: tags.remove_tags_by_device(DEVICES[0]),
+			size,
+			repeat,
+			setup=lambda size=size: filled_tag_list(size),
+		)
+		# Cutoff in the future: every tag is compared and dropped
+		cutoff = datetime.now() + timedelta(days=1)
+		results[f'tag_list.remove_tags_before_timestamp.{size}'] = measure(
+			lambda tags: tags.remove_tags_before_timestamp(cutoff),
+			size,
+			repeat,
+			setup=lambda size=size: filled_tag_list(size),
+		)
+		tags = filled_tag_list(size)
+		results[f'tag_list.get_gtin_counts.{size}'] = measure(
+			lambda _: tags.get_gtin_counts(), size, repeat
+		)
+
+
+def bench_models(results: dict, count: int, repeat: int) -> None:
+	tags = filled_tag_list(count).get_all()
+	results['model.Tag.from_dict'] = measure(
+		lambda _: [Tag.from_dict(tag) for tag in tags], count, repeat
+	)
+	models = [Tag.from_dict(tag) for tag in tags]
+	results['model.Tag.to_dict'] = measure(
+		lambda _: [model.to_dict() for model in models], count, repeat
+	)
+
+
+async def bench_receive(results: dict, batches: int, batch_size: int, repeat: int) -> None:
+	app = create_application(settings.TITLE, SWAGGER_PATH)
+	tag_batch = [
+		{'epc': read['epc'], 'tid': read['tid'], 'ant': read['ant'], 'rssi': read['rssi']}
+		for read in make_reads(batch_size)
+	]
+	r700_batch = make_r700_events(batch_size)
+
+	transport = httpx.ASGITransport(app=app)
+	async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+
+		async def post(url: str, payload: list) -> None:
+			response = await client.post(url, json=payload)
+			response.raise_for_status()
+
+		for name, url, payload in (
+			('receive.tags', '/api/v1/receive/tags/BENCH_1', tag_batch),
+			('receive.r700', '/api/v1/receive/r700', r700_batch),
+		):
+
+			async def run(_, url=url, payload=payload):
+				for _ in range(batches):
+					await post(url, payload)
+
+			result = await measure_async(run, batches * batch_size, repeat, setup=fresh_tags)
+			result['requests_per_s'] = round(batches / result['best_s'], 1)
+			results[name] = result
+			await drain_tasks()
+
+
+async def main(args) -> dict:
+	quiet_logging()
+	detach_integrations()
+
+	results: dict = {}
+	await bench_on_tag(results, args.reads, args.repeat)
+	await bench_r700(results, args.reads, args.repeat)
+	bench_tag_list(results, args.sizes, args.repeat)
+	bench_models(results, min(args.reads, 10000), args.repeat)
+	await bench_receive(results, args.batches, args.batch_size, args.repeat)
+	return results
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+	parser.add_argument('--reads', type=int, default=10000, help='Reads per on_tag/R700 case')
+	parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+	parser.add_argument('--repeat', type=int, default=5)
+	parser.add_argument('--batches', type=int, default=50, help='Requests per receive case')
+	parser.add_argument('--batch-size', type=int, default=100, help='Tags/events per request')
+	parser.add_argument('--output', default=None)
+	parser.add_argument('--baseline', default=None, help='Results file to compare against')
+	parser.add_argument('--threshold', type=float, default=0.15, help='Allowed throughput drop')
+	parser.add_argument('--save-baseline', action='store_true', help=f'Copy results to {BASELINE_PATH}')
+	args = parser.parse_args()
+
+	results = asyncio.run(main(args))
+	output = write_results('hot_path', results, args.output)
+
+	if args.save_baseline:
+		BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+		shutil.copyfile(output, BASELINE_PATH)
+		print(f'Baseline saved to {BASELINE_PATH}')
+
+	if args.baseline:
+		comparison = compare_results(results, load_results(args.baseline), args.threshold)
+		for name, case in comparison['cases'].items():
+			change = case['change_pct']
+			flag = '  REGRESSION' if case['regression'] else ''
+			change_str = f'{change:+.1f}%' if change is not None else 'n/a'
+			print(f'{name:<45} {str(case["baseline"]):>12} -> {str(case["current"]):>12} {change_str:>8}{flag}')
+		if comparison['regressions']:
+			print(f'{len(comparison["regressions"])} case(s) regressed by more than {args.threshold:.0%}')
+			sys.exit(1)
@@ -0,0 +1,76 @@
+"""
+Replay a raw read capture (recorded with /api/v1/capture/start) through
+RfidManager in-process and report throughput, lag and loop stalls.
+
+Integrations (database, webhooks, beep) are detached unless --integrations is
+given, so by default the run measures the bridge itself on the site's traffic.
+
+Usage:
+    python -m benchmarks.replay Captures/site_a.xbcap
+    python -m benchmarks.replay Captures/site_a.xbcap --speed 10 --loops 3
+    python -m benchmarks.replay Captures/site_a.xbcap --speed 1 --integrations
+"""
+
+import argparse
+import asyncio
+import os
+
+from ._common import bootstrap, quiet_logging, write_results
+
+bootstrap()
+
+from app.services import rfid_manager  # noqa: E402
+from app.services.diagnostics import LoopMonitor  # noqa: E402
+from app.services.replay import CaptureReplayer  # noqa: E402
+from app.services.rfid.capture import capture_info  # noqa: E402
+
+from .hot_path import detach_integrations, fresh_tags  # noqa: E402
+
+
+async def main(args) -> dict:
+	quiet_logging()
+	if not args.integrations:
+		detach_integrations()
+	fresh_tags()
+
+	monitor = LoopMonitor(interval=0.05, stall_threshold=args.stall_threshold)
+	monitor_task = asyncio.create_task(monitor.run())
+	replayer = CaptureReplayer(rfid_manager)
+	try:
+		await replayer.start(args.capture, speed=args.speed, loops=args.loops)
+		status = await replayer.wait()
+		await drain_tasks_except(monitor_task)
+	finally:
+		monitor_task.cancel()
+		await asyncio.gather(monitor_task, return_exceptions=True)
+
+	return {
+		'capture': capture_info(args.capture),
+		'speed': args.speed,
+		'loops': args.loops,
+		'integrations': args.integrations,
+		'replay': status,
+		'tags_in_memory': len(rfid_manager.tags),
+		'loop': monitor.get_stats(),
+	}
+
+
+async def drain_tasks_except(*keep: asyncio.Task) -> None:
+	"""drain_tasks() without waiting on long-running helpers such as the loop monitor."""
+	pending = asyncio.all_tasks() - {asyncio.current_task(), *keep}
+	if pending:
+		await asyncio.gather(*pending, return_exceptions=True)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+	parser.add_argument('capture', help='Capture file (.xbcap)')
+	parser.add_argument('--speed', type=float, default=0, help='Timing scale, 0 = max speed (default)')
+	parser.add_argument('--loops', type=int, default=1)
+	parser.add_argument('--integrations', action='store_true', help='Keep configured integrations')
+	parser.add_argument('--stall-threshold', type=float, default=0.1, help='Loop stall threshold (s)')
+	parser.add_argument('--output', default=None)
+	args = parser.parse_args()
+	if not os.path.isfile(args.capture):
+		parser.error(f'{args.capture} not found')
+	write_results('replay', asyncio.run(main(args)), args.output)
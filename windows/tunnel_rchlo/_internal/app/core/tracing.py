@@ -0,0 +1,120 @@
+"""
+Latency tracing for GPO decisions.
+
+A Trace follows one decision from its origin (the last tag of a tunnel box, or
+the HTTP request for the GPO endpoint) to the GPO write completing, as a list
+of named stages. Stages are recorded from timestamps the code already has
+(`span`) or around a block (`stage`), all on time.perf_counter, which unlike
+time.monotonic is high resolution on Windows too.
+
+Finished traces feed two histograms on /metrics:
+
+    decision_stage_seconds{flow,stage}      each stage
+    decision_latency_seconds{flow,outcome}  origin to the end of the last stage
+
+and the slowest recent ones (at least SLOW_DECISION_MS) are kept for
+/api/v1/tracing/get_slow.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable
+
+from prometheus_client import Histogram
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 5)
+
+DECISION_STAGE = Histogram(
+	'decision_stage_seconds',
+	'Duration of each stage of a GPO decision',
+	['flow', 'stage'],
+	buckets=LATENCY_BUCKETS,
+)
+DECISION_LATENCY = Histogram(
+	'decision_latency_seconds',
+	'From the origin of a GPO decision (last tag, request) to the GPO write completing',
+	['flow', 'outcome'],
+	buckets=LATENCY_BUCKETS,
+)
+
+
+class Trace:
+	def __init__(self, flow: str, name: str, origin: float | None = None, **attributes):
+		self.flow = flow
+		self.name = name
+		now = time.perf_counter()
+		self.origin = now if origin is None else origin
+		self.started_at = datetime.now() - timedelta(seconds=now - self.origin)
+		self.attributes = attributes
+		self.spans: list[tuple[str, float, float]] = []
+		self.outcome: str | None = None
+		self.total: float | None = None
+
+	def span(self, stage: str, start: float | None, end: float | None = None) -> None:
+		"""Record a stage from known perf_counter timestamps; skipped when `start` is unknown."""
+		if start is None:
+			return
+		self.spans.append((stage, start, time.perf_counter() if end is None else end))
+
+	@property
+	def end(self) -> float:
+		"""End of the last stage (the origin before any)."""
+		return self.spans[-1][2] if self.spans else self.origin
+
+	@contextmanager
+	def stage(self, stage: str):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.span(stage, start)
+
+	def as_dict(self) -> dict:
+		return {
+			'flow': self.flow,
+			'name': self.name,
+			'started_at': self.started_at.isoformat(),
+			'outcome': self.outcome,
+			'total_ms': round(self.total * 1000, 3) if self.total is not None else None,
+			'attributes': self.attributes,
+			'spans': [
+				{
+					'stage': stage,
+					'start_ms': round((start - self.origin) * 1000, 3),
+					'duration_ms': round((end - start) * 1000, 3),
+				}
+				for stage, start, end in self.spans
+			],
+		}
+
+
+class Tracer:
+	def __init__(self, slow_ms: Callable[[], float | None], keep: int = 100):
+		self.slow_ms = slow_ms
+		self.slow: deque[Trace] = deque(maxlen=keep)
+		self._lock = threading.Lock()
+
+	def finish(self, trace: Trace, outcome: str = 'ok') -> float:
+		"""Close the trace at the end of its last stage; returns its total in seconds."""
+		end = max((span_end for _, _, span_end in trace.spans), default=time.perf_counter())
+		trace.outcome = outcome
+		trace.total = end - trace.origin
+		for stage, start, span_end in trace.spans:
+			DECISION_STAGE.labels(trace.flow, stage).observe(span_end - start)
+		DECISION_LATENCY.labels(trace.flow, outcome).observe(trace.total)
+
+		threshold = self.slow_ms()
+		if threshold is not None and trace.total * 1000 >= threshold:
+			with self._lock:
+				self.slow.append(trace)
+		return trace.total
+
+	def get_slow(self, flow: str | None = None, limit: int = 20) -> list[dict]:
+		"""Most recent slow traces first."""
+		with self._lock:
+			traces = list(self.slow)
+		traces = [trace for trace in reversed(traces) if flow is None or trace.flow == flow]
+		return [trace.as_dict() for trace in traces[:limit]]
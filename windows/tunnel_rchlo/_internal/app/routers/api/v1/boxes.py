@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from typing import Literal
+
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
+from smartx_rfid.utils.path import get_prefix_from_path
+
+from app.core import settings
+from app.services import rfid_manager
+
+router_prefix = get_prefix_from_path(__file__)
+router = APIRouter(prefix=router_prefix, tags=[router_prefix])
+
+# Default window when `start` is not given
+DEFAULT_WINDOW = {'hour': timedelta(days=1), 'shift': timedelta(days=1), 'day': timedelta(days=7)}
+
+
+def _local(moment: datetime | None) -> datetime | None:
+	"""box_events times are naive local time: convert aware bounds (e.g. `...Z`) to it."""
+	if moment is None or moment.tzinfo is None:
+		return moment
+	return moment.astimezone().replace(tzinfo=None)
+
+
+@router.get(
+	'/get_history',
+	summary='Get decided boxes',
+	description=(
+		'Returns the box_events audit rows decided between `start` and `end` (default: the '
+		'last day), newest first: box, expected and read quantity, decision and reason, GPO '
+		'result and the inform/read start/first tag/last tag/decision/GPO ack timestamps. '
+		'`include_epcs` adds the EPCs counted for each box.'
+	),
+)
+async def get_history(
+	start: datetime | None = None,
+	end: datetime | None = None,
+	device: str | None = None,
+	box_id: str | None = None,
+	decision: Literal['approved', 'rejected'] | None = None,
+	include_epcs: bool = False,
+	limit: int = Query(default=100, ge=1, le=1000),
+	offset: int = Query(default=0, ge=0),
+):
+	end = _local(end) or datetime.now()
+	start = _local(start) or end - timedelta(days=1)
+	try:
+		history = await rfid_manager.integration.query_box_history(
+			start=start,
+			end=end,
+			device=device,
+			box_id=box_id,
+			decision=decision,
+			limit=limit,
+			offset=offset,
+			include_epcs=include_epcs,
+		)
+	except Exception as e:
+		return JSONResponse(status_code=500, content={'error': str(e)})
+	return JSONResponse(status_code=200, content=history)
+
+
+@router.get(
+	'/get_throughput',
+	summary='Get box throughput per hour, shift or day',
+	description=(
+		'Aggregates box_events per hour, per shift (SHIFTS setting) or per day: boxes, '
+		'approved/rejected, reject reasons, boxes whose read quantity differs from the '
+		'expected one, boxes per hour, and mean inform-to-decision, read, first tag, settle '
+		'and GPO ack times in seconds. Defaults to the last day (hour, shift) or week (day).'
+	),
+)
+async def get_throughput(
+	resolution: Literal['hour', 'shift', 'day'] = 'shift',
+	start: datetime | None = None,
+	end: datetime | None = None,
+	device: str | None = None,
+):
+	end = _local(end) or datetime.now()
+	start = _local(start) or end - DEFAULT_WINDOW[resolution]
+	try:
+		series = await rfid_manager.integration.query_box_throughput(
+			resolution=resolution,
+			start=start,
+			end=end,
+			shifts=settings.SHIFTS,
+			device=device,
+		)
+	except Exception as e:
+		return JSONResponse(status_code=500, content={'error': str(e)})
+
+	return JSONResponse(
+		status_code=200,
+		content={
+			'resolution': resolution,
+			'start': start.isoformat(),
+			'end': end.isoformat(),
+			'series': series,
+		},
+	)
@@ -8,17 +8,63 @@ router_prefix = get_prefix_from_path(__file__)
 router = APIRouter(prefix=router_prefix, tags=[router_prefix])
 
 
-@router.post('/inform_box')
+@router.post(
+	'/inform_box',
+	summary='Inform a box',
+	description=(
+		'Queues a box (`box_info` as `box_id;qty`) for the tunnel reading `device`, or for the '
+		'next tunnel that starts reading when `device` is omitted. Boxes are read in the order '
+		'they were informed; informing the last queued box again replaces it.'
+	),
+)
 async def inform_box(request: Request):
 	data = await request.json()
 	box_info = data.get('box_info')
-	rfid_manager.controller.update_box_info(box_info)
-	return JSONResponse(content={'box_info': box_info})
+	device = data.get('device')
+	box = rfid_manager.controller.update_box_info(box_info or '', device)
+	if box is None:
+		error = rfid_manager.controller.state_msg.get('text')
+		return JSONResponse(status_code=400, content={'error': error})
+	return JSONResponse(content={'box_info': box_info, 'device': device})
 
 
-@router.get('/box_info')
-async def get_box_info():
-	return JSONResponse(content=rfid_manager.controller.box_info)
+@router.get(
+	'/box_info',
+	summary='Current box',
+	description=(
+		'Box being read by `device`; without it, the box of the first tunnel reading one, else '
+		'the next queued box.'
+	),
+)
+async def get_box_info(device: str | None = None):
+	controller = rfid_manager.controller
+	if not device:
+		return JSONResponse(content=controller.box_info)
+	if not controller.has_device(device):
+		return JSONResponse(status_code=400, content={'error': f"Device '{device}' not found."})
+	tunnel = controller.tunnels.get(device)
+	return JSONResponse(content=tunnel.box_info if tunnel else {})
+
+
+@router.get(
+	'/status',
+	summary='Tunnels and box queue',
+	description='Current box, waiting boxes and tag count of every tunnel, and the shared box queue.',
+)
+async def get_controller_status():
+	return JSONResponse(content=rfid_manager.controller.status())
+
+
+@router.post(
+	'/clear_queue',
+	summary='Clear waiting boxes',
+	description='Drops the boxes waiting for `device`, or every waiting box when it is omitted.',
+)
+async def clear_queue(device: str | None = None):
+	if device and not rfid_manager.controller.has_device(device):
+		return JSONResponse(status_code=400, content={'error': f"Device '{device}' not found."})
+	count = rfid_manager.controller.clear_queue(device)
+	return JSONResponse(content={'message': f'{count} waiting boxes removed.'})
 
 
 @router.get('/get_state')
@@ -4,6 +4,8 @@ from smartx_rfid.utils.path import get_prefix_from_path
 from smartx_rfid.schemas.tag import WriteTagValidator
 from app.schemas import write_tag_example
 
+from app.core import event_bus
+from app.core.events import TagsCleared
 from app.services import rfid_manager
 from app.models import get_all_models
 
@@ -36,6 +38,8 @@ async def get_tag_count():
 )
 async def clear_tags():
 	rfid_manager.tags.clear()
+	rfid_manager.controller.clear_tags()
+	event_bus.publish(TagsCleared())
 	return JSONResponse(
 		status_code=200,
 		content={'message': 'All tags have been cleared.'},
@@ -49,6 +53,8 @@ async def clear_tags():
 )
 async def clear_tags_device(device_name: str):
 	rfid_manager.tags.remove_tags_by_device(device=device_name)
+	rfid_manager.controller.clear_tags(device=device_name)
+	event_bus.publish(TagsCleared(device=device_name))
 	return JSONResponse(
 		status_code=200,
 		content={'message': f'All tags for device {device_name} have been cleared.'},
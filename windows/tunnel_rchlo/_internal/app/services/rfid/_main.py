@@ -1,9 +1,17 @@
 import logging
+import time
 from smartx_rfid.devices import DeviceManager
 from smartx_rfid.utils import TagList
 from .integration import Integration
 import asyncio
-from app.core import settings
+from app.core import settings, event_bus
+from app.core.events import (
+	DeviceStateChanged,
+	ReadingStarted,
+	ReadingStopped,
+	TagAdded,
+	TagsCleared,
+)
 from .controller import Controller
 
 
@@ -20,12 +28,17 @@ class RfidManager:
 			devices_path=devices_path, example_path=example_path, event_func=self.on_event
 		)
 
-		# CONTROLLER
-		self.controller = Controller(devices=self.devices, tags=self.tags)
-
 		# INTEGRATION
 		self.integration = Integration()
 
+		# CONTROLLER
+		self.controller = Controller(
+			devices=self.devices, tags=self.tags, audit=self.integration.box_audit
+		)
+
+		# Last connection state per device (DEVICE_STATES), for DeviceStateChanged
+		self.device_states: dict[str, str] = {}
+
 		logging.info(f"{'='*20} RfidManager initialized {'='*20}")
 
 	def handle_r700_event(self, events: list):
@@ -57,7 +70,18 @@ class RfidManager:
 			self.on_tag(name=name, tag_data=event_data)
 		else:
 			logging.info(f'[ EVENT ] {name} - {event_type}: {event_data}')
+			if event_type in ('connection', 'connected'):
+				if event_data:
+					if self.device_states.get(name) != 'reading':
+						self._set_device_state(name, 'connected')
+				else:
+					# The reader retries inside connect()
+					self._set_device_state(name, 'connecting')
 			if event_type == 'reading':
+				if event_data:
+					self._set_device_state(name, 'reading')
+				elif self.device_states.get(name) == 'reading':
+					self._set_device_state(name, 'connected')
 				self.on_start(name=name) if event_data else self.on_stop(name=name)
 
 			asyncio.create_task(
@@ -66,30 +90,40 @@ class RfidManager:
 				)
 			)
 
+	def _set_device_state(self, name: str, state: str):
+		previous = self.device_states.get(name)
+		if state != previous:
+			self.device_states[name] = state
+			event_bus.publish(DeviceStateChanged(name, state, previous))
+
 	def on_tag(self, name: str, tag_data: dict):
-		if self.controller.state_sent:
+		received = time.perf_counter()
+		# The tunnel already decided on its box
+		if self.controller.tunnel(name).state_sent:
 			return
 		new_tag, tag = self.tags.add(tag_data, device=name)
 
 		# NEW TAG
 		if new_tag:
 			logging.info(f'[ TAG ] {name} - Tag Data: {tag}')
+			event_bus.publish(TagAdded(name, tag))
 			# Integrate new tag
 			asyncio.create_task(self.integration.on_tag_integration(tag=tag))
-			self.controller.validate_tags(name=name)
 
-		# EXISTING TAG
-		elif tag is not None:
-			pass
+		# Counted per tunnel: a tag another tunnel saw first still belongs to this box
+		if tag is not None and self.controller.add_tag(name, tag_data, received):
+			self.controller.validate_tags(name=name)
 		return tag is not None
 
 	def on_start(self, name: str):
 		logging.info(f'[ START ] {name}')
 		self.tags.remove_tags_by_device(device=name)
-		# Validate box info before starting reading
-		self.controller.state_sent = False
-		self.controller.validate_box_info(name)
+		event_bus.publish(TagsCleared(device=name))
+		event_bus.publish(ReadingStarted(name))
+		# Bind the next informed box to this tunnel and validate it
+		self.controller.start_box(name)
 
 	def on_stop(self, name: str):
 		logging.info(f'[ STOP ] {name}')
+		event_bus.publish(ReadingStopped(name))
 		self.controller.validate_tags(name=name, make_action=True)
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+from collections import Counter, deque
+from datetime import datetime, time, timedelta
+from threading import Lock
+
+from sqlalchemy import func, insert, select
+
+from app.models import BoxEvent
+
+RESOLUTIONS = ('hour', 'shift', 'day')
+
+# Timing means reported per bucket: name -> (from column, to column)
+TIMINGS = {
+	'inform_to_decision': ('informed_at', 'decided_at'),
+	'read': ('started_at', 'decided_at'),
+	'first_tag': ('started_at', 'first_tag_at'),
+	'settle': ('last_tag_at', 'decided_at'),
+	'gpo_ack': ('decided_at', 'gpo_ack_at'),
+}
+
+
+class BoxAudit:
+	"""
+	Batched writer and queries for the box_events table.
+
+	The controller calls `record()` once per decided box (after the GPO write
+	returns) and it only appends to a bounded buffer; the flush_box_events task
+	writes the buffer with one multi-row INSERT, so the decision path never
+	waits on the database. Rows are kept for the next flush when it fails.
+	"""
+
+	MAX_PENDING = 1000
+
+	def __init__(self):
+		self._pending: deque[dict] = deque(maxlen=self.MAX_PENDING)
+		self._lock = Lock()
+
+	def __len__(self) -> int:
+		return len(self._pending)
+
+	def record(self, row: dict) -> None:
+		with self._lock:
+			self._pending.append(row)
+
+	def _take(self) -> list[dict]:
+		with self._lock:
+			rows = list(self._pending)
+			self._pending.clear()
+		return rows
+
+	def _restore(self, rows: list[dict]) -> None:
+		with self._lock:
+			self._pending.extendleft(reversed(rows))
+
+	def discard(self) -> int:
+		"""Drop pending rows (no database configured)."""
+		return len(self._take())
+
+	@staticmethod
+	def _insert(db_manager, rows: list[dict]) -> None:
+		rows = [{**row, 'epcs': BoxEvent.pack_epcs(row.get('epcs'))} for row in rows]
+		with db_manager.get_session() as session:
+			session.execute(insert(BoxEvent), rows)
+			session.commit()
+
+	async def flush(self, db_manager) -> int:
+		"""Write pending rows. Returns the number of rows written."""
+		rows = self._take()
+		if not rows:
+			return 0
+		try:
+			await asyncio.to_thread(self._insert, db_manager, rows)
+		except Exception as e:
+			logging.error(f'[ BOX AUDIT ] Error writing {len(rows)} box events: {e}')
+			self._restore(rows)
+			return 0
+		logging.debug(f'[ BOX AUDIT ] Wrote {len(rows)} box events')
+		return len(rows)
+
+	# [ QUERIES ]
+	@staticmethod
+	def _filtered(query, start, end, device, box_id=None, decision=None):
+		query = query.where(BoxEvent.decided_at >= start, BoxEvent.decided_at < end)
+		if device is not None:
+			query = query.where(BoxEvent.device == device)
+		if box_id is not None:
+			query = query.where(BoxEvent.box_id == box_id)
+		if decision is not None:
+			query = query.where(BoxEvent.decision == decision)
+		return query
+
+	@classmethod
+	def query_history(
+		cls,
+		session,
+		start: datetime,
+		end: datetime,
+		device: str | None = None,
+		box_id: str | None = None,
+		decision: str | None = None,
+		limit: int = 100,
+		offset: int = 0,
+		include_epcs: bool = False,
+	) -> dict:
+		"""Box events in [start, end), newest first, on a sync session."""
+		total = session.scalar(
+			cls._filtered(select(func.count(BoxEvent.id)), start, end, device, box_id, decision)
+		)
+		query = (
+			cls._filtered(select(BoxEvent), start, end, device, box_id, decision)
+			.order_by(BoxEvent.decided_at.desc())
+			.limit(limit)
+			.offset(offset)
+		)
+		exclude = [] if include_epcs else ['epcs']
+		records = [record.to_dict(exclude=exclude) for record in session.scalars(query)]
+		return {
+			'total': total,
+			'limit': limit,
+			'offset': offset,
+			'has_more': (offset + limit) < total,
+			'data': records,
+		}
+
+	@classmethod
+	def query_throughput(
+		cls,
+		session,
+		resolution: str,
+		start: datetime,
+		end: datetime,
+		shifts: list[dict],
+		device: str | None = None,
+	) -> list[dict]:
+		"""Boxes, decisions, reject reasons and mean timings per hour, shift or day."""
+		names = ['decision', 'reason', 'expected_qty', 'actual_qty']
+		names += sorted({name for pair in TIMINGS.values() for name in pair})
+		query = cls._filtered(
+			select(*(getattr(BoxEvent, name) for name in names)), start, end, device
+		)
+		shift_starts = _shift_starts(shifts)
+
+		buckets: dict[tuple[datetime, str | None], dict] = {}
+		for row in session.execute(query):
+			row = row._mapping
+			bucket_start, bucket_end, shift = _bucket(row['decided_at'], resolution, shift_starts)
+			bucket = buckets.get((bucket_start, shift))
+			if bucket is None:
+				bucket = buckets[(bucket_start, shift)] = {
+					'start': bucket_start,
+					'end': bucket_end,
+					'shift': shift,
+					'boxes': 0,
+					'approved': 0,
+					'rejected': 0,
+					'qty_mismatch': 0,
+					'reasons': Counter(),
+					'timings': {name: [] for name in TIMINGS},
+				}
+			bucket['boxes'] += 1
+			bucket['approved' if row['decision'] == 'approved' else 'rejected'] += 1
+			if row['decision'] != 'approved':
+				bucket['reasons'][row['reason']] += 1
+			if row['actual_qty'] != row['expected_qty']:
+				bucket['qty_mismatch'] += 1
+			for name, (since, until) in TIMINGS.items():
+				if row[since] is not None and row[until] is not None:
+					bucket['timings'][name].append((row[until] - row[since]).total_seconds())
+
+		now = datetime.now()
+		series = []
+		for bucket in sorted(buckets.values(), key=lambda b: b['start']):
+			# Boxes per hour over the part of the bucket inside the requested range
+			span = (min(bucket['end'], end, now) - max(bucket['start'], start)).total_seconds()
+			series.append(
+				{
+					'bucket': bucket['start'].isoformat(),
+					'shift': bucket['shift'],
+					'boxes': bucket['boxes'],
+					'approved': bucket['approved'],
+					'rejected': bucket['rejected'],
+					'qty_mismatch': bucket['qty_mismatch'],
+					'reject_reasons': dict(bucket['reasons']),
+					'boxes_per_hour': round(bucket['boxes'] * 3600 / span, 1) if span > 0 else None,
+					**{
+						f'mean_{name}_seconds': round(sum(values) / len(values), 3) if values else None
+						for name, values in bucket['timings'].items()
+					},
+				}
+			)
+		return series
+
+
+def _shift_starts(shifts: list[dict]) -> list[tuple[time, str]]:
+	starts = []
+	for shift in shifts or []:
+		hour, minute = (int(part) for part in str(shift['start']).split(':'))
+		starts.append((time(hour, minute), str(shift.get('name') or shift['start'])))
+	return sorted(starts) or [(time(0, 0), 'DAY')]
+
+
+def _bucket(
+	moment: datetime, resolution: str, shift_starts: list[tuple[time, str]]
+) -> tuple[datetime, datetime, str | None]:
+	"""(bucket start, bucket end, shift name) containing `moment`."""
+	moment = moment.replace(tzinfo=None)
+	if resolution == 'hour':
+		start = moment.replace(minute=0, second=0, microsecond=0)
+		return start, start + timedelta(hours=1), None
+	day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+	if resolution == 'day':
+		return day, day + timedelta(days=1), None
+
+	# Shifts: the last one starting at or before `moment`, else the last of the day before
+	starts = [(day + timedelta(hours=t.hour, minutes=t.minute), name) for t, name in shift_starts]
+	starts = [(start - timedelta(days=1), name) for start, name in starts[-1:]] + starts
+	starts.append((starts[1][0] + timedelta(days=1), starts[1][1]))
+	for (start, name), (next_start, _) in zip(starts, starts[1:]):
+		if start <= moment < next_start:
+			return start, next_start, name
+	raise ValueError(f'No shift contains {moment}')
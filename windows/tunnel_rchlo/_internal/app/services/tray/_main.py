@@ -16,7 +16,8 @@ try:
 except ImportError:
 	TRAY_AVAILABLE = False
 
-from app.core import settings
+from app.core import settings, event_bus
+from app.core.events import DeviceStateChanged, ReadingStarted, ReadingStopped, TagAdded, TagsCleared
 from app.services import rfid_manager
 
 
@@ -129,8 +130,13 @@ class TrayManager:
 		return pystray.Menu(*items)
 
 	def _update_loop(self):
-		"""Update menu every second"""
+		"""Rebuild the menu when a device or the tag count changes, at most once per second"""
+		subscription = event_bus.subscribe(
+			DeviceStateChanged, ReadingStarted, ReadingStopped, TagAdded, TagsCleared, loop=None
+		)
 		while True:
+			subscription.get_blocking()
+			subscription.drain()
 			if self._icon:
 				self._build_menu()
 				self._icon.update_menu()
@@ -0,0 +1,65 @@
+// Shared connection to the server-sent event stream (/api/v1/events/stream).
+// Components register callbacks instead of polling:
+//   bridgeEvents.on(["TagAdded", "TagsCleared"], () => this.loadTags());
+// Callbacks are throttled (a burst of tag reads triggers one reload per
+// interval; 0 delivers every event) and all of them run once with a null
+// event after a reconnect to resync.
+(function () {
+  const listeners = [];
+  let source = null;
+  let wasDisconnected = false;
+
+  function call(listener, event) {
+    if (!listener.interval) {
+      listener.callback(event);
+      return;
+    }
+    if (listener.timer) {
+      listener.pending = event;
+      return;
+    }
+    listener.callback(event);
+    listener.timer = setTimeout(() => {
+      listener.timer = null;
+      if (listener.pending) {
+        const pending = listener.pending;
+        listener.pending = null;
+        call(listener, pending);
+      }
+    }, listener.interval);
+  }
+
+  function connect() {
+    source = new EventSource("/api/v1/events/stream");
+    source.onopen = () => {
+      if (wasDisconnected) {
+        listeners.forEach((listener) => call(listener, null));
+      }
+      wasDisconnected = false;
+    };
+    source.onerror = () => {
+      wasDisconnected = true;
+    };
+    listeners.forEach(attach);
+  }
+
+  function attach(listener) {
+    listener.types.forEach((type) =>
+      source.addEventListener(type, (message) =>
+        call(listener, JSON.parse(message.data)),
+      ),
+    );
+  }
+
+  window.bridgeEvents = {
+    on(types, callback, interval = 500) {
+      const listener = { types, callback, interval, timer: null, pending: null };
+      listeners.push(listener);
+      if (source) {
+        attach(listener);
+      } else {
+        connect();
+      }
+    },
+  };
+})();